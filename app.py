@@ -1,6 +1,24 @@
+import argparse
+import atexit
+
+from dotenv import load_dotenv
+
 from controller.application import Application
+from logger import setup_logging
+from metrics import dump_metrics, registry
+from profiling import parse_modes, profiler
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--profile', metavar='MODES', type=parse_modes,
+                        help='profile actions: cpu, memory or cpu,memory')
+    args = parser.parse_args()
+    if args.profile:
+        profiler.modes = args.profile
+    load_dotenv()
+    setup_logging()
+    if registry.enabled:
+        atexit.register(dump_metrics)
     app = Application()
     app.main()
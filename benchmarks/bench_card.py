@@ -0,0 +1,72 @@
+"""Memory and construction time of `Card` objects, scaled to one million cards.
+
+Usage: python -m benchmarks.bench_card [--cards N]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+from flashcards.deck import Card
+
+
+@dataclass
+class DictCard:
+    """Previous `Card` layout: regular dataclass with per-instance `__dict__` and `uuid4` string IDs."""
+    card_id: str = field(default_factory=lambda: str(uuid.uuid4()), init=False)
+    front: str
+    back: str
+
+
+def _time(factory: Callable[[int], object], count: int) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    cards = [factory(i) for i in range(count)]
+    elapsed = time.perf_counter() - start
+    del cards
+    return elapsed
+
+
+def _memory(factory: Callable[[int], object], count: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    cards: List[object] = [factory(i) for i in range(count)]
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cards
+    return memory
+
+
+def run(count: int) -> None:
+    fronts = [f'What is fact number {i}?' for i in range(count)]
+    backs = [f'Fact number {i} is a fact.' for i in range(count)]
+    card_ids = [f'{i:032x}' for i in range(count)]
+    # Front/back strings are shared with the lists above, so only card objects and their IDs are measured.
+    list_memory = _memory(lambda i: None, count)
+
+    cases: Dict[str, Callable[[int], object]] = {
+        'dict dataclass, uuid4 id': lambda i: DictCard(fronts[i], backs[i]),
+        'slotted Card, random id': lambda i: Card(fronts[i], backs[i]),
+        'slotted Card, content id': lambda i: Card(fronts[i], backs[i], source='note.md'),
+        'slotted Card, restored': lambda i: Card.restore(card_ids[i], fronts[i], backs[i]),
+    }
+    scale = 1_000_000 / count
+    print(f'{"case":<28}{"time / 1M cards":>18}{"memory / 1M cards":>20}{"bytes / card":>14}')
+    for name, factory in cases.items():
+        elapsed = _time(factory, count)
+        memory = _memory(factory, count) - list_memory
+        print(f'{name:<28}{elapsed * scale:>16.2f} s{memory * scale / 2 ** 20:>17.1f} MB{memory / count:>14.0f}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cards', type=int, default=200_000, help='number of cards to build per case')
+    args = parser.parse_args()
+    run(args.cards)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Cold import time of the application, measured with `python -X importtime` in fresh interpreters.
+
+Usage: python -m benchmarks.bench_startup [--module controller.application] [--runs N] [--top N] [--budget-ms MS]
+Exits with status 1 when the median import time exceeds the budget.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules which must not be imported before they are needed.
+HEAVY_MODULES = ('openai', 'tkinter', 'keyring', 'cryptography')
+
+
+def measure(module: str) -> Tuple[int, Dict[str, int], List[str]]:
+    """Import `module` in a new interpreter, return its cumulative import time (us), cumulative
+    times of all imported modules and heavy modules which got imported."""
+    code = f'import sys, {module}; print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT_DIR,
+                            capture_output=True, text=True, check=True)
+    times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    heavy = [name for name in result.stdout.strip().split(',') if name]
+    return times.get(module, 0), times, heavy
+
+
+def run(module: str, runs: int, top: int, budget_ms: float) -> bool:
+    totals = []
+    times: Dict[str, int] = {}
+    heavy: List[str] = []
+    for _ in range(runs):
+        total, times, heavy = measure(module)
+        totals.append(total)
+    median_ms = statistics.median(totals) / 1000
+    print(f'{module}: median {median_ms:.1f} ms over {runs} runs (budget {budget_ms:.0f} ms)')
+    print(f'\n{"cumulative [ms]":>16}  module')
+    for name, cumulative in sorted(times.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f'{cumulative / 1000:>16.1f}  {name}')
+    if heavy:
+        print(f'\nHeavy modules imported at startup: {", ".join(heavy)}')
+    return median_ms <= budget_ms and not heavy
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='controller.application', help='module to import')
+    parser.add_argument('--runs', type=int, default=5, help='number of fresh interpreters to measure')
+    parser.add_argument('--top', type=int, default=15, help='number of slowest imports to list')
+    parser.add_argument('--budget-ms', type=float, default=150.0, help='maximal median import time')
+    args = parser.parse_args()
+    if not run(args.module, args.runs, args.top, args.budget_ms):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
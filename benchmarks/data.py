@@ -0,0 +1,52 @@
+"""Deterministic synthetic data for benchmarks: notes, cards, AI responses and users."""
+import random
+from typing import Dict, List
+
+from flashcards.deck import Card
+
+WORDS = ('python', 'memory', 'card', 'deck', 'note', 'review', 'answer', 'question', 'function', 'module', 'object',
+         'class', 'value', 'list', 'string', 'index', 'search', 'storage', 'profile', 'language', 'fact', 'time')
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def make_note(size_kb: int, seed: int = 0) -> str:
+    """Markdown note of about `size_kb` kilobytes, with nested headings and paragraphs."""
+    rng = random.Random(seed)
+    parts: List[str] = []
+    size = 0
+    section = 0
+    while size < size_kb * 1024:
+        section += 1
+        heading = f'{"#" * (1 + section % 3)} Section {section}'
+        paragraph = ' '.join(_sentence(rng, rng.randint(6, 16)) for _ in range(rng.randint(3, 8)))
+        parts.extend((heading, paragraph))
+        size += len(heading) + len(paragraph) + 2
+    return '\n\n'.join(parts)
+
+
+def make_cards(count: int, seed: int = 0) -> List[Card]:
+    rng = random.Random(seed)
+    return [Card.restore(f'{i:032x}', f'{_sentence(rng, 6)[:-1]} {i}?', _sentence(rng, 12)) for i in range(count)]
+
+
+def make_response(count: int, seed: int = 0) -> str:
+    """AI response with `count` cards, as parsed by `parse_cards`."""
+    return repr([{'front': card.front, 'back': card.back} for card in make_cards(count, seed)])
+
+
+def make_users(count: int, profiles: int = 2) -> Dict[str, dict]:
+    """Users data as stored by users storage, with `profiles` OpenAI profiles per user."""
+    return {
+        f'user{i}': {
+            'user_name': f'user{i}',
+            'encrypted_password': f'$2b$12${i:053d}',
+            'profiles': [{
+                'profile_name': f'profile{j}',
+                'credentials': [{'credentials_type': 'AI', 'service_name': 'OpenAI', 'gpt_model': 'gpt-4'}],
+                'default_ai': 'OpenAI',
+            } for j in range(profiles)],
+        } for i in range(count)
+    }
@@ -0,0 +1,212 @@
+"""Benchmarks of deck, parsing, storage and editor hot paths, compared against a stored baseline.
+
+Usage: python -m benchmarks.suite [--cards N [N ...]] [--users N] [--note-kb N] [--response-cards N] [--repeats N]
+                                  [--filter TEXT] [--no-startup] [--save FILE] [--baseline FILE] [--threshold 0.2]
+Exits with status 1 when any case is slower than its baseline by more than the threshold.
+Typical use: `--save before.json` before a change, `--baseline before.json` after it.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from benchmarks.bench_startup import measure
+from benchmarks.data import make_cards, make_note, make_response, make_users
+from flashcards.deck import Card, Deck, parse_cards
+from flashcards.editor import DataclassEditor
+from notes.markdown import parse_markdown
+from profiles.manager import UserManager
+from profiles.repository import JSONStorage, SQLiteStorage
+from profiles.security import Bcrypt
+from settings import USERS_FILE_BACKUPS, USERS_FILE_INDENT
+from utils import atomic_write
+
+# Cards removed one by one in `deck.remove_card` cases
+REMOVED_CARDS = 1000
+# Cards edited in `editor.round_trip` case
+EDITED_CARDS = 100
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[Any], Any]
+    # Called before every repeat, its result is passed to `run`, its time is not measured.
+    setup: Callable[[], Any] = lambda: None
+    # Called with the setup result after every repeat, not measured either.
+    teardown: Callable[[Any], Any] = lambda state: None
+    # Measures the case on its own (e.g. in a subprocess), returning seconds, instead of timing `run`.
+    measure: Optional[Callable[[], float]] = None
+
+
+def time_case(case: Case, repeats: int) -> List[float]:
+    times = []
+    for _ in range(repeats):
+        if case.measure is not None:
+            times.append(case.measure())
+            continue
+        state = case.setup()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            case.run(state)
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+            case.teardown(state)
+    return times
+
+
+def _deck(cards: List[Card]) -> Deck:
+    deck = Deck()
+    deck.load_cards(cards)
+    return deck
+
+
+def _remove_cards(deck: Deck) -> None:
+    for card in deck.cards[:REMOVED_CARDS]:
+        deck.remove_card(card)
+
+
+def _edit_cards(editor: DataclassEditor, cards: List[Card]) -> None:
+    for card in cards:
+        editor._read_dataclass_from_tmpfile(editor._write_dataclass_to_tmpfile(card), Card)
+
+
+def build_cases(cards_counts: Sequence[int], users_count: int, note_kb: int, response_cards: int,
+                work_dir: str, startup: bool = True) -> List[Case]:
+    cases = []
+    for count in cards_counts:
+        cards = make_cards(count)
+        fronts = [card.front for card in cards]
+        cases += [
+            Case(f'card.create[{count}]', lambda _, fronts=fronts: [Card(front, front) for front in fronts]),
+            Case(f'deck.load_cards[{count}]', lambda _, cards=cards: Deck().load_cards(cards)),
+            Case(f'deck.remove_card[{count}]', _remove_cards, lambda cards=cards: _deck(cards)),
+        ]
+
+    response = make_response(response_cards)
+    note = make_note(note_kb)
+    cases += [
+        Case(f'parse_cards[{response_cards}]', lambda _: parse_cards(response)),
+        Case(f'parse_markdown[{note_kb}kb]', lambda _: parse_markdown(note)),
+    ]
+
+    users = make_users(users_count)
+    json_path = os.path.join(work_dir, 'users.json')
+    JSONStorage(json_path, USERS_FILE_INDENT, 0).save_data(users)
+    sqlite_path = os.path.join(work_dir, 'users.sqlite3')
+    sqlite_storage = SQLiteStorage(sqlite_path)
+    sqlite_storage.save_data(users)
+    sqlite_storage.close()
+    encryption = Bcrypt(4)
+    cases += [
+        Case(f'json_storage.save[{users_count}]', lambda storage: storage.save_data(users),
+             lambda: JSONStorage(os.path.join(work_dir, 'saved.json'), USERS_FILE_INDENT, USERS_FILE_BACKUPS)),
+        Case(f'json_storage.load[{users_count}]', lambda storage: storage.load_data(),
+             lambda: JSONStorage(json_path, USERS_FILE_INDENT, 0)),
+        Case(f'sqlite_storage.load[{users_count}]', lambda storage: storage.load_data(),
+             lambda: SQLiteStorage(sqlite_path), lambda storage: storage.close()),
+        Case(f'user_manager.load_users[{users_count}]', lambda storage: UserManager(encryption, storage),
+             lambda: JSONStorage(json_path, USERS_FILE_INDENT, 0)),
+        Case(f'user_manager.load_all_users[{users_count}]',
+             lambda manager: [manager.users[username] for username in manager.users],
+             lambda: UserManager(encryption, JSONStorage(json_path, USERS_FILE_INDENT, 0))),
+    ]
+
+    edited = make_cards(EDITED_CARDS)
+    cases.append(Case(f'editor.round_trip[{EDITED_CARDS}]', lambda editor: _edit_cards(editor, edited),
+                      lambda: DataclassEditor(text_editor='true')))
+
+    if startup:
+        module = 'controller.application'
+        cases.append(Case(f'startup.import[{module}]', lambda _: None, measure=lambda: measure(module)[0] / 1e6))
+    return cases
+
+
+def run(cases: List[Case], repeats: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for case in cases:
+        times = time_case(case, repeats)
+        results[case.name] = {'min': min(times), 'median': statistics.median(times)}
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """Names of cases whose best time is slower than in baseline by more than `threshold` (0.2 = 20%)."""
+    return [name for name, result in results.items()
+            if name in baseline and result['min'] > baseline[name]['min'] * (1 + threshold)]
+
+
+def format_results(results: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Dict[str, float]]] = None,
+                   regressions: Sequence[str] = ()) -> str:
+    lines = [f'{"case":<44}{"min [ms]":>12}{"median [ms]":>13}']
+    if baseline is not None:
+        lines[0] += f'{"baseline":>12}{"change":>9}'
+    for name, result in results.items():
+        line = f'{name:<44}{result["min"] * 1000:>12.2f}{result["median"] * 1000:>13.2f}'
+        if baseline is not None:
+            if name in baseline:
+                base = baseline[name]['min']
+                line += f'{base * 1000:>12.2f}{(result["min"] - base) / base:>+9.0%}'
+                line += '  REGRESSION' if name in regressions else ''
+            else:
+                line += f'{"-":>12}{"new":>9}'
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def load_baseline(file_path: str) -> Dict[str, Dict[str, float]]:
+    with open(file_path, 'r') as file:
+        return json.load(file)['results']
+
+
+def save_baseline(file_path: str, results: Dict[str, Dict[str, float]]) -> None:
+    data = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    atomic_write(file_path, json.dumps(data, indent=2))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cards', type=int, nargs='+', default=[1_000, 100_000], help='deck sizes')
+    parser.add_argument('--users', type=int, default=5_000, help='number of users in users storage')
+    parser.add_argument('--note-kb', type=int, default=256, help='size of parsed note')
+    parser.add_argument('--response-cards', type=int, default=1_000, help='number of cards in parsed AI response')
+    parser.add_argument('--repeats', type=int, default=5, help='measurements of each case, the best one is compared')
+    parser.add_argument('--filter', default='', help='run only cases whose name contains TEXT')
+    parser.add_argument('--no-startup', dest='startup', action='store_false', help='skip startup import case')
+    parser.add_argument('--save', metavar='FILE', help='store results as a baseline')
+    parser.add_argument('--baseline', metavar='FILE', help='compare results with a stored baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown against baseline')
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    with tempfile.TemporaryDirectory() as work_dir:
+        cases = build_cases(args.cards, args.users, args.note_kb, args.response_cards, work_dir, args.startup)
+        results = run([case for case in cases if args.filter in case.name], args.repeats)
+    regressions = compare(results, baseline, args.threshold) if baseline is not None else []
+    print(format_results(results, baseline, regressions))
+    if args.save:
+        save_baseline(args.save, results)
+    if regressions:
+        print(f'\n{len(regressions)} cases slower than baseline by more than {args.threshold:.0%}.')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""Non-interactive command line interface for batch processing of notes.
+
+Usage:
+    python cli.py ingest NOTES... [--deck NAME]
+    python cli.py generate NOTES... [--deck NAME] [--model MODEL] [--workers N] [--output-dir DIR] [--format txt]
+                                    [--force] [--keep-known]
+    python cli.py export OUTPUT [--deck NAME] [--status approved] [--format fcdk]
+    python cli.py import DECK_FILE [--deck NAME]
+
+Any command accepts --metrics FILE to write timings of its operations (Prometheus text format, JSON for .json files)
+and --profile MODES to profile it with cProfile and/or tracemalloc (cpu, memory or cpu,memory), see profiling.py.
+
+OpenAI API key is read from OPENAI_API_KEY environment variable (or .env file).
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from custom_exceptions import InvalidDeckFile
+from flashcards.binary_deck import BinaryDeckReader
+from flashcards.deck import Card, parse_cards
+from flashcards.export import EXPORTERS
+from flashcards.fingerprints import FingerprintIndex
+from flashcards.history import QueryHistory, QueryOutcome
+from flashcards.store import CardStatus, DeckStore
+from logger import logger, setup_logging
+from metrics import registry, span
+from notes.markdown import NoteChunk
+from notes.reader import reader_for
+from profiling import parse_modes, profile, profiler
+from settings import (CLI_WORKERS, CONTENT_CARD_IDS, DECKS_DB, FINGERPRINTS_DIR, OPENAI_MODELS, PROFILE_DIR,
+                      PROMPT, QUERY_HISTORY_DB, SKIP_KNOWN_CARDS, STORAGE_DIR)
+
+DEFAULT_DECK = 'cli'
+
+
+@dataclass
+class Note:
+    path: str
+    content: str
+    # Parts of the note cards are generated from separately, cards are stored with their digests as source
+    chunks: List[NoteChunk]
+
+
+def read_note(path: str) -> Note:
+    reader = reader_for(path)
+    content = reader.read_source(path)
+    return Note(path, content, reader.chunks(content))
+
+
+def read_notes(paths: List[str], workers: int) -> List[Note]:
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(read_note, paths))
+
+
+def generate_note_cards(generator, model: str, chunks: List[NoteChunk],
+                        history: QueryHistory) -> List[Tuple[NoteChunk, List[Card]]]:
+    """Generate cards from each chunk of a note, one request per chunk."""
+    generated = []
+    for chunk in chunks:
+        cards_content = generator.generate_flashcards(model, PROMPT, chunk.text)
+        if not cards_content:
+            raise ValueError(f'AI returned no cards{_section(chunk)}.')
+        try:
+            cards = parse_cards(cards_content, chunk.digest if CONTENT_CARD_IDS else None)
+        except Exception as e:
+            history.set_outcome(generator.last_query_id, QueryOutcome.PARSE_ERROR, str(e))
+            raise ValueError(f'Invalid AI response{_section(chunk)}: {e}') from None
+        generated.append((chunk, cards))
+    return generated
+
+
+def export_names(paths: List[str]) -> Dict[str, str]:
+    """Names of per-note export files (without extension), relative to the notes' common directory.
+
+    Raises ValueError when two notes would be exported to the same file, e.g. `notes.md` and `notes.txt`.
+    """
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths]) if paths else ''
+    names: Dict[str, str] = {}
+    for path in paths:
+        name = os.path.splitext(os.path.relpath(os.path.abspath(path), root))[0]
+        if name in names.values():
+            other = next(other for other, other_name in names.items() if other_name == name)
+            raise ValueError(f'{path} and {other} would be exported to the same file.')
+        names[path] = name
+    return names
+
+
+def _section(chunk: NoteChunk) -> str:
+    return f' for section "{chunk.title}"' if chunk.title else ''
+
+
+def ingest(args: argparse.Namespace) -> int:
+    """Read notes and report which of them cards were already generated from."""
+    with DeckStore(os.path.join(args.storage_dir, DECKS_DB)) as deck_store:
+        for note in read_notes(args.notes, args.workers):
+            counts = [deck_store.count(args.deck, source=chunk.digest) for chunk in note.chunks]
+            generated = sum(counts)
+            status = f'{generated} cards generated' if generated else 'new'
+            if generated and not all(counts):
+                status += f', {counts.count(0)} of {len(counts)} sections new'
+            print(f'{note.path}: {len(note.content)} characters, {status}')
+    return 0
+
+
+def generate(args: argparse.Namespace) -> int:
+    """Generate cards from notes concurrently, store them in the deck and optionally export them per note."""
+    # Imported here, as the OpenAI SDK is slow to import and only needed by this command.
+    from flashcards.generator import CardsGenerator, OpenAIClient
+
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        print('OPENAI_API_KEY environment variable is not set.', file=sys.stderr)
+        return 2
+    deck_store = DeckStore(os.path.join(args.storage_dir, DECKS_DB))
+    history = QueryHistory(os.path.join(args.storage_dir, QUERY_HISTORY_DB))
+    try:
+        return _generate(args, OpenAIClient(api_key), CardsGenerator, deck_store, history)
+    finally:
+        history.close()
+        deck_store.close()
+
+
+def _generate(args: argparse.Namespace, client, generator_class, deck_store: DeckStore,
+              history: QueryHistory) -> int:
+    # Cards become known once approved in the application, cards stored here are new (not reviewed) ones.
+    fingerprints = FingerprintIndex(os.path.join(args.storage_dir, FINGERPRINTS_DIR, args.deck))
+
+    names = {}
+    if args.output_dir:
+        try:
+            names = export_names(list(dict.fromkeys(args.notes)))
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+
+    pending = []
+    for note in read_notes(args.notes, args.workers):
+        # Like in the application, only sections without cards are sent again, unless forced.
+        chunks = note.chunks if args.force else [
+            chunk for chunk in note.chunks if not deck_store.count(args.deck, source=chunk.digest)]
+        if chunks:
+            pending.append((note, chunks))
+        else:
+            print(f'{note.path}: skipped, cards were already generated from this content')
+    failures = 0
+    with ThreadPoolExecutor(args.workers) as executor:
+        futures = {executor.submit(generate_note_cards, generator_class(client, history), args.model, chunks,
+                                   history): note for note, chunks in pending}
+        # Results are stored from this thread only, workers just wait for the AI service.
+        for future in as_completed(futures):
+            note = futures[future]
+            try:
+                generated = future.result()
+            except Exception as e:
+                failures += 1
+                logger.error(f'Generating flashcards from {note.path} failed: \n{e}')
+                print(f'{note.path}: failed, {e}', file=sys.stderr)
+                continue
+            new_cards, known_cards, repeated_cards = fingerprints.classify(
+                [card for _, chunk_cards in generated for card in chunk_cards])
+            kept_ids = {card.card_id for card in new_cards} if args.skip_known else None
+            cards = []
+            for chunk, chunk_cards in generated:
+                if kept_ids is not None:
+                    chunk_cards = [card for card in chunk_cards if card.card_id in kept_ids]
+                deck_store.add_cards(args.deck, chunk_cards, source=chunk.digest)
+                cards.extend(chunk_cards)
+            if args.output_dir:
+                output = os.path.join(args.output_dir, f'{names[note.path]}.{args.format}')
+                os.makedirs(os.path.dirname(output), exist_ok=True)
+                EXPORTERS[args.format](output, cards)
+            print(f'{note.path}: {len(cards)} cards generated, {len(known_cards)} already known, '
+                  f'{len(repeated_cards)} repeated')
+    return 1 if failures else 0
+
+
+def export(args: argparse.Namespace) -> int:
+    """Export cards of a deck, streamed from storage."""
+    status = CardStatus(args.status) if args.status else None
+    exported = 0
+
+    def cards(deck_store: DeckStore) -> Iterator[Card]:
+        nonlocal exported
+        for card in deck_store.iter_cards(args.deck, status):
+            exported += 1
+            yield card
+
+    with DeckStore(os.path.join(args.storage_dir, DECKS_DB)) as deck_store:
+        EXPORTERS[args.format](args.output, cards(deck_store))
+    print(f'{exported} cards exported to {args.output}')
+    return 0
+
+
+def import_deck(args: argparse.Namespace) -> int:
+    """Import cards of a binary deck (.fcdk) file into the deck, as new cards, streamed from the file."""
+    try:
+        with BinaryDeckReader(args.input) as reader, DeckStore(os.path.join(args.storage_dir, DECKS_DB)) as deck_store:
+            imported = deck_store.add_cards(args.deck, reader)
+    except InvalidDeckFile as e:
+        print(e, file=sys.stderr)
+        return 2
+    print(f'{imported} cards imported from {args.input}')
+    return 0
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'{value} is not a positive number')
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--storage-dir', default=STORAGE_DIR, help='directory with decks and history databases')
+    common.add_argument('--deck', default=DEFAULT_DECK, help='name of the deck cards are stored in')
+    common.add_argument('--workers', type=positive_int, default=CLI_WORKERS,
+                        help='number of notes processed concurrently')
+    common.add_argument('--metrics', metavar='FILE', help='record timings and write them to FILE')
+    common.add_argument('--profile', metavar='MODES', type=parse_modes,
+                        help='profile the command: cpu, memory or cpu,memory')
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', parents=[common], help=ingest.__doc__)
+    ingest_parser.add_argument('notes', nargs='+', help='note files (.txt, .md)')
+    ingest_parser.set_defaults(handler=ingest)
+
+    generate_parser = subparsers.add_parser('generate', parents=[common], help=generate.__doc__)
+    generate_parser.add_argument('notes', nargs='+', help='note files (.txt, .md)')
+    generate_parser.add_argument('--model', default=OPENAI_MODELS[0], choices=OPENAI_MODELS)
+    generate_parser.add_argument('--force', action='store_true', help='generate cards also from already used notes')
+    generate_parser.add_argument('--keep-known', dest='skip_known', action='store_false', default=SKIP_KNOWN_CARDS,
+                                 help='keep cards already approved in the deck')
+    generate_parser.add_argument('--output-dir',
+                                 help='export cards of each note to this directory, under its relative path')
+    generate_parser.add_argument('--format', default='txt', choices=sorted(EXPORTERS))
+    generate_parser.set_defaults(handler=generate)
+
+    export_parser = subparsers.add_parser('export', parents=[common], help=export.__doc__)
+    export_parser.add_argument('output', help='output file')
+    export_parser.add_argument('--status', choices=[status.value for status in CardStatus])
+    export_parser.add_argument('--format', default='txt', choices=sorted(EXPORTERS))
+    export_parser.set_defaults(handler=export)
+
+    import_parser = subparsers.add_parser('import', parents=[common], help=import_deck.__doc__)
+    import_parser.add_argument('input', help='binary deck (.fcdk) file, e.g. written by export --format fcdk')
+    import_parser.set_defaults(handler=import_deck)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        profiler.modes = args.profile
+        profiler.output_dir = os.path.join(args.storage_dir, PROFILE_DIR)
+    if args.metrics:
+        registry.enabled = True
+    try:
+        with span('command', command=args.command), profile(args.command):
+            return args.handler(args)
+    finally:
+        if args.metrics:
+            registry.dump(args.metrics)
+
+
+if __name__ == '__main__':
+    load_dotenv()
+    setup_logging()
+    sys.exit(main())
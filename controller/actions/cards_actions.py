@@ -1,18 +1,26 @@
-import ast
+import time
 
 from controller.actions.base_action import Action
-from flashcards.deck import Card, Deck
+from flashcards.deck import Card, Deck, parse_cards
 from flashcards.editor import DataclassEditor
+from flashcards.fingerprints import FingerprintIndex
 from flashcards.generator import CardsGenerator, OpenAIClient
+from flashcards.history import QueryHistory, QueryOutcome
+from flashcards.scheduler import sm2
+from flashcards.store import CardStatus, DeckStore
+from notes.markdown import NoteChunk
 from profiles.credentials import AICredentials
-from settings import PROMPT
+from settings import CONTENT_CARD_IDS, PROMPT, REVIEW_PAGE_SIZE, SKIP_KNOWN_CARDS
 from ui.menu_items import StageState
 from ui.ui_manager import ContextManager
+from utils import clear_screen
 
 
 class GenerateCards(Action):
-    def __init__(self, context_manager: ContextManager):
+    def __init__(self, context_manager: ContextManager, deck_store: DeckStore, query_history: QueryHistory):
         self.context_manager = context_manager
+        self.deck_store = deck_store
+        self.query_history = query_history
 
     def execute(self):
         self.log('Generating cards...')
@@ -28,22 +36,56 @@ class GenerateCards(Action):
             api_key = self.context_manager.current_ai.get_api_key()
             model = self.context_manager.current_ai.gpt_model
             client = OpenAIClient(api_key)
-            cards_generator = CardsGenerator(client)
+            cards_generator = CardsGenerator(client, self.query_history)
+            deck_name = self.context_manager.deck_name
 
             content = self.context_manager.current_note
-            cards_content = cards_generator.generate_flashcards(model, PROMPT, content)
-            if not cards_content:
-                self.error('Failed to generate flashcards from the content.')
-                return
+            chunks = self.context_manager.current_note_chunks or [NoteChunk('', content)]
+            # Sections cards were already generated from are skipped, unless none of them changed.
+            changed = [chunk for chunk in chunks if not self.deck_store.count(deck_name, source=chunk.digest)]
+            if changed and len(changed) < len(chunks):
+                self.log(f'{len(chunks) - len(changed)} unchanged note sections skipped.')
+                chunks = changed
 
-            cards = [Card.from_dict(c) for c in ast.literal_eval(cards_content)]
-            self.context_manager.temp_deck = self._save_cards_to_deck(cards)
+            generated = []
+            for chunk in chunks:
+                cards_content = cards_generator.generate_flashcards(model, PROMPT, chunk.text)
+                if not cards_content:
+                    self.error(f'Failed to generate flashcards from the content{self._section(chunk)}.')
+                    return
+                try:
+                    cards = parse_cards(cards_content, chunk.digest if CONTENT_CARD_IDS else None)
+                except Exception as e:
+                    self.query_history.set_outcome(cards_generator.last_query_id, QueryOutcome.PARSE_ERROR, str(e))
+                    raise
+                generated.append((chunk, cards))
+
+            new_cards, known_cards, repeated_cards = FingerprintIndex.for_deck(deck_name).classify(
+                [card for _, cards in generated for card in cards])
+            kept_ids = {card.card_id for card in new_cards} if SKIP_KNOWN_CARDS else None
+            all_cards = []
+            for chunk, cards in generated:
+                if kept_ids is not None:
+                    cards = [card for card in cards if card.card_id in kept_ids]
+                self.deck_store.add_cards(deck_name, cards, source=chunk.digest)
+                all_cards.extend(cards)
+            self.context_manager.temp_deck = self._save_cards_to_deck(all_cards)
             self.context_manager.current_stage = StageState.CARDS_GENERATED
-            self.info('Flashcards generated successfully!')
+            message = 'Flashcards generated successfully!'
+            skipped = ' and were skipped' if SKIP_KNOWN_CARDS else ''
+            if known_cards:
+                message += f'\n{len(known_cards)} of them already exist in your decks{skipped}.'
+            if repeated_cards:
+                message += f'\n{len(repeated_cards)} of them repeat other generated cards{skipped}.'
+            self.info(message)
 
         except Exception as e:
             self.error(f'Generating flashcards failed: \n{e}')
 
+    @staticmethod
+    def _section(chunk: NoteChunk) -> str:
+        return f' of section "{chunk.title}"' if chunk.title else ''
+
     @staticmethod
     def _save_cards_to_deck(cards):
         deck = Deck()
@@ -52,44 +94,130 @@ class GenerateCards(Action):
 
 
 class WorkWithCards(Action):
-    def __init__(self, context_manager: ContextManager):
+    def __init__(self, context_manager: ContextManager, deck_store: DeckStore):
         self.context_manager = context_manager
+        self.deck_store = deck_store
         self.cards_editor: DataclassEditor = DataclassEditor(display_fields=['front', 'back'])
 
     def execute(self):
         temp_deck = self.context_manager.temp_deck
         self.log('Work with generated cards...')
-        if not temp_deck or not temp_deck.cards:
+        if not temp_deck:
             self.error('No cards to work with...')
+            return
         self.context_manager.final_deck = Deck()
         self.process_input()
-        if not temp_deck.cards:
+        if not temp_deck:
             self.info('There are no more cards to work through. ')
 
     def process_input(self):
-        for card in self.context_manager.temp_deck.cards[:]:
-            while True:
-                print('What you want to do?')
-                print('---')
-                print(card)
-                print('---')
-                print('1. Approve card.')
-                print('2. Reject card.')
-                print('3. Edit card.')
-                print('8. Back to main menu')
-                user_input = input('>>>>> ')
-                if user_input == '1':
-                    self.context_manager.final_deck.load_cards([card])
-                elif user_input == '2':
-                    print('Card rejected.')
-                elif user_input == '3':
-                    edited_card = self.cards_editor.edit_dataclass(card)
-                    self.context_manager.final_deck.load_cards([Card(front=edited_card.front, back=edited_card.back)])
-                elif user_input == '8':
-                    return
-                else:
-                    print(f'Option {user_input} is not available.')
-                    input('Press Enter to continue...')
-                    continue
+        statuses = {}
+        replacements = {}
+        approved = []
+        try:
+            for card in list(self.context_manager.temp_deck):
+                while True:
+                    print('What you want to do?')
+                    print('---')
+                    print(card)
+                    print('---')
+                    print('1. Approve card.')
+                    print('2. Reject card.')
+                    print('3. Edit card.')
+                    print('8. Back to main menu')
+                    user_input = input('>>>>> ')
+                    if user_input == '1':
+                        self.context_manager.final_deck.load_cards([card])
+                        statuses[card.card_id] = CardStatus.APPROVED
+                        approved.append(card)
+                    elif user_input == '2':
+                        print('Card rejected.')
+                        statuses[card.card_id] = CardStatus.REJECTED
+                    elif user_input == '3':
+                        edited_card = self.cards_editor.edit_dataclass(card)
+                        new_card = Card(front=edited_card.front, back=edited_card.back)
+                        self.context_manager.final_deck.load_cards([new_card])
+                        replacements[card.card_id] = new_card
+                        approved.append(new_card)
+                    elif user_input == '8':
+                        return
+                    else:
+                        print(f'Option {user_input} is not available.')
+                        input('Press Enter to continue...')
+                        continue
+                    break
+                self.context_manager.temp_deck.remove_by_id(card.card_id)
+        finally:
+            self.deck_store.record_reviews(self.context_manager.deck_name, statuses, replacements)
+            FingerprintIndex.for_deck(self.context_manager.deck_name).add(approved)
+
+
+class SearchCards(Action):
+    RESULTS_LIMIT = 10
+
+    def __init__(self, context_manager: ContextManager, deck_store: DeckStore):
+        self.context_manager = context_manager
+        self.deck_store = deck_store
+
+    def execute(self):
+        self.log('Searching cards...')
+        query = input('Search for: ').strip()
+        if not query:
+            self.error('Search query can\'t be empty.')
+            return
+        results = self.deck_store.search(self.context_manager.deck_name, query, self.RESULTS_LIMIT)
+        for card, status in results:
+            print(f'[{status.value.capitalize()}]')
+            print(card)
+            print('---')
+        self.info(f'{len(results)} cards matching "{query}" found.')
+
+
+class ReviewCards(Action):
+    def __init__(self, context_manager: ContextManager, deck_store: DeckStore):
+        self.context_manager = context_manager
+        self.deck_store = deck_store
+
+    def execute(self):
+        self.log('Reviewing due cards...')
+        deck_name = self.context_manager.deck_name
+        # Cards due when the session started, reviewed cards are stored page by page, so they are not served again.
+        now = time.time()
+        reviewed = 0
+        stopped = False
+        while not stopped:
+            states = self.deck_store.due_review_states(deck_name, now, REVIEW_PAGE_SIZE)
+            if not states:
                 break
-            self.context_manager.temp_deck.remove_card(card)
+            page_reviewed = []
+            try:
+                for state in states:
+                    card = self.deck_store.get_card(deck_name, state.card_id)
+                    if not card:
+                        self.deck_store.remove_cards(deck_name, [state.card_id])
+                        continue
+                    clear_screen()
+                    print(f'Front: {card.front}')
+                    input('Press enter to show the answer...')
+                    print(f'Back: {card.back}')
+                    grade = self.select_grade()
+                    if grade is None:
+                        stopped = True
+                        break
+                    page_reviewed.append(sm2(state, grade, time.time()))
+            finally:
+                self.deck_store.save_review_states(deck_name, page_reviewed)
+            reviewed += len(page_reviewed)
+        clear_screen()
+        self.info(f'{reviewed} cards reviewed.')
+
+    def select_grade(self):
+        """ Get review grade from the user, None to stop reviewing. """
+        while True:
+            print('How well did you remember? (0 - forgot, 5 - perfect, 8 - back to main menu)')
+            choice = input('>>>>> ').strip()
+            if choice == '8':
+                return None
+            if choice.isdigit() and 0 <= int(choice) <= 5:
+                return int(choice)
+            self.error(f'Option {choice} is not available.')
@@ -3,16 +3,19 @@ from ui.ui_manager import ContextManager
 from ui.menu_items import MenuState
 from utils import clear_screen
 from flashcards.deck import Deck
+from flashcards.export import EXPORTERS
 from settings import STORAGE_DIR
 from datetime import datetime
 
 
 class Export2Txt(Action):
+    FILE_EXTENSION = 'txt'
+
     def __init__(self, context_manager: ContextManager):
         self.context_manager = context_manager
 
     def execute(self):
-        self.log('Exporting cards to .txt file...')
+        self.log(f'Exporting cards to .{self.FILE_EXTENSION} file...')
 
         temp_deck = self.context_manager.temp_deck
         final_deck = self.context_manager.final_deck
@@ -67,10 +70,14 @@ class Export2Txt(Action):
             break
 
     def _save_flashcards(self, deck: Deck, cards_name) -> None:
-        date_time = datetime.now().strftime('%Y-%m-%d_%H:%M')
-        file_name = f'{cards_name}_{date_time}.txt'
-        file_path = f'{STORAGE_DIR}/{file_name}'
-        with open(file_path, 'a') as file:
-            for card in deck.cards:
-                file.write(str(card) + '\n\n')
+        file_path = self._file_path(cards_name)
+        EXPORTERS[self.FILE_EXTENSION](file_path, deck)
         self.info(f'Cards successful saved to {file_path}.')
+
+    def _file_path(self, cards_name) -> str:
+        date_time = datetime.now().strftime('%Y-%m-%d_%H:%M')
+        return f'{STORAGE_DIR}/{cards_name}_{date_time}.{self.FILE_EXTENSION}'
+
+
+class Export2Binary(Export2Txt):
+    FILE_EXTENSION = 'fcdk'
@@ -24,6 +24,7 @@ class LogIn(Action):
                 f'User "{user_name}" doesn\'t exists, try again with a different user name or create new user.')
             return
         password = stdiomask.getpass(prompt='Password: ')
+        print('Verifying password...')
         try:
             self.auth_manager.login_user(user_name, password)
         except InvalidPassword:
@@ -50,6 +51,7 @@ class LogOut(Action):
 
     def execute(self) -> None:
         self.log('Logging out...')
+        self.auth_manager.user_manager.flush()
         self.auth_manager.logout_users()
         self.context_manager.current_menu = MenuState.LOG_MENU
         self.context_manager.current_user = None
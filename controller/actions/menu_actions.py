@@ -55,6 +55,7 @@ class Exit(Action):
             answer = input('Are you sure you want quit? (Y/N) ').strip().upper()
             if answer == 'Y':
                 self.auth_manager.logout_users()
+                self.auth_manager.user_manager.flush()
                 sys.exit()
             if answer == 'N':
                 break
@@ -1,7 +1,12 @@
+import os
+
 import stdiomask  # type: ignore
 
 from controller.actions.base_action import Action
-from notes.reader import TxtReader
+from notes.api import ResponseCache
+from notes.notion import NotionService, extract_page_id
+from notes.reader import ViaAPIReader, reader_for
+from settings import NOTES_CACHE_DIR, STORAGE_DIR
 from ui.gui import FileSelector
 from ui.menu_items import MenuState, StageState
 from ui.ui_manager import ContextManager
@@ -13,12 +18,44 @@ class NoteFromFile(Action):
         self.file_selector = file_selector
 
     def execute(self):
-        self.log('Load note from TXT file...')
+        self.log('Load note from file...')
         file_path = self.file_selector.select_file()
         if file_path:
-            txt_reader = TxtReader()
-            content = txt_reader.read_source(file_path)
+            reader = reader_for(file_path)
+            content = reader.read_source(file_path)
             self.context_manager.current_note = content
+            self.context_manager.current_note_chunks = reader.chunks(content)
             self.context_manager.current_stage = StageState.NO_CARDS_GENERATED
             self.context_manager.current_menu = MenuState.MAIN_MENU
             self.info('Note loaded successfully!')
+
+
+class NoteFromNotion(Action):
+    TOKEN_VARIABLE_NAME = 'NOTION_API_KEY'
+
+    def __init__(self, context_manager: ContextManager):
+        self.context_manager = context_manager
+
+    def execute(self):
+        self.log('Load note from Notion...')
+        page_reference = input('Notion page URL or ID: ')
+        try:
+            page_id = extract_page_id(page_reference)
+        except ValueError as e:
+            self.error(str(e))
+            return
+        token = os.getenv(self.TOKEN_VARIABLE_NAME) or stdiomask.getpass(prompt='Notion integration token: ')
+        if not token:
+            self.error('Notion integration token can\'t be empty.')
+            return
+        try:
+            service = NotionService(token, cache=ResponseCache(f'{STORAGE_DIR}/{NOTES_CACHE_DIR}'))
+            content = ViaAPIReader(service).read_source(page_id)
+        except Exception as e:
+            self.error(f'Loading Notion page failed: \n{e}')
+            return
+        self.context_manager.current_note = content
+        self.context_manager.current_note_chunks = None
+        self.context_manager.current_stage = StageState.NO_CARDS_GENERATED
+        self.context_manager.current_menu = MenuState.MAIN_MENU
+        self.info('Note loaded successfully!')
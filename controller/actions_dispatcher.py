@@ -1,39 +1,74 @@
-from controller.actions.ai_actions import SetupOpenAI
-from controller.actions.cards_actions import GenerateCards, WorkWithCards
-from controller.actions.logging_actions import LogIn, LogOut
-from controller.actions.menu_actions import AIMenu, Exit, MainMenu, ProfileMenu, SourceMenu, ExportMenu
-from controller.actions.note_actions import NoteFromFile
-from controller.actions.profile_actions import NewProfile, SelectProfile
-from controller.actions.user_actions import NewUser, RemoveUser
-from controller.actions.export_actions import Export2Txt
+import importlib
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from controller.actions.base_action import Action
+from metrics import span
+from profiling import profile
+
+
+class ActionSpec(NamedTuple):
+    module: str
+    class_name: str
+    dependencies: Tuple[str, ...]
+
+
+# Actions are imported and created on first dispatch, so modules of actions which are never used
+# (and SDKs they depend on) are not loaded at all.
+ACTIONS: Dict[str, ActionSpec] = {
+    'login': ActionSpec('controller.actions.logging_actions', 'LogIn', ('context_manager', 'auth_manager')),
+    'logout': ActionSpec('controller.actions.logging_actions', 'LogOut', ('context_manager', 'auth_manager')),
+    'new_user': ActionSpec('controller.actions.user_actions', 'NewUser', ('user_manager',)),
+    'remove_user': ActionSpec('controller.actions.user_actions', 'RemoveUser', ('auth_manager',)),
+    'profile_menu': ActionSpec('controller.actions.menu_actions', 'ProfileMenu', ('context_manager',)),
+    'new_profile': ActionSpec('controller.actions.profile_actions', 'NewProfile', ('context_manager', 'user_manager')),
+    'select_profile': ActionSpec('controller.actions.profile_actions', 'SelectProfile', ('context_manager',)),
+    'ai_menu': ActionSpec('controller.actions.menu_actions', 'AIMenu', ('context_manager',)),
+    'source_menu': ActionSpec('controller.actions.menu_actions', 'SourceMenu', ('context_manager',)),
+    'setup_open_ai': ActionSpec('controller.actions.ai_actions', 'SetupOpenAI', ('context_manager', 'user_manager')),
+    'source_file': ActionSpec('controller.actions.note_actions', 'NoteFromFile', ('context_manager', 'file_selector')),
+    'source_notion': ActionSpec('controller.actions.note_actions', 'NoteFromNotion', ('context_manager',)),
+    'generate_cards': ActionSpec('controller.actions.cards_actions', 'GenerateCards',
+                                 ('context_manager', 'deck_store', 'query_history')),
+    'work_with_cards': ActionSpec('controller.actions.cards_actions', 'WorkWithCards',
+                                  ('context_manager', 'deck_store')),
+    'search_cards': ActionSpec('controller.actions.cards_actions', 'SearchCards', ('context_manager', 'deck_store')),
+    'review_cards': ActionSpec('controller.actions.cards_actions', 'ReviewCards', ('context_manager', 'deck_store')),
+    'export_cards': ActionSpec('controller.actions.menu_actions', 'ExportMenu', ('context_manager',)),
+    'export_to_txt': ActionSpec('controller.actions.export_actions', 'Export2Txt', ('context_manager',)),
+    'export_to_binary': ActionSpec('controller.actions.export_actions', 'Export2Binary', ('context_manager',)),
+    'main_menu': ActionSpec('controller.actions.menu_actions', 'MainMenu', ('context_manager',)),
+    'exit': ActionSpec('controller.actions.menu_actions', 'Exit', ('auth_manager',)),
+}
 
 
 class ActionsDispatcher:
-    def __init__(self, context_manager, auth_manager, user_manager, file_selector):
-        self.actions = {
-            'login': LogIn(context_manager, auth_manager),
-            'logout': LogOut(context_manager, auth_manager),
-            'new_user': NewUser(user_manager),
-            'remove_user': RemoveUser(auth_manager),
-            'profile_menu': ProfileMenu(context_manager),
-            'new_profile': NewProfile(context_manager, user_manager),
-            'select_profile': SelectProfile(context_manager),
-            'ai_menu': AIMenu(context_manager),
-            'source_menu': SourceMenu(context_manager),
-            'setup_open_ai': SetupOpenAI(context_manager, user_manager),
-            'source_file': NoteFromFile(context_manager, file_selector),
-            'generate_cards': GenerateCards(context_manager),
-            'work_with_cards': WorkWithCards(context_manager),
-            'export_cards': ExportMenu(context_manager),
-            'export_to_txt': Export2Txt(context_manager),
-            'main_menu': MainMenu(context_manager),
-            'exit': Exit(auth_manager)
+    def __init__(self, context_manager, auth_manager, user_manager, file_selector, deck_store, query_history):
+        self.dependencies = {
+            'context_manager': context_manager,
+            'auth_manager': auth_manager,
+            'user_manager': user_manager,
+            'file_selector': file_selector,
+            'deck_store': deck_store,
+            'query_history': query_history,
         }
+        self.actions: Dict[str, Action] = {}
 
-    def dispatch(self, action_key: str) -> None:
+    def get_action(self, action_key: str) -> Optional[Action]:
         action = self.actions.get(action_key)
+        if action is None:
+            spec = ACTIONS.get(action_key)
+            if spec is None:
+                return None
+            action_class = getattr(importlib.import_module(spec.module), spec.class_name)
+            action = action_class(*(self.dependencies[name] for name in spec.dependencies))
+            self.actions[action_key] = action
+        return action
+
+    def dispatch(self, action_key: str) -> None:
+        action = self.get_action(action_key)
         if not action:
             print(f'[ERROR] Unknown action: {action_key}')
             input('Press enter to continue...')
             return
-        action.execute()
+        with span('action', action=action_key), profile(action_key):
+            action.execute()
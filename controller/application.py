@@ -1,8 +1,11 @@
 from controller.actions_dispatcher import ActionsDispatcher
+from flashcards.history import QueryHistory
+from flashcards.store import DeckStore
 from profiles.manager import AuthenticationManager, UserManager
-from profiles.repository import JSONStorage
+from profiles.repository import JSONStorage, SQLiteStorage
 from profiles.security import Bcrypt
-from settings import FILE_TYPES, STORAGE_DIR, USERS_FILE
+from settings import (DECKS_DB, FILE_TYPES, STORAGE_BACKEND, STORAGE_DIR, USERS_DB, USERS_FILE, USERS_FILE_BACKUPS,
+                      USERS_FILE_INDENT, USERS_SAVE_DELAY)
 from ui.gui import FileSelector
 from ui.menu_items import menus, stages
 from ui.ui_manager import ContextManager, MenuManager, UserInputHandler
@@ -15,16 +18,24 @@ class Application:
         self.menu_manager = MenuManager(menus, stages, self.context_manager)
         self.input_handler = UserInputHandler(menus)
         self.encryption_strategy = Bcrypt()
-        self.storage = JSONStorage(f'{STORAGE_DIR}/{USERS_FILE}')
-        self.user_manager = UserManager(self.encryption_strategy, self.storage)
+        if STORAGE_BACKEND == 'sqlite':
+            self.storage = SQLiteStorage(f'{STORAGE_DIR}/{USERS_DB}')
+        else:
+            self.storage = JSONStorage(f'{STORAGE_DIR}/{USERS_FILE}', USERS_FILE_INDENT, USERS_FILE_BACKUPS)
+        self.user_manager = UserManager(self.encryption_strategy, self.storage, USERS_SAVE_DELAY)
         self.auth_manager = AuthenticationManager(self.user_manager)
         self.file_selector = FileSelector(FILE_TYPES)
+        self.deck_store = DeckStore(f'{STORAGE_DIR}/{DECKS_DB}')
+        self.query_history = QueryHistory()
+        self.query_history.apply_retention_if_due()
 
         self.actions_dispatcher = ActionsDispatcher(
             self.context_manager,
             self.auth_manager,
             self.user_manager,
             self.file_selector,
+            self.deck_store,
+            self.query_history,
         )
 
     def main(self):
@@ -3,6 +3,11 @@ class NoCardError(Exception):
     pass
 
 
+class InvalidDeckFile(Exception):
+    """Exception raised when given file is not a binary deck or has unsupported version."""
+    pass
+
+
 class NoProfileError(Exception):
     """Exception raised when given Profile does not exist for User."""
     pass
@@ -37,3 +42,8 @@ class InvalidPassword(Exception):
 
 class ValidationError(Exception):
     pass
+
+
+class VaultError(Exception):
+    """Exception raised when secrets vault can't be unlocked or its file is invalid."""
+    pass
@@ -0,0 +1,147 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from contextlib import ExitStack
+from typing import Iterable, Iterator, Optional, Sequence, overload
+
+from custom_exceptions import InvalidDeckFile
+from flashcards.deck import Card, Deck
+from utils import atomic_open
+
+MAGIC = b'FCDK'
+VERSION = 1
+# magic, version, flags, cards count, offset table position, reserved
+HEADER = struct.Struct('<4sHHQQQ')
+# byte lengths of card ID, front and back
+RECORD_HEADER = struct.Struct('<III')
+OFFSET = struct.Struct('<Q')
+
+
+class BinaryDeckWriter:
+    """Streams cards to a binary deck file.
+
+    Layout: fixed header, card records (lengths followed by UTF-8 ID, front and back), then a table
+    with offsets of all records. Only the offsets (8 bytes per card) are kept in memory while writing,
+    the file is written under a unique temporary name (see `atomic_open`) and moved in place on `close`.
+    """
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        self._stack = ExitStack()
+        self._file = self._stack.enter_context(atomic_open(file_path, 'wb'))
+        self._file.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0, 0))
+        self._offsets = array('Q')
+        self._position = HEADER.size
+
+    def __enter__(self) -> 'BinaryDeckWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._stack.__exit__(exc_type, exc_val, exc_tb)
+
+    def write(self, card: Card) -> None:
+        card_id, front, back = card.card_id.encode('utf-8'), card.front.encode('utf-8'), card.back.encode('utf-8')
+        self._offsets.append(self._position)
+        self._file.write(RECORD_HEADER.pack(len(card_id), len(front), len(back)))
+        self._file.write(card_id)
+        self._file.write(front)
+        self._file.write(back)
+        self._position += RECORD_HEADER.size + len(card_id) + len(front) + len(back)
+
+    def write_many(self, cards: Iterable[Card]) -> None:
+        for card in cards:
+            self.write(card)
+
+    def close(self) -> None:
+        offsets = self._offsets
+        if sys.byteorder == 'big':
+            offsets = array('Q', offsets)
+            offsets.byteswap()
+        offsets.tofile(self._file)
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, 0, len(self._offsets), self._position, 0))
+        self._stack.close()
+
+
+class BinaryDeckReader(Sequence[Card]):
+    """Memory-mapped, read-only view of a binary deck file, cards are decoded only when accessed."""
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        with open(file_path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                raise InvalidDeckFile(f'File {file_path} is too small to be a binary deck.')
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self._count, self._table_offset, _ = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise InvalidDeckFile(f'File {file_path} is not a binary deck in version {VERSION}.')
+        if not HEADER.size <= self._table_offset <= len(self._mmap) - self._count * OFFSET.size:
+            self._mmap.close()
+            raise InvalidDeckFile(f'File {file_path} is truncated or its offset table is corrupted.')
+
+    def __enter__(self) -> 'BinaryDeckReader':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @overload
+    def __getitem__(self, index: int) -> Card: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Card]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._read_card(i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('Card index out of range.')
+        return self._read_card(index)
+
+    def __iter__(self) -> Iterator[Card]:
+        for index in range(self._count):
+            yield self._read_card(index)
+
+    def load_deck(self, limit: Optional[int] = None) -> Deck:
+        deck = Deck()
+        deck.load_cards(list(self[:limit]))
+        return deck
+
+    def _read_card(self, index: int) -> Card:
+        position = OFFSET.unpack_from(self._mmap, self._table_offset + index * OFFSET.size)[0]
+        # Records lie between the header and the offset table.
+        if not HEADER.size <= position <= self._table_offset - RECORD_HEADER.size:
+            raise InvalidDeckFile(f'Card {index} of {self.file_path} has an invalid offset.')
+        id_length, front_length, back_length = RECORD_HEADER.unpack_from(self._mmap, position)
+        start = position + RECORD_HEADER.size
+        front_start = start + id_length
+        back_start = front_start + front_length
+        if back_start + back_length > self._table_offset:
+            raise InvalidDeckFile(f'Card {index} of {self.file_path} is truncated.')
+        try:
+            return Card.restore(
+                self._mmap[start:front_start].decode('utf-8'),
+                self._mmap[front_start:back_start].decode('utf-8'),
+                self._mmap[back_start:back_start + back_length].decode('utf-8'),
+            )
+        except UnicodeDecodeError as e:
+            raise InvalidDeckFile(f'Card {index} of {self.file_path} is corrupted: {e}') from e
+
+
+def write_deck(file_path: str, cards: Iterable[Card]) -> None:
+    with BinaryDeckWriter(file_path) as writer:
+        writer.write_many(cards)
@@ -1,41 +1,195 @@
-import uuid
-from dataclasses import dataclass, field
-from typing import List
+import ast
+import hashlib
+import itertools
+import os
+from dataclasses import InitVar, dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from custom_exceptions import NoCardError
 from logger import logger
+from utils import normalize_text
 
 
-@dataclass
+def random_card_id() -> str:
+    return os.urandom(16).hex()
+
+
+def content_card_id(front: str, back: str, source: str = '') -> str:
+    """Deterministic card ID, the same card generated from the same source always gets the same ID."""
+    data = '\x1f'.join((source, front, back)).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def source_digest(content: str) -> str:
+    """Identifies note content cards were generated from."""
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+@dataclass(slots=True)
 class Card:
-    card_id: str = field(default_factory=lambda: str(uuid.uuid4()), init=False)
+    card_id: str = field(default='', init=False)
     front: str
     back: str
+    source: InitVar[Optional[str]] = None
+
+    def __post_init__(self, source: Optional[str]) -> None:
+        self.card_id = random_card_id() if source is None else content_card_id(self.front, self.back, source)
 
     def __str__(self) -> str:
         return f"Card ID: {self.card_id}\nFront: {self.front}\nBack: {self.back}"
 
     @classmethod
-    def from_dict(cls, data: dict) -> 'Card':
+    def from_dict(cls, data: dict, source: Optional[str] = None) -> 'Card':
+        """Create card from dict, with `source` given card ID is derived from card content and source."""
         card = cls(
             front=data['front'],
-            back=data['back']
+            back=data['back'],
+            source=source
         )
         return card
 
+    @classmethod
+    def restore(cls, card_id: str, front: str, back: str) -> 'Card':
+        """Recreate previously stored card keeping its ID."""
+        card = object.__new__(cls)
+        card.card_id = card_id
+        card.front = front
+        card.back = back
+        return card
+
+
+def parse_cards(cards_content: str, source: Optional[str] = None) -> List[Card]:
+    """Create cards from AI response, a list of dicts with "front" and "back" keys."""
+    return [Card.from_dict(card_data, source) for card_data in ast.literal_eval(cards_content)]
+
+
+def id_key(card: Card) -> str:
+    return card.card_id
+
+
+def content_key(card: Card) -> str:
+    """Match cards by normalized front, so regenerated cards are matched regardless of their IDs."""
+    return normalize_text(card.front)
+
+
+CardKey = Callable[[Card], str]
+
+
+@dataclass
+class DeckDiff:
+    added: List[Card] = field(default_factory=list)
+    removed: List[Card] = field(default_factory=list)
+    changed: List[Tuple[Card, Card]] = field(default_factory=list)
+    unchanged: List[Card] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def __str__(self) -> str:
+        return (f'{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed, '
+                f'{len(self.unchanged)} unchanged.')
+
+
+def _key_index(cards: Iterable[Card], key: CardKey) -> Dict[str, Card]:
+    """Map keys to cards, the first card wins for repeated keys."""
+    index: Dict[str, Card] = {}
+    for card in cards:
+        index.setdefault(key(card), card)
+    return index
+
 
 class Deck:
+    """Insertion-ordered collection of cards indexed by `card_id`."""
+
     def __init__(self) -> None:
-        self.cards: List[Card] = []
+        self._cards: Dict[str, Card] = {}
+
+    @property
+    def cards(self) -> List[Card]:
+        return list(self._cards.values())
+
+    def __iter__(self) -> Iterator[Card]:
+        return iter(self._cards.values())
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def __contains__(self, card: object) -> bool:
+        return isinstance(card, Card) and self._cards.get(card.card_id) == card
 
     def load_cards(self, cards: List[Card]) -> None:
-        self.cards.extend(cards)
+        for card in cards:
+            self._cards[card.card_id] = card
         logger.info(f"{len(cards)} valid cards loaded into deck.")
 
+    def get(self, card_id: str) -> Optional[Card]:
+        return self._cards.get(card_id)
+
+    def contains(self, card_id: str) -> bool:
+        return card_id in self._cards
+
     def remove_card(self, card: Card) -> None:
-        try:
-            self.cards.remove(card)
-            logger.info(f'Card (id: {card.card_id}) removed from deck.')
-        except ValueError:
+        if card not in self:
             logger.error(f'Failed to remove card from deck, card (id: {card.card_id}) not found.')
+            raise NoCardError('Card not found in deck.')
+        del self._cards[card.card_id]
+        logger.info(f'Card (id: {card.card_id}) removed from deck.')
+
+    def remove_by_id(self, card_id: str) -> Card:
+        try:
+            card = self._cards.pop(card_id)
+        except KeyError:
+            logger.error(f'Failed to remove card from deck, card (id: {card_id}) not found.')
             raise NoCardError('Card not found in deck.') from None
+        logger.info(f'Card (id: {card_id}) removed from deck.')
+        return card
+
+    def remove_cards(self, card_ids: Iterable[str]) -> List[Card]:
+        """Remove all cards with given IDs in one pass, IDs missing from the deck are ignored."""
+        removed = []
+        for card_id in card_ids:
+            card = self._cards.pop(card_id, None)
+            if card is not None:
+                removed.append(card)
+        logger.info(f'{len(removed)} cards removed from deck.')
+        return removed
+
+    def merge(self, other: Iterable[Card], key: CardKey = id_key) -> 'Deck':
+        """Return new deck with cards of both decks, for cards with the same key the first one is kept."""
+        return self._from_cards(_key_index(itertools.chain(self, other), key).values())
+
+    def intersect(self, other: Iterable[Card], key: CardKey = id_key) -> 'Deck':
+        """Return new deck with cards of this deck which have a matching card in `other`."""
+        keys = {key(card) for card in other}
+        return self._from_cards(card for card in self if key(card) in keys)
+
+    def subtract(self, other: Iterable[Card], key: CardKey = id_key) -> 'Deck':
+        """Return new deck with cards of this deck which have no matching card in `other`."""
+        keys = {key(card) for card in other}
+        return self._from_cards(card for card in self if key(card) not in keys)
+
+    def diff(self, other: Iterable[Card], key: CardKey = id_key) -> DeckDiff:
+        """Compare this (old) deck with `other` (new) one, matched cards differing in front or back are changed."""
+        new_cards = _key_index(other, key)
+        old_keys = set()
+        diff = DeckDiff()
+        for card in self:
+            card_key = key(card)
+            if card_key in old_keys:
+                continue
+            old_keys.add(card_key)
+            new_card = new_cards.get(card_key)
+            if new_card is None:
+                diff.removed.append(card)
+            elif (new_card.front, new_card.back) != (card.front, card.back):
+                diff.changed.append((card, new_card))
+            else:
+                diff.unchanged.append(card)
+        diff.added = [card for card_key, card in new_cards.items() if card_key not in old_keys]
+        return diff
+
+    @staticmethod
+    def _from_cards(cards: Iterable[Card]) -> 'Deck':
+        deck = Deck()
+        deck.load_cards(list(cards))
+        return deck
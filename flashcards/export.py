@@ -0,0 +1,21 @@
+from typing import Callable, Dict, Iterable
+
+from flashcards.binary_deck import write_deck
+from flashcards.deck import Card
+from metrics import timed
+from utils import atomic_open
+
+
+@timed('export', format='txt')
+def write_txt(file_path: str, cards: Iterable[Card]) -> None:
+    """Write cards to a text file (replacing it), one card per paragraph."""
+    with atomic_open(file_path) as file:
+        for card in cards:
+            file.write(str(card) + '\n\n')
+
+
+# Exporters by file extension
+EXPORTERS: Dict[str, Callable[[str, Iterable[Card]], None]] = {
+    'txt': write_txt,
+    'fcdk': timed('export', format='fcdk')(write_deck),
+}
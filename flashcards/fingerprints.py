@@ -0,0 +1,188 @@
+import hashlib
+import math
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from flashcards.deck import Card
+from settings import FINGERPRINTS_DIR, STORAGE_DIR
+from utils import normalize_text
+
+# capacity, size in bits, hash functions count
+BLOOM_HEADER = struct.Struct('<QQQ')
+
+
+def fingerprint(text: str) -> int:
+    """64-bit hash of normalized text."""
+    digest = hashlib.blake2b(normalize_text(text).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: int) -> Iterable[int]:
+        # Double hashing, both hashes are taken from the 64-bit fingerprint.
+        first, second = value & 0xFFFFFFFF, (value >> 32) | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, value: int) -> None:
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: int) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def to_bytes(self) -> bytes:
+        return BLOOM_HEADER.pack(self.capacity, self.size, self.hash_count) + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'BloomFilter':
+        bloom = cls.__new__(cls)
+        bloom.capacity, bloom.size, bloom.hash_count = BLOOM_HEADER.unpack_from(data)
+        bloom.bits = bytearray(data[BLOOM_HEADER.size:])
+        if len(bloom.bits) != (bloom.size + 7) // 8:
+            raise ValueError('Bloom filter data is truncated.')
+        return bloom
+
+
+class FingerprintIndex:
+    """Persistent set of fingerprints of fronts of approved cards, used to recognize already known cards.
+
+    Fingerprints are appended to `<base_path>.fp`, a Bloom filter over them is kept in `<base_path>.bloom`.
+    Lookups check the Bloom filter first, the exact set is loaded from disk only when the filter
+    reports a possible match, so checking new cards never reads the whole index.
+    """
+    ERROR_RATE = 0.01
+    MIN_CAPACITY = 10_000
+    # Indexes of decks by base path, see `for_deck`
+    _instances: Dict[str, 'FingerprintIndex'] = {}
+
+    def __init__(self, base_path: str) -> None:
+        self.fingerprints_path = f'{base_path}.fp'
+        self.bloom_path = f'{base_path}.bloom'
+        os.makedirs(os.path.dirname(self.fingerprints_path) or '.', exist_ok=True)
+        self._count = os.path.getsize(self.fingerprints_path) // 8 if os.path.exists(self.fingerprints_path) else 0
+        self._known: Optional[Set[int]] = None
+        self._bloom = self._load_bloom()
+
+    @classmethod
+    def for_deck(cls, deck_name: str) -> 'FingerprintIndex':
+        """Index of a deck shared within the process, so its exact set is loaded from disk at most once."""
+        base_path = f'{STORAGE_DIR}/{FINGERPRINTS_DIR}/{deck_name}'
+        index = cls._instances.get(base_path)
+        if index is None:
+            index = cls._instances[base_path] = cls(base_path)
+        return index
+
+    def __len__(self) -> int:
+        return self._count
+
+    def contains(self, text: str) -> bool:
+        return self._contains(fingerprint(text))
+
+    def split_known(self, cards: Iterable[Card]) -> Tuple[List[Card], List[Card]]:
+        """Split cards into new and already known ones, repeated cards within `cards` count as known."""
+        new, known, repeated = self.classify(cards)
+        return new, known + repeated
+
+    def classify(self, cards: Iterable[Card]) -> Tuple[List[Card], List[Card], List[Card]]:
+        """Split cards into new ones, ones known from the index and repeats of new ones within `cards`."""
+        new, known, repeated = [], [], []
+        seen: Set[int] = set()
+        for card in cards:
+            value = fingerprint(card.front)
+            if value in seen:
+                repeated.append(card)
+            elif self._contains(value):
+                known.append(card)
+            else:
+                seen.add(value)
+                new.append(card)
+        return new, known, repeated
+
+    def add(self, cards: Iterable[Card]) -> int:
+        """Add fronts of cards to the index, returns number of cards that were not known yet."""
+        values = array('Q')
+        seen: Set[int] = set()
+        for card in cards:
+            value = fingerprint(card.front)
+            if value not in seen and not self._contains(value):
+                seen.add(value)
+                values.append(value)
+                self._bloom.add(value)
+        if not values:
+            return 0
+        with open(self.fingerprints_path, 'ab') as file:
+            self._to_little_endian(values).tofile(file)
+        # The exact set may have been loaded from disk in the middle of the batch.
+        if self._known is not None:
+            self._known.update(values)
+        self._count += len(values)
+        if self._count > self._bloom.capacity:
+            self._bloom = self._build_bloom()
+        self._save_bloom()
+        return len(values)
+
+    def rebuild(self, cards: Iterable[Card]) -> None:
+        """Replace index content with fingerprints of given cards."""
+        for path in (self.fingerprints_path, self.bloom_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._count = 0
+        self._known = set()
+        self._bloom = BloomFilter(self.MIN_CAPACITY, self.ERROR_RATE)
+        self.add(cards)
+
+    def _contains(self, value: int) -> bool:
+        return value in self._bloom and value in self._exact()
+
+    def _exact(self) -> Set[int]:
+        if self._known is None:
+            self._known = set(self._read_fingerprints())
+        return self._known
+
+    def _read_fingerprints(self) -> array:
+        values = array('Q')
+        if os.path.exists(self.fingerprints_path):
+            with open(self.fingerprints_path, 'rb') as file:
+                values.frombytes(file.read())
+        return self._to_little_endian(values)
+
+    def _load_bloom(self) -> BloomFilter:
+        try:
+            with open(self.bloom_path, 'rb') as file:
+                bloom = BloomFilter.from_bytes(file.read())
+            if bloom.capacity >= self._count:
+                return bloom
+        except (FileNotFoundError, ValueError, struct.error):
+            pass
+        bloom = self._build_bloom()
+        if self._count:
+            self._save_bloom(bloom)
+        return bloom
+
+    def _build_bloom(self) -> BloomFilter:
+        bloom = BloomFilter(max(self.MIN_CAPACITY, 2 * self._count), self.ERROR_RATE)
+        for value in self._exact() if self._count else ():
+            bloom.add(value)
+        return bloom
+
+    def _save_bloom(self, bloom: Optional[BloomFilter] = None) -> None:
+        tmp_path = f'{self.bloom_path}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write((bloom or self._bloom).to_bytes())
+        os.replace(tmp_path, self.bloom_path)
+
+    @staticmethod
+    def _to_little_endian(values: array) -> array:
+        if sys.byteorder == 'big':
+            values = array('Q', values)
+            values.byteswap()
+        return values
@@ -1,15 +1,27 @@
+import time
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from typing import Dict, List, Optional
 
 from openai import OpenAI
 
+from flashcards.history import QueryHistory, QueryOutcome
 from logger import logger, queries_logger
+from metrics import span
+
+
+@dataclass(slots=True)
+class Completion:
+    content: Optional[str]
+    # Token usage of the request, if the AI service reports it
+    usage: Optional[Dict[str, int]] = None
 
 
 class AIClient(ABC):
+    """AI service client, shared by concurrent requests, so it keeps no per-request state."""
 
     @abstractmethod
-    def generate_completion(self, model: str, messages: List[Dict[str, str]]) -> Optional[str]:
+    def generate_completion(self, model: str, messages: List[Dict[str, str]]) -> Completion:
         pass
 
 
@@ -18,7 +30,7 @@ class OpenAIClient(AIClient):
     def __init__(self, api_key: str) -> None:
         self.client = OpenAI(api_key=api_key)
 
-    def generate_completion(self, model: str, messages: List[Dict[str, str]]) -> Optional[str]:
+    def generate_completion(self, model: str, messages: List[Dict[str, str]]) -> Completion:
         response = self.client.chat.completions.create(
             model=model,
             messages=messages,  # type: ignore
@@ -27,26 +39,49 @@ class OpenAIClient(AIClient):
             top_p=1.0,
             frequency_penalty=0.0,
         )
-        return response.choices[0].message.content
+        usage = getattr(response, 'usage', None)
+        return Completion(response.choices[0].message.content, {
+            'prompt_tokens': usage.prompt_tokens,
+            'completion_tokens': usage.completion_tokens,
+            'total_tokens': usage.total_tokens,
+        } if usage is not None else None)
 
     def __str__(self) -> str:
         return f'OpenAI client (API Key: {self.client.api_key[:3]}...{self.client.api_key[-4:]})'
 
 
 class CardsGenerator:
-    def __init__(self, ai_client: AIClient) -> None:
+    def __init__(self, ai_client: AIClient, history: Optional[QueryHistory] = None) -> None:
         self.ai_client = ai_client
+        self.history = history
+        # ID of the last request in `history`, to record how its response was processed
+        self.last_query_id: Optional[int] = None
         logger.info(f'CardsGenerator initialized with: {self.ai_client}.')
 
     def generate_flashcards(self, model: str, prompt: str, content: str) -> Optional[str]:
+        start = time.perf_counter()
+        messages = [
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": f"{prompt}\n\n{content}"},
+        ]
         try:
-            messages = [
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": f"{prompt}\n\n{content}"},
-            ]
-            response = self.ai_client.generate_completion(model, messages)
-            queries_logger.debug(f'AI model: {model}\nContent: {content[:100] + '...'}\nResponse: {response}\n\n')
-            return response
+            with span('ai_request', model=model):
+                completion = self.ai_client.generate_completion(model, messages)
         except Exception as e:
             logger.error(f'Generating flashcards failed: \n{e}')
+            self._record(model, prompt, content, None, start, QueryOutcome.API_ERROR, error=str(e))
             raise
+        response = completion.content
+        outcome = QueryOutcome.OK if response else QueryOutcome.EMPTY
+        self._record(model, prompt, content, response, start, outcome, completion.usage)
+        # Responses are kept (compressed, with retention) in query history only
+        queries_logger.debug(f'AI model: {model}, outcome: {outcome.value}, response: {len(response or "")} '
+                             f'characters, query: {self.last_query_id}')
+        return response
+
+    def _record(self, model: str, prompt: str, content: str, response: Optional[str], start: float,
+                outcome: QueryOutcome, usage: Optional[Dict[str, int]] = None, error: Optional[str] = None) -> None:
+        if self.history is None:
+            return
+        self.last_query_id = self.history.record(model, prompt, content, response, time.perf_counter() - start,
+                                                 outcome, usage, error)
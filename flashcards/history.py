@@ -0,0 +1,200 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, List, Optional
+
+from settings import (QUERY_HISTORY_DB, QUERY_HISTORY_RESPONSES_DAYS, QUERY_HISTORY_RETENTION_DAYS,
+                      QUERY_HISTORY_RETENTION_INTERVAL_DAYS, STORAGE_DIR)
+
+SECONDS_PER_DAY = 86400
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS queries (
+    query_id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    model TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    response BLOB,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    total_tokens INTEGER,
+    latency REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_queries_created ON queries (created_at);
+CREATE INDEX IF NOT EXISTS idx_queries_model ON queries (model, outcome);
+CREATE INDEX IF NOT EXISTS idx_queries_latency ON queries (latency);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+'''
+
+
+class QueryOutcome(str, Enum):
+    OK = 'ok'
+    EMPTY = 'empty'
+    API_ERROR = 'api_error'
+    PARSE_ERROR = 'parse_error'
+
+
+@dataclass(slots=True)
+class QuerySummary:
+    query_id: int
+    created_at: float
+    model: str
+    latency: float
+    total_tokens: Optional[int]
+    outcome: str
+
+
+@dataclass(slots=True)
+class ModelStats:
+    model: str
+    requests: int
+    failures: int
+    avg_latency: float
+    total_tokens: int
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.requests if self.requests else 0.0
+
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class QueryHistory:
+    """SQLite log of AI requests: model, hashes of prompt and content, zlib compressed response,
+    token usage, latency and outcome.
+
+    `apply_retention` drops requests older than `retention_days` and responses older than
+    `responses_days` (their metrics are kept), then compacts the database file.
+    `apply_retention_if_due` does so at most once per `retention_interval_days`, for use on startup.
+    """
+
+    def __init__(self, db_path: str = f'{STORAGE_DIR}/{QUERY_HISTORY_DB}',
+                 retention_days: float = QUERY_HISTORY_RETENTION_DAYS,
+                 responses_days: float = QUERY_HISTORY_RESPONSES_DAYS,
+                 retention_interval_days: float = QUERY_HISTORY_RETENTION_INTERVAL_DAYS) -> None:
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self.responses_days = responses_days
+        self.retention_interval_days = retention_interval_days
+        dir_path = os.path.dirname(db_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self.connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.connection.execute('SELECT COUNT(*) FROM queries').fetchone()[0]
+
+    def record(self, model: str, prompt: str, content: str, response: Optional[str], latency: float,
+               outcome: QueryOutcome, usage: Optional[Dict[str, int]] = None, error: Optional[str] = None,
+               created_at: Optional[float] = None) -> int:
+        usage = usage or {}
+        compressed = zlib.compress(response.encode('utf-8')) if response is not None else None
+        with self._lock:
+            cursor = self.connection.execute(
+                'INSERT INTO queries (created_at, model, prompt_hash, content_hash, response, prompt_tokens, '
+                'completion_tokens, total_tokens, latency, outcome, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (time.time() if created_at is None else created_at, model, text_hash(prompt), text_hash(content),
+                 compressed, usage.get('prompt_tokens'), usage.get('completion_tokens'), usage.get('total_tokens'),
+                 latency, outcome.value, error)
+            )
+            return cursor.lastrowid
+
+    def set_outcome(self, query_id: int, outcome: QueryOutcome, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.connection.execute('UPDATE queries SET outcome = ?, error = ? WHERE query_id = ?',
+                                    (outcome.value, error, query_id))
+
+    def get_response(self, query_id: int) -> Optional[str]:
+        with self._lock:
+            row = self.connection.execute('SELECT response FROM queries WHERE query_id = ?', (query_id,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def slowest(self, limit: int = 10, since: Optional[float] = None) -> List[QuerySummary]:
+        with self._lock:
+            rows = self.connection.execute(
+                'SELECT query_id, created_at, model, latency, total_tokens, outcome FROM queries '
+                'WHERE created_at >= ? ORDER BY latency DESC LIMIT ?', (since or 0, limit)
+            ).fetchall()
+        return [QuerySummary(*row) for row in rows]
+
+    def stats_by_model(self, since: Optional[float] = None) -> List[ModelStats]:
+        """Requests count, failures (API or parse errors), average latency and used tokens per model."""
+        with self._lock:
+            rows = self.connection.execute(
+                'SELECT model, COUNT(*), SUM(outcome IN (?, ?)), AVG(latency), COALESCE(SUM(total_tokens), 0) '
+                'FROM queries WHERE created_at >= ? GROUP BY model ORDER BY model',
+                (QueryOutcome.API_ERROR.value, QueryOutcome.PARSE_ERROR.value, since or 0)
+            ).fetchall()
+        return [ModelStats(*row) for row in rows]
+
+    def apply_retention(self, now: Optional[float] = None) -> int:
+        """Remove expired requests and responses, returns number of removed requests."""
+        now = time.time() if now is None else now
+        with self._lock:
+            removed = self.connection.execute('DELETE FROM queries WHERE created_at < ?',
+                                              (now - self.retention_days * SECONDS_PER_DAY,)).rowcount
+            trimmed = self.connection.execute(
+                'UPDATE queries SET response = NULL WHERE created_at < ? AND response IS NOT NULL',
+                (now - self.responses_days * SECONDS_PER_DAY,)).rowcount
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('retention_applied_at', ?)",
+                                    (now,))
+            if removed or trimmed:
+                self.connection.execute('VACUUM')
+        return removed
+
+    def apply_retention_if_due(self, now: Optional[float] = None) -> Optional[int]:
+        """Apply retention unless it was applied in the last `retention_interval_days`,
+        returns number of removed requests, or None when it was not due."""
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'retention_applied_at'").fetchone()
+        if row is not None and now - row[0] < self.retention_interval_days * SECONDS_PER_DAY:
+            return None
+        return self.apply_retention(now)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Show statistics of AI requests.')
+    parser.add_argument('--db', default=f'{STORAGE_DIR}/{QUERY_HISTORY_DB}')
+    parser.add_argument('--days', type=float, default=None, help='Only requests from last DAYS days.')
+    parser.add_argument('--slowest', type=int, default=10, help='Number of slowest requests to show.')
+    args = parser.parse_args(argv)
+    history = QueryHistory(args.db)
+    since = time.time() - args.days * SECONDS_PER_DAY if args.days is not None else None
+    print('Model | requests | failure rate | avg latency [s] | tokens')
+    for stats in history.stats_by_model(since):
+        print(f'{stats.model} | {stats.requests} | {stats.failure_rate:.1%} | {stats.avg_latency:.2f} | '
+              f'{stats.total_tokens}')
+    print('\nSlowest requests:')
+    for query in history.slowest(args.slowest, since):
+        print(f'#{query.query_id} {time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(query.created_at))} '
+              f'{query.model} {query.latency:.2f} s, {query.total_tokens} tokens, {query.outcome}')
+    history.close()
+
+
+if __name__ == '__main__':
+    main()
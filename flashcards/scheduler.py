@@ -0,0 +1,34 @@
+from dataclasses import dataclass, replace
+
+SECONDS_PER_DAY = 86400
+MIN_EASE = 1.3
+
+
+@dataclass(slots=True)
+class ReviewState:
+    card_id: str
+    due: float
+    interval: float = 0.0
+    ease: float = 2.5
+    repetitions: int = 0
+    lapses: int = 0
+
+
+def sm2(state: ReviewState, grade: int, now: float) -> ReviewState:
+    """Return card state after a review graded 0 (blackout) - 5 (perfect recall), following SM-2.
+
+    As in the original algorithm, a lapse (grade below 3) restarts repetitions without changing the ease.
+    """
+    if not 0 <= grade <= 5:
+        raise ValueError(f'Review grade has to be between 0 and 5, got {grade}.')
+    if grade < 3:
+        return replace(state, due=now + SECONDS_PER_DAY, interval=1.0, repetitions=0, lapses=state.lapses + 1)
+    if state.repetitions == 0:
+        interval = 1.0
+    elif state.repetitions == 1:
+        interval = 6.0
+    else:
+        interval = round(state.interval * state.ease)
+    ease = max(MIN_EASE, state.ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+    return replace(state, due=now + interval * SECONDS_PER_DAY, interval=interval, ease=ease,
+                   repetitions=state.repetitions + 1)
@@ -0,0 +1,8 @@
+import re
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def build_match_query(query: str) -> str:
+    """Turn free text into an FTS5 query matching cards containing all the words."""
+    return ' '.join(f'"{token}"' for token in TOKEN_PATTERN.findall(query))
@@ -0,0 +1,302 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from enum import Enum
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flashcards.deck import Card, Deck
+from flashcards.scheduler import ReviewState
+from flashcards.search import build_match_query
+from logger import logger
+
+
+class CardStatus(str, Enum):
+    NEW = 'new'
+    APPROVED = 'approved'
+    REJECTED = 'rejected'
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS decks (
+    deck_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS cards (
+    seq INTEGER PRIMARY KEY,
+    deck_id INTEGER NOT NULL REFERENCES decks(deck_id) ON DELETE CASCADE,
+    card_id TEXT NOT NULL,
+    front TEXT NOT NULL,
+    back TEXT NOT NULL,
+    source TEXT,
+    status TEXT NOT NULL DEFAULT 'new',
+    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (deck_id, card_id)
+);
+CREATE INDEX IF NOT EXISTS idx_cards_deck ON cards (deck_id, seq);
+CREATE INDEX IF NOT EXISTS idx_cards_deck_status ON cards (deck_id, status, seq);
+CREATE INDEX IF NOT EXISTS idx_cards_source ON cards (source);
+CREATE TABLE IF NOT EXISTS review_states (
+    deck_id INTEGER NOT NULL REFERENCES decks(deck_id) ON DELETE CASCADE,
+    card_id TEXT NOT NULL,
+    due REAL NOT NULL,
+    interval REAL NOT NULL DEFAULT 0,
+    ease REAL NOT NULL DEFAULT 2.5,
+    repetitions INTEGER NOT NULL DEFAULT 0,
+    lapses INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (deck_id, card_id)
+);
+CREATE INDEX IF NOT EXISTS idx_review_states_due ON review_states (deck_id, due);
+CREATE VIRTUAL TABLE IF NOT EXISTS cards_fts USING fts5 (
+    front, back, content = 'cards', content_rowid = 'seq', tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS cards_fts_insert AFTER INSERT ON cards BEGIN
+    INSERT INTO cards_fts (rowid, front, back) VALUES (new.seq, new.front, new.back);
+END;
+CREATE TRIGGER IF NOT EXISTS cards_fts_delete AFTER DELETE ON cards BEGIN
+    INSERT INTO cards_fts (cards_fts, rowid, front, back) VALUES ('delete', old.seq, old.front, old.back);
+END;
+CREATE TRIGGER IF NOT EXISTS cards_fts_update AFTER UPDATE OF front, back ON cards BEGIN
+    INSERT INTO cards_fts (cards_fts, rowid, front, back) VALUES ('delete', old.seq, old.front, old.back);
+    INSERT INTO cards_fts (rowid, front, back) VALUES (new.seq, new.front, new.back);
+END;
+'''
+
+
+class DeckStore:
+    """Persistent SQLite (WAL mode) storage of decks and their cards.
+
+    Cards keep insertion order within a deck, iteration is paginated with keyset pagination
+    on that order, so memory use doesn't depend on deck size. Cards fronts and backs are indexed
+    for full-text search by an FTS5 table kept in sync by triggers.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        dir_path = os.path.dirname(db_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        self._lock = threading.RLock()
+        self.connection = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('PRAGMA foreign_keys=ON')
+        indexed = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cards_fts'").fetchone()
+        self.connection.executescript(SCHEMA)
+        if not indexed:
+            # Cards stored before the full-text index existed.
+            self.connection.execute("INSERT INTO cards_fts (cards_fts) VALUES ('rebuild')")
+
+    def close(self) -> None:
+        with self._lock:
+            self.connection.close()
+
+    def __enter__(self) -> 'DeckStore':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.connection
+            except BaseException:
+                self.connection.execute('ROLLBACK')
+                raise
+            self.connection.execute('COMMIT')
+
+    def create_deck(self, deck_name: str) -> int:
+        with self._lock:
+            self.connection.execute('INSERT OR IGNORE INTO decks (name) VALUES (?)', (deck_name,))
+            return self._deck_id(deck_name)
+
+    def deck_names(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self.connection.execute('SELECT name FROM decks ORDER BY deck_id')]
+
+    def delete_deck(self, deck_name: str) -> None:
+        with self.transaction() as connection:
+            connection.execute('DELETE FROM decks WHERE name = ?', (deck_name,))
+
+    def add_cards(self, deck_name: str, cards: Iterable[Card], source: Optional[str] = None,
+                  status: CardStatus = CardStatus.NEW) -> int:
+        """Insert cards in bulk with `status`.
+
+        Cards already present in the deck get their content and source updated, but keep their status,
+        so regenerating a card doesn't undo its review.
+        """
+        with self.transaction() as connection:
+            deck_id = self._ensure_deck(connection, deck_name)
+            cursor = connection.executemany(
+                'INSERT INTO cards (deck_id, card_id, front, back, source, status) VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (deck_id, card_id) DO UPDATE SET front = excluded.front, back = excluded.back, '
+                'source = COALESCE(excluded.source, source), updated_at = CURRENT_TIMESTAMP',
+                ((deck_id, card.card_id, card.front, card.back, source, status.value) for card in cards)
+            )
+            count = cursor.rowcount
+        logger.info(f'{count} cards saved to deck "{deck_name}".')
+        return count
+
+    def get_card(self, deck_name: str, card_id: str) -> Optional[Card]:
+        with self._lock:
+            row = self.connection.execute(
+                'SELECT card_id, front, back FROM cards JOIN decks USING (deck_id) WHERE name = ? AND card_id = ?',
+                (deck_name, card_id)
+            ).fetchone()
+        return Card.restore(*row) if row else None
+
+    def count(self, deck_name: str, status: Optional[CardStatus] = None, source: Optional[str] = None) -> int:
+        where, params = self._filters(deck_name, status, source)
+        with self._lock:
+            return self.connection.execute(
+                f'SELECT COUNT(*) FROM cards JOIN decks USING (deck_id) WHERE {where}', params
+            ).fetchone()[0]
+
+    def fetch_page(self, deck_name: str, after: int = 0, limit: int = 1000, status: Optional[CardStatus] = None,
+                   source: Optional[str] = None) -> Tuple[List[Card], Optional[int]]:
+        """Return up to `limit` cards following cursor `after` and the cursor of the next page (None at the end)."""
+        where, params = self._filters(deck_name, status, source)
+        with self._lock:
+            rows = self.connection.execute(
+                f'SELECT seq, card_id, front, back FROM cards JOIN decks USING (deck_id) '
+                f'WHERE {where} AND seq > ? ORDER BY seq LIMIT ?', (*params, after, limit)
+            ).fetchall()
+        cards = [Card.restore(card_id, front, back) for _, card_id, front, back in rows]
+        return cards, rows[-1][0] if len(rows) == limit else None
+
+    def iter_cards(self, deck_name: str, status: Optional[CardStatus] = None, source: Optional[str] = None,
+                   page_size: int = 1000) -> Iterator[Card]:
+        cursor: Optional[int] = 0
+        while cursor is not None:
+            cards, cursor = self.fetch_page(deck_name, cursor, page_size, status, source)
+            yield from cards
+
+    def search(self, deck_name: str, query: str, limit: int = 10,
+               status: Optional[CardStatus] = None) -> List[Tuple[Card, CardStatus]]:
+        """Cards of the deck best matching the query (BM25 ranking), with their statuses."""
+        match_query = build_match_query(query)
+        if not match_query:
+            return []
+        where, params = self._filters(deck_name, status, None)
+        with self._lock:
+            rows = self.connection.execute(
+                f'SELECT card_id, cards.front, cards.back, status FROM cards_fts '
+                f'JOIN cards ON cards.seq = cards_fts.rowid JOIN decks USING (deck_id) '
+                f'WHERE cards_fts MATCH ? AND {where} ORDER BY bm25(cards_fts) LIMIT ?',
+                (match_query, *params, limit)
+            ).fetchall()
+        return [(Card.restore(card_id, front, back), CardStatus(status)) for card_id, front, back, status in rows]
+
+    def load_deck(self, deck_name: str, status: Optional[CardStatus] = None) -> Deck:
+        deck = Deck()
+        deck.load_cards(list(self.iter_cards(deck_name, status)))
+        return deck
+
+    def update_statuses(self, deck_name: str, statuses: Dict[str, CardStatus]) -> None:
+        """Apply review outcomes (card ID -> status) in a single transaction."""
+        self.record_reviews(deck_name, statuses)
+
+    def record_reviews(self, deck_name: str, statuses: Dict[str, CardStatus],
+                       replacements: Optional[Dict[str, Card]] = None, now: Optional[float] = None) -> None:
+        """Apply review outcomes in a single transaction.
+
+        `replacements` maps ID of an edited card to its edited version, which takes the original's place
+        (and source) as an approved card. Approved cards are scheduled for spaced repetition, due at `now`.
+        """
+        replacements = replacements or {}
+        now = time.time() if now is None else now
+        with self.transaction() as connection:
+            deck_id = self._ensure_deck(connection, deck_name)
+            connection.executemany(
+                'UPDATE cards SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE deck_id = ? AND card_id = ?',
+                ((status.value, deck_id, card_id) for card_id, status in statuses.items())
+            )
+            connection.executemany(
+                'UPDATE cards SET card_id = ?, front = ?, back = ?, status = ?, updated_at = CURRENT_TIMESTAMP '
+                'WHERE deck_id = ? AND card_id = ?',
+                ((card.card_id, card.front, card.back, CardStatus.APPROVED.value, deck_id, card_id)
+                 for card_id, card in replacements.items())
+            )
+            approved = [card_id for card_id, status in statuses.items() if status == CardStatus.APPROVED]
+            approved.extend(card.card_id for card in replacements.values())
+            connection.executemany('INSERT OR IGNORE INTO review_states (deck_id, card_id, due) VALUES (?, ?, ?)',
+                                   ((deck_id, card_id, now) for card_id in approved))
+            connection.executemany('DELETE FROM review_states WHERE deck_id = ? AND card_id = ?',
+                                   ((deck_id, card_id) for card_id, status in statuses.items()
+                                    if status != CardStatus.APPROVED))
+
+    def save_review_states(self, deck_name: str, states: Iterable[ReviewState]) -> None:
+        with self.transaction() as connection:
+            deck_id = self._ensure_deck(connection, deck_name)
+            connection.executemany(
+                'INSERT OR REPLACE INTO review_states (deck_id, card_id, due, interval, ease, repetitions, lapses) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ((deck_id, s.card_id, s.due, s.interval, s.ease, s.repetitions, s.lapses) for s in states)
+            )
+
+    def load_review_states(self, deck_name: str) -> Iterator[ReviewState]:
+        with self._lock:
+            rows = self.connection.execute(
+                'SELECT card_id, due, interval, ease, repetitions, lapses FROM review_states '
+                'JOIN decks USING (deck_id) WHERE name = ?', (deck_name,)
+            ).fetchall()
+        return (ReviewState(*row) for row in rows)
+
+    def due_review_states(self, deck_name: str, now: Optional[float] = None, limit: int = 20) -> List[ReviewState]:
+        """Review states of cards due at `now`, earliest first, served by the (deck, due) index."""
+        with self._lock:
+            rows = self.connection.execute(
+                'SELECT card_id, due, interval, ease, repetitions, lapses FROM review_states '
+                'JOIN decks USING (deck_id) WHERE name = ? AND due <= ? ORDER BY due LIMIT ?',
+                (deck_name, time.time() if now is None else now, limit)
+            ).fetchall()
+        return [ReviewState(*row) for row in rows]
+
+    def due_card_ids(self, deck_name: str, now: Optional[float] = None, limit: int = 20) -> List[str]:
+        """IDs of cards due at `now`, earliest first."""
+        return [state.card_id for state in self.due_review_states(deck_name, now, limit)]
+
+    def reschedule(self, deck_name: str, card_ids: Optional[Iterable[str]] = None, delay: float = 0.0,
+                   due: Optional[float] = None) -> int:
+        """Move due date of given (default: all) scheduled cards to `due` or by `delay` seconds,
+        returns number of rescheduled cards."""
+        sql = 'UPDATE review_states SET due = COALESCE(?, due + ?) WHERE deck_id = ?'
+        with self.transaction() as connection:
+            deck_id = self._ensure_deck(connection, deck_name)
+            if card_ids is None:
+                return connection.execute(sql, (due, delay, deck_id)).rowcount
+            return connection.executemany(f'{sql} AND card_id = ?',
+                                          ((due, delay, deck_id, card_id) for card_id in card_ids)).rowcount
+
+    def remove_cards(self, deck_name: str, card_ids: Iterable[str]) -> None:
+        with self.transaction() as connection:
+            deck_id = self._ensure_deck(connection, deck_name)
+            card_ids = list(card_ids)
+            connection.executemany('DELETE FROM cards WHERE deck_id = ? AND card_id = ?',
+                                   ((deck_id, card_id) for card_id in card_ids))
+            connection.executemany('DELETE FROM review_states WHERE deck_id = ? AND card_id = ?',
+                                   ((deck_id, card_id) for card_id in card_ids))
+
+    def _deck_id(self, deck_name: str) -> int:
+        return self.connection.execute('SELECT deck_id FROM decks WHERE name = ?', (deck_name,)).fetchone()[0]
+
+    def _ensure_deck(self, connection: sqlite3.Connection, deck_name: str) -> int:
+        connection.execute('INSERT OR IGNORE INTO decks (name) VALUES (?)', (deck_name,))
+        return self._deck_id(deck_name)
+
+    @staticmethod
+    def _filters(deck_name: str, status: Optional[CardStatus], source: Optional[str]) -> Tuple[str, tuple]:
+        where, params = ['name = ?'], [deck_name]
+        if status is not None:
+            where.append('status = ?')
+            params.append(status.value)
+        if source is not None:
+            where.append('source = ?')
+            params.append(source)
+        return ' AND '.join(where), tuple(params)
@@ -1,4 +1,12 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+from typing import List, Optional
+
+from settings import LOG_BACKUPS, LOG_DIR, LOG_JSON, LOG_MAX_BYTES, LOG_ROTATE_WHEN
 
 
 class DebugFilter(logging.Filter):
@@ -6,30 +14,93 @@ class DebugFilter(logging.Filter):
         return record.levelno == logging.DEBUG
 
 
-# Root logger configuration
+class JSONLinesFormatter(logging.Formatter):
+    """One JSON object per record, for log processing tools."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.levelno >= logging.ERROR:
+            entry['path'] = record.pathname
+            entry['line'] = record.lineno
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+# Root logger configuration, handlers are attached by `setup_logging`
 logger = logging.getLogger('flashcards_generator')
 logger.setLevel(logging.DEBUG)
 
-# Handler for AI interactions logs
+# Logger for AI interactions logs
 queries_logger = logging.getLogger('flashcards_generator.queries')
 queries_logger.setLevel(logging.DEBUG)
-queries_handler = logging.FileHandler('queries_history.log')
-queries_formatter = logging.Formatter('%(asctime)s\n%(message)s')
-queries_handler.setFormatter(queries_formatter)
-queries_handler.addFilter(DebugFilter())
-queries_logger.addHandler(queries_handler)
-
-# Handler for monitoring application behavior logs
-monitoring_handler = logging.FileHandler('app_monitoring.log')
-monitoring_handler.setLevel(logging.INFO)
-monitoring_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-monitoring_handler.setFormatter(monitoring_formatter)
-logger.addHandler(monitoring_handler)
-
-# Handler for error logs (detailed logs to file)
-errors_handler = logging.FileHandler('error_details.log')
-errors_handler.setLevel(logging.ERROR)
-errors_formatter = logging.Formatter(
-    '%(asctime)s - %(levelname)s - %(name)s\nPath: %(pathname)s - Line: %(lineno)d\n%(message)s', '%Y-%m-%d %H:%M:%S')
-errors_handler.setFormatter(errors_formatter)
-logger.addHandler(errors_handler)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+
+def _file_handler(file_path: str, max_bytes: int, backup_count: int,
+                  rotate_when: Optional[str]) -> logging.Handler:
+    if rotate_when:
+        return logging.handlers.TimedRotatingFileHandler(file_path, when=rotate_when, backupCount=backup_count,
+                                                         encoding='utf-8', delay=True)
+    return logging.handlers.RotatingFileHandler(file_path, maxBytes=max_bytes, backupCount=backup_count,
+                                                encoding='utf-8', delay=True)
+
+
+def setup_logging(log_dir: str = LOG_DIR, json_lines: bool = LOG_JSON, max_bytes: int = LOG_MAX_BYTES,
+                  backup_count: int = LOG_BACKUPS, rotate_when: Optional[str] = LOG_ROTATE_WHEN) -> None:
+    """Attach file handlers to application loggers.
+
+    Loggers only put records on a queue, files are written (and rotated by size, or by time
+    with `rotate_when`) by a background listener thread, stopped with `shutdown_logging`.
+    """
+    global _listener, _queue_handler
+    shutdown_logging()
+    os.makedirs(log_dir, exist_ok=True)
+
+    def handler(file_name: str, level: int, formatter: logging.Formatter) -> logging.Handler:
+        file_handler = _file_handler(os.path.join(log_dir, file_name), max_bytes, backup_count, rotate_when)
+        file_handler.setLevel(level)
+        file_handler.setFormatter(JSONLinesFormatter() if json_lines else formatter)
+        return file_handler
+
+    # Handler for AI interactions summaries, responses themselves are stored in query history
+    queries_handler = handler('queries_history.log', logging.DEBUG, logging.Formatter('%(asctime)s - %(message)s'))
+    queries_handler.addFilter(logging.Filter(queries_logger.name))
+    queries_handler.addFilter(DebugFilter())
+    # Handler for monitoring application behavior logs
+    monitoring_handler = handler('app_monitoring.log', logging.INFO,
+                                 logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    # Handler for error logs (detailed logs to file)
+    errors_handler = handler('error_details.log', logging.ERROR, logging.Formatter(
+        '%(asctime)s - %(levelname)s - %(name)s\nPath: %(pathname)s - Line: %(lineno)d\n%(message)s',
+        '%Y-%m-%d %H:%M:%S'))
+    handlers: List[logging.Handler] = [queries_handler, monitoring_handler, errors_handler]
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    logger.addHandler(_queue_handler)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Write out queued records and detach handlers attached by `setup_logging`."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logger.removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,172 @@
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from settings import METRICS_ENABLED, METRICS_FILE, STORAGE_DIR
+from utils import atomic_write
+
+PREFIX = 'flashcards_'
+# Upper bounds (seconds) of histogram buckets, from fast file operations to slow AI requests
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+F = TypeVar('F', bound=Callable)
+
+_DISABLED_SPAN = nullcontext()
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> List[int]:
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class MetricsRegistry:
+    """In-process counters and histograms, exported in Prometheus text format or as JSON.
+
+    When disabled, `span` and `timed` only check the `enabled` flag, nothing is measured or stored.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = (name, self._labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def span(self, name: str, **labels: str) -> ContextManager[None]:
+        """Measure duration of the block into `<name>_seconds` histogram, exceptions count into `<name>_errors`."""
+        if not self.enabled:
+            return _DISABLED_SPAN
+        return self._span(name, labels)
+
+    @contextmanager
+    def _span(self, name: str, labels: Dict[str, str]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc(f'{name}_errors', **labels)
+            raise
+        finally:
+            self.observe(f'{name}_seconds', time.perf_counter() - start, **labels)
+
+    def timed(self, name: str, **labels: str) -> Callable[[F], F]:
+        """Decorator measuring every call of the function as a span."""
+        def decorator(function: F) -> F:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with self._span(name, labels):
+                    return function(*args, **kwargs)
+            return wrapper  # type: ignore
+        return decorator
+
+    def to_dict(self) -> dict:
+        """Summary with counters and histograms (count, sum, mean and bucket counts)."""
+        with self._lock:
+            return {
+                'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                             for (name, labels), value in sorted(self._counters.items())],
+                'histograms': [{
+                    'name': name,
+                    'labels': dict(labels),
+                    'count': histogram.count,
+                    'sum': histogram.sum,
+                    'mean': histogram.sum / histogram.count,
+                    'buckets': dict(zip([str(bound) for bound in histogram.buckets] + ['+Inf'],
+                                        histogram.cumulative_counts())),
+                } for (name, labels), histogram in sorted(self._histograms.items())],
+            }
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self._counters}):
+                lines.append(f'# TYPE {PREFIX}{name}_total counter')
+                for (counter_name, labels), value in sorted(self._counters.items()):
+                    if counter_name == name:
+                        lines.append(f'{PREFIX}{name}_total{self._format_labels(labels)} {value:g}')
+            for name in sorted({name for name, _ in self._histograms}):
+                lines.append(f'# TYPE {PREFIX}{name} histogram')
+                for (histogram_name, labels), histogram in sorted(self._histograms.items()):
+                    if histogram_name != name:
+                        continue
+                    bounds = [f'{bound:g}' for bound in histogram.buckets] + ['+Inf']
+                    for bound, count in zip(bounds, histogram.cumulative_counts()):
+                        lines.append(f'{PREFIX}{name}_bucket{self._format_labels(labels + (("le", bound),))} {count}')
+                    lines.append(f'{PREFIX}{name}_sum{self._format_labels(labels)} {histogram.sum:g}')
+                    lines.append(f'{PREFIX}{name}_count{self._format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, file_path: str) -> None:
+        """Write metrics to file, as JSON summary for `.json` files, in Prometheus text format otherwise."""
+        if os.path.splitext(file_path)[1] == '.json':
+            atomic_write(file_path, json.dumps(self.to_dict(), indent=2))
+        else:
+            atomic_write(file_path, self.to_prometheus())
+
+    @staticmethod
+    def _labels(labels: Dict[str, str]) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    @staticmethod
+    def _format_labels(labels: Labels) -> str:
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+registry = MetricsRegistry(enabled=METRICS_ENABLED or os.getenv('FLASHCARDS_METRICS', '') not in ('', '0'))
+span = registry.span
+timed = registry.timed
+inc = registry.inc
+
+
+def dump_metrics(file_path: Optional[str] = None) -> None:
+    registry.dump(file_path or f'{STORAGE_DIR}/{METRICS_FILE}')
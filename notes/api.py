@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import tempfile
+import urllib.error
+import urllib.parse
+import urllib.request
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from logger import logger
+
+
+class ResponseCache:
+    """On-disk cache of API responses keyed by request URL."""
+
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{hashlib.sha256(key.encode("utf-8")).hexdigest()}.json')
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._entry_path(key), 'r') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def set(self, key: str, entry: dict) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump(entry, file)
+            os.replace(tmp_path, self._entry_path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+class APIService(ABC):
+    """Base class for remote notes services exposing pages made of (nested, paginated) blocks.
+
+    Every GET goes through `get_json`. A cached response is returned without any request when
+    the caller passes a `version` equal to the one stored with it. Responses are not revalidated
+    with `If-None-Match` / `If-Modified-Since`, as Notion sends neither ETag nor Last-Modified.
+    """
+
+    def __init__(self, base_url: str, headers: Optional[Dict[str, str]] = None,
+                 cache: Optional[ResponseCache] = None, timeout: float = 30) -> None:
+        self.base_url = base_url.rstrip('/')
+        self.headers = headers or {}
+        self.cache = cache
+        self.timeout = timeout
+
+    def get_json(self, path: str, params: Optional[Dict[str, str]] = None, version: Optional[str] = None) -> dict:
+        url = f'{self.base_url}/{path.lstrip("/")}'
+        if params:
+            url = f'{url}?{urllib.parse.urlencode(params)}'
+
+        entry = self.cache.get(url) if self.cache and version is not None else None
+        if entry and entry.get('version') == version:
+            return entry['body']
+
+        request = urllib.request.Request(url, headers={'Accept': 'application/json', **self.headers})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = json.load(response)
+        except urllib.error.HTTPError as e:
+            logger.error(f'Request to {url} failed with status {e.code}.')
+            raise
+
+        if self.cache and version is not None:
+            self.cache.set(url, {'version': version, 'body': body})
+        return body
+
+    @abstractmethod
+    def fetch_page(self, page_id: str) -> dict:
+        pass
+
+    @abstractmethod
+    def fetch_children(self, block_id: str, cursor: Optional[str] = None,
+                       version: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """Return one page of child blocks and the cursor of the next one (None when exhausted).
+
+        The response is cached under `version`, which has to change whenever any of the blocks does.
+        """
+        pass
+
+    @abstractmethod
+    def page_title(self, page: dict) -> str:
+        pass
+
+    @abstractmethod
+    def page_version(self, page: dict) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def block_id(self, block: dict) -> str:
+        pass
+
+    @abstractmethod
+    def block_text(self, block: dict) -> str:
+        pass
+
+    @abstractmethod
+    def has_children(self, block: dict) -> bool:
+        pass
@@ -0,0 +1,168 @@
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+
+from settings import NOTE_CHUNK_MAX_CHARS
+
+HEADING_PATTERN = re.compile(r'^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$')
+SETEXT_UNDERLINE_PATTERN = re.compile(r'^ {0,3}(=+|-+)[ \t]*$')
+FENCE_PATTERN = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+LIST_ITEM_PATTERN = re.compile(r'^[ \t]*(?:[-*+]|\d{1,9}[.)])(?:[ \t]+|$)')
+
+
+@dataclass
+class Block:
+    kind: str
+    text: str
+
+
+@dataclass
+class Section:
+    title: str
+    level: int
+    blocks: List[Block] = field(default_factory=list)
+    children: List['Section'] = field(default_factory=list)
+
+    @property
+    def content(self) -> str:
+        """Section's own text (heading and blocks), without subsections."""
+        parts = [f'{"#" * self.level} {self.title}'] if self.level else []
+        parts.extend(block.text for block in self.blocks)
+        return '\n\n'.join(parts)
+
+    @property
+    def digest(self) -> str:
+        """Hash of section's own content, changes only when this section is edited."""
+        return hashlib.blake2b(self.content.encode('utf-8'), digest_size=16).hexdigest()
+
+    def walk(self) -> Iterator['Section']:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def render(self) -> str:
+        return '\n\n'.join(section.content for section in self.walk() if section.content)
+
+
+def parse_markdown(text: str) -> Section:
+    """Parse Markdown text into a tree of sections in a single pass over its lines.
+
+    Headings (ATX `#` headings and paragraphs underlined with `===` or `---`) open a new section
+    nested under the closest preceding heading of a lower level, the text up to the first heading
+    lands in the root section (level 0). Lines inside code fences are kept verbatim, so `#` comments
+    in code never start a section.
+    """
+    root = Section(title='', level=0)
+    stack = [root]
+    kind: Optional[str] = None
+    lines: List[str] = []
+    fence = ''
+    blank_in_list = False
+
+    def close_block() -> None:
+        nonlocal kind, lines
+        if kind and lines:
+            stack[-1].blocks.append(Block(kind, '\n'.join(lines)))
+        kind, lines = None, []
+
+    def open_section(level: int, title: str) -> None:
+        while stack[-1].level >= level:
+            stack.pop()
+        section = Section(title=title, level=level)
+        stack[-1].children.append(section)
+        stack.append(section)
+
+    for line in text.splitlines():
+        if fence:
+            lines.append(line)
+            if line.strip().startswith(fence) and not line.strip().strip(fence[0]):
+                fence = ''
+                close_block()
+            continue
+
+        fence_match = FENCE_PATTERN.match(line)
+        if fence_match:
+            close_block()
+            fence = fence_match.group(1)
+            kind, lines = 'code', [line]
+            continue
+
+        heading_match = HEADING_PATTERN.match(line)
+        if heading_match:
+            close_block()
+            open_section(len(heading_match.group(1)), (heading_match.group(2) or '').strip())
+            continue
+
+        setext_match = SETEXT_UNDERLINE_PATTERN.match(line)
+        if setext_match and kind == 'paragraph':
+            title = ' '.join(paragraph_line.strip() for paragraph_line in lines)
+            kind, lines = None, []
+            open_section(1 if setext_match.group(1)[0] == '=' else 2, title)
+            continue
+
+        if not line.strip():
+            if kind == 'list':
+                blank_in_list = True
+            else:
+                close_block()
+            continue
+
+        if LIST_ITEM_PATTERN.match(line):
+            if kind != 'list':
+                close_block()
+                kind = 'list'
+        elif kind == 'list' and blank_in_list and not line[:1].isspace():
+            close_block()
+            kind = 'paragraph'
+        elif kind is None:
+            kind = 'paragraph'
+        if blank_in_list and kind == 'list':
+            lines.append('')
+        blank_in_list = False
+        lines.append(line)
+
+    close_block()
+    return root
+
+
+@dataclass(frozen=True)
+class NoteChunk:
+    """Part of a note sent to the AI in a single request."""
+    title: str
+    text: str
+
+    @property
+    def digest(self) -> str:
+        return hashlib.blake2b(self.text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def chunk_sections(root: Section, max_chars: int = NOTE_CHUNK_MAX_CHARS) -> List[NoteChunk]:
+    """Split a section tree into chunks, one per section with text of its own.
+
+    Each chunk starts with the headings of the section and its parents, so it's understandable on its own.
+    Sections longer than `max_chars` are split between their blocks. As a chunk holds only its section's
+    own text, editing a section changes only its chunks (and their digests).
+    """
+    chunks: List[NoteChunk] = []
+
+    def visit(section: Section, path: List[Section]) -> None:
+        if section.level:
+            path = path + [section]
+        if section.blocks:
+            title = ' > '.join(parent.title for parent in path)
+            headings = [f'{"#" * parent.level} {parent.title}' for parent in path]
+            parts: List[str] = []
+            size = 0
+            for block in section.blocks:
+                if parts and size + len(block.text) > max_chars:
+                    chunks.append(NoteChunk(title, '\n\n'.join(headings + parts)))
+                    parts, size = [], 0
+                parts.append(block.text)
+                size += len(block.text)
+            chunks.append(NoteChunk(title, '\n\n'.join(headings + parts)))
+        for child in section.children:
+            visit(child, path)
+
+    visit(root, [])
+    return chunks
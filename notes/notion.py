@@ -0,0 +1,62 @@
+import re
+from typing import List, Optional, Tuple
+
+from notes.api import APIService, ResponseCache
+from settings import NOTION_API_URL, NOTION_API_VERSION
+
+PAGE_ID_PATTERN = re.compile(r'([0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12})(?:[?#].*)?$')
+
+
+def extract_page_id(page_reference: str) -> str:
+    """Return Notion page ID from a raw ID or a page URL."""
+    match = PAGE_ID_PATTERN.search(page_reference.strip().lower())
+    if not match:
+        raise ValueError(f'"{page_reference}" is not a valid Notion page ID or URL.')
+    return match.group(1).replace('-', '')
+
+
+class NotionService(APIService):
+    PAGE_SIZE = 100
+
+    def __init__(self, token: str, cache: Optional[ResponseCache] = None, base_url: str = NOTION_API_URL,
+                 api_version: str = NOTION_API_VERSION) -> None:
+        super().__init__(
+            base_url,
+            headers={'Authorization': f'Bearer {token}', 'Notion-Version': api_version},
+            cache=cache,
+        )
+
+    def fetch_page(self, page_id: str) -> dict:
+        return self.get_json(f'pages/{page_id}')
+
+    def fetch_children(self, block_id: str, cursor: Optional[str] = None,
+                       version: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        params = {'page_size': str(self.PAGE_SIZE)}
+        if cursor:
+            params['start_cursor'] = cursor
+        data = self.get_json(f'blocks/{block_id}/children', params, version=version)
+        return data.get('results', []), data.get('next_cursor') if data.get('has_more') else None
+
+    def page_title(self, page: dict) -> str:
+        for prop in page.get('properties', {}).values():
+            if prop.get('type') == 'title':
+                return self._plain_text(prop.get('title', []))
+        return ''
+
+    def page_version(self, page: dict) -> Optional[str]:
+        # Edits of blocks nested at any depth update the page's last edited time, unlike their parents' one.
+        return page.get('last_edited_time')
+
+    def block_id(self, block: dict) -> str:
+        return block['id']
+
+    def block_text(self, block: dict) -> str:
+        content = block.get(block.get('type', ''), {})
+        return self._plain_text(content.get('rich_text', [])) if isinstance(content, dict) else ''
+
+    def has_children(self, block: dict) -> bool:
+        return bool(block.get('has_children'))
+
+    @staticmethod
+    def _plain_text(rich_text: List[dict]) -> str:
+        return ''.join(part.get('plain_text', '') for part in rich_text)
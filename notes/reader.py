@@ -1,4 +1,12 @@
+import os
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from metrics import inc, timed
+from notes.api import APIService
+from notes.markdown import NoteChunk, Section, chunk_sections, parse_markdown
+from settings import API_MAX_WORKERS
 
 
 # import PyPDF2
@@ -10,13 +18,28 @@ class BaseReader(ABC):
     def read_source(self, source: str) -> str:
         pass
 
+    def chunks(self, content: str) -> List[NoteChunk]:
+        """Parts of read content cards are generated from separately, the whole content by default."""
+        return [NoteChunk('', content)]
+
 
 class TxtReader(BaseReader):
 
+    @timed('note_read', reader='txt')
     def read_source(self, source: str) -> str:
         with open(source, 'r') as file:
             content = file.read()
-            return content
+        inc('note_read_characters', len(content), reader='txt')
+        return content
+
+
+class MarkdownReader(TxtReader):
+
+    def read_sections(self, source: str) -> Section:
+        return parse_markdown(self.read_source(source))
+
+    def chunks(self, content: str) -> List[NoteChunk]:
+        return chunk_sections(parse_markdown(content)) or super().chunks(content)
 
 
 # TODO: Implement logic for reading notes from PDF files
@@ -33,10 +56,65 @@ class DocxReader(BaseReader):
             return ''
 
 
-# TODO: Implement logic for reading notes from services via API
+FILE_READERS = {
+    '.md': MarkdownReader,
+    '.markdown': MarkdownReader,
+}
+
+
+def reader_for(file_path: str) -> BaseReader:
+    """Reader for a note file based on its extension, plain text reader by default."""
+    return FILE_READERS.get(os.path.splitext(file_path)[1].lower(), TxtReader)()
+
+
 class ViaAPIReader(BaseReader):
-    def __init__(self, api_service):
+    """Reads a page and all its nested blocks from a remote notes service.
+
+    Children of blocks from the same tree level are fetched concurrently (at most `max_workers`
+    requests in flight), pagination inside one block is followed sequentially. All blocks are
+    cached under the page version, so the whole tree is fetched again once anything in it changes.
+    """
+
+    def __init__(self, api_service: APIService, max_workers: int = API_MAX_WORKERS) -> None:
         self.api_service = api_service
+        self.max_workers = max_workers
 
     def read_source(self, source: str) -> str:
-        return ''
+        page = self.api_service.fetch_page(source)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            children = self._fetch_tree(executor, source, self.api_service.page_version(page))
+
+        lines = []
+        title = self.api_service.page_title(page)
+        if title:
+            lines.append(title)
+        self._render(source, children, 0, lines)
+        return '\n'.join(lines)
+
+    def _fetch_all_children(self, block_id: str, version: Optional[str]) -> List[dict]:
+        blocks, cursor = self.api_service.fetch_children(block_id, version=version)
+        while cursor:
+            next_blocks, cursor = self.api_service.fetch_children(block_id, cursor, version=version)
+            blocks.extend(next_blocks)
+        return blocks
+
+    def _fetch_tree(self, executor: ThreadPoolExecutor, root_id: str,
+                    version: Optional[str]) -> Dict[str, List[dict]]:
+        children: Dict[str, List[dict]] = {}
+        level = [root_id]
+        while level:
+            futures = {block_id: executor.submit(self._fetch_all_children, block_id, version) for block_id in level}
+            level = []
+            for block_id, future in futures.items():
+                blocks = future.result()
+                children[block_id] = blocks
+                level.extend(self.api_service.block_id(b) for b in blocks if self.api_service.has_children(b))
+        return children
+
+    def _render(self, block_id: str, children: Dict[str, List[dict]], depth: int, lines: List[str]) -> None:
+        for block in children.get(block_id, []):
+            text = self.api_service.block_text(block)
+            if text:
+                lines.append(f'{"  " * depth}{text}')
+            if self.api_service.has_children(block):
+                self._render(self.api_service.block_id(block), children, depth + 1, lines)
@@ -0,0 +1,18 @@
+import argparse
+from typing import List, Optional
+
+from profiles.security import calibrate_bcrypt_rounds
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Find bcrypt cost factor (BCRYPT_ROUNDS) for target hashing time.')
+    parser.add_argument('--target', type=float, default=0.25, help='Target time of one hash in seconds.')
+    parser.add_argument('--min-rounds', type=int, default=10)
+    parser.add_argument('--max-rounds', type=int, default=16)
+    args = parser.parse_args(argv)
+    rounds = calibrate_bcrypt_rounds(args.target, args.min_rounds, args.max_rounds)
+    print(f'BCRYPT_ROUNDS = {rounds}')
+
+
+if __name__ == '__main__':
+    main()
@@ -68,7 +68,7 @@ class OpenAICredentials(Credentials, AICredentials):
     def get_api_key(self) -> str:
         api_key = self.sensitive_data_manager.get_sensitive_data(self.service_name, self.SENSITIVE_DATA_NAME)
         if not api_key:
-            raise ValueError(f'API Key not found in keyring for the service "{self.service_name}"')
+            raise ValueError(f'API Key not found in secrets storage for the service "{self.service_name}"')
         return api_key
 
     def load_api_key_to_env(self) -> None:
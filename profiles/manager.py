@@ -1,26 +1,169 @@
-from typing import Dict
+import atexit
+import threading
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, ValuesView
 
 from custom_exceptions import InvalidPassword, InvalidUsername, UserAlreadyExists
+from logger import logger
 from profiles.repository import StorageInterface
-from profiles.security import EncryptionStrategy
+from profiles.security import EncryptionStrategy, SensitiveDataManager
 from profiles.user_profile import User, Profile
 
 
+class LazyUsers(MutableMapping):
+    """Users by username, users are deserialized from storage on first access.
+
+    Only users accessed (loaded or added) since the last save can be changed, so only they are serialized
+    and compared with their stored data on save.
+    """
+
+    def __init__(self, storage_interface: StorageInterface) -> None:
+        self.storage_interface = storage_interface
+        self._usernames: Dict[str, None] = dict.fromkeys(storage_interface.load_usernames())
+        self._loaded: Dict[str, User] = {}
+        # Data of loaded users as last loaded or saved, None for users not stored yet.
+        self._stored: Dict[str, Optional[dict]] = {}
+        self._removed: List[str] = []
+
+    def __getitem__(self, username: str) -> User:
+        user = self._loaded.get(username)
+        if user is None:
+            if username not in self._usernames:
+                raise KeyError(username)
+            user_data = self.storage_interface.load_user(username)
+            if user_data is None:
+                raise KeyError(username)
+            user = self._loaded[username] = User.from_dict(user_data)
+            self._stored[username] = user.as_dict()
+        return user
+
+    def __setitem__(self, username: str, user: User) -> None:
+        if username not in self._usernames:
+            self._usernames[username] = None
+            self._stored.setdefault(username, None)
+            if username in self._removed:
+                self._removed.remove(username)
+        self._loaded[username] = user
+
+    def __delitem__(self, username: str) -> None:
+        del self._usernames[username]
+        self._loaded.pop(username, None)
+        self._stored.pop(username, None)
+        self._removed.append(username)
+
+    def __contains__(self, username: object) -> bool:
+        return username in self._usernames
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._usernames)
+
+    def __len__(self) -> int:
+        return len(self._usernames)
+
+    def loaded(self) -> ValuesView[User]:
+        return self._loaded.values()
+
+    def changes(self) -> Tuple[Dict[str, dict], List[str]]:
+        """Data of loaded users which differ from stored data, and usernames of removed users."""
+        changed = {}
+        for username, user in self._loaded.items():
+            user_data = user.as_dict()
+            if self._stored.get(username) != user_data:
+                changed[username] = user_data
+        return changed, list(self._removed)
+
+    def mark_saved(self, changed: Dict[str, dict], removed: List[str]) -> None:
+        self._stored.update(changed)
+        self._removed = [username for username in self._removed if username not in removed]
+
+
 class UserManager:
-    def __init__(self, encryption_strategy: EncryptionStrategy, storage_interface: StorageInterface) -> None:
-        self.users: Dict[str, User] = {}
+    """Manages users and their persistence.
+
+    `save_users` stores changes immediately, unless called within `batch` (changes are stored once
+    when the outermost batch ends) or with `save_delay` set (changes are stored by a background timer
+    `save_delay` seconds after the last save request). `flush` stores pending changes right away,
+    it's also called at interpreter exit when saves are delayed.
+
+    Changes are always collected on the thread which requested the save, the timer thread only writes
+    the collected data, so it never reads users while they are being modified.
+    """
+
+    def __init__(self, encryption_strategy: EncryptionStrategy, storage_interface: StorageInterface,
+                 save_delay: Optional[float] = None) -> None:
         self.encryption_strategy = encryption_strategy
         self.storage_interface = storage_interface
+        self.save_delay = save_delay
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        # Save requested within a batch.
+        self._pending = False
+        # Changes collected for a write, kept until they are written successfully.
+        self._changes: Optional[Tuple[Dict[str, dict], List[str]]] = None
+        self._timer: Optional[threading.Timer] = None
         self.load_users()
+        if save_delay:
+            atexit.register(self.flush)
 
     def load_users(self) -> None:
-        users_data_dict = self.storage_interface.load_data()
-        for username, users_data_dict in users_data_dict.items():
-            self.users[username] = User.from_dict(users_data_dict)
+        self.users = LazyUsers(self.storage_interface)
 
     def save_users(self) -> None:
-        users_data_dict = {username: user.as_dict() for username, user in self.users.items()}
-        self.storage_interface.save_data(users_data_dict)
+        with self._lock:
+            if self._batch_depth:
+                self._pending = True
+            elif self.save_delay:
+                self._changes = self.users.changes()
+                self._schedule_flush()
+            else:
+                self.flush()
+
+    @contextmanager
+    def batch(self) -> Iterator['UserManager']:
+        """Defer saves made within the block and store all changes in a single write at its end."""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if not self._batch_depth and self._pending:
+                    self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._changes = self.users.changes()
+            self._write_changes()
+
+    def _write_changes(self) -> None:
+        with self._lock:
+            if self._changes is None:
+                return
+            changed, removed = self._changes
+            if changed or removed:
+                self.storage_interface.update_data(changed, removed)
+                self.users.mark_saved(changed, removed)
+            self._changes = None
+            self._pending = False
+
+    def _flush_in_background(self) -> None:
+        try:
+            self._write_changes()
+        except Exception as e:
+            # Changes are kept and written by the next save or flush.
+            logger.error(f'Saving users failed: {e}')
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.save_delay, self._flush_in_background)
+        self._timer.daemon = True
+        self._timer.start()
 
     def add_user(self, username: str, password: str) -> None:
         if self.user_exists(username):
@@ -29,14 +172,32 @@ class UserManager:
         encrypted_password = self.encryption_strategy.encrypt(password)
         new_user = User(username, encrypted_password)
         new_user.add_profile(Profile('main'))
-        self.users[username] = new_user
-        self.save_users()
+        with self._lock:
+            self.users[username] = new_user
+            self.save_users()
+
+    def add_users(self, credentials: Iterable[Tuple[str, str]]) -> None:
+        """Add users from (username, password) pairs, passwords are hashed in parallel and users stored at once."""
+        credentials = list(credentials)
+        usernames = set()
+        for username, _ in credentials:
+            if self.user_exists(username) or username in usernames:
+                raise UserAlreadyExists(f'Username {username} already exists')
+            usernames.add(username)
+        encrypted_passwords = self.encryption_strategy.encrypt_many(password for _, password in credentials)
+        with self._lock, self.batch():
+            for (username, _), encrypted_password in zip(credentials, encrypted_passwords):
+                new_user = User(username, encrypted_password)
+                new_user.add_profile(Profile('main'))
+                self.users[username] = new_user
+            self.save_users()
 
     def remove_user(self, username: str) -> None:
         if not self.user_exists(username):
             raise InvalidUsername(f'User {username} does not exist')
-        del self.users[username]
-        self.save_users()
+        with self._lock:
+            del self.users[username]
+            self.save_users()
 
     def get_user(self, username: str) -> User:
         if not self.user_exists(username):
@@ -60,13 +221,20 @@ class AuthenticationManager:
         if not self.password_match(user, password):
             raise InvalidPassword(username, user)
 
+        encryption_strategy = self.user_manager.encryption_strategy
+        if encryption_strategy.needs_rehash(user.encrypted_password):
+            user.encrypted_password = encryption_strategy.encrypt(password)
+            self.user_manager.save_users()
+
         self.logout_users()
 
         user.is_logged_in = True
 
     def logout_users(self) -> None:
-        for user in self.user_manager.users.values():
+        # Users which were never loaded can't be logged in.
+        for user in self.user_manager.users.loaded():
             user.is_logged_in = False
+        SensitiveDataManager.clear_cache()
 
     def password_match(self, user: User, password: str) -> bool:
         return self.user_manager.encryption_strategy.check_encrypted(password, user.encrypted_password)
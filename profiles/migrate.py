@@ -0,0 +1,25 @@
+import argparse
+from typing import List, Optional
+
+from profiles.repository import StorageInterface, open_storage
+from settings import STORAGE_DIR, USERS_DB, USERS_FILE
+
+
+def migrate(source: StorageInterface, target: StorageInterface) -> int:
+    """Copy all users from source to target storage, users already in target are overwritten."""
+    users = source.load_data()
+    target.update_data(users)
+    return len(users)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Move users data between storages (.json file or SQLite database).')
+    parser.add_argument('--source', default=f'{STORAGE_DIR}/{USERS_FILE}', help='Users file to read from.')
+    parser.add_argument('--target', default=f'{STORAGE_DIR}/{USERS_DB}', help='Users file to write to.')
+    args = parser.parse_args(argv)
+    count = migrate(open_storage(args.source), open_storage(args.target))
+    print(f'{count} users migrated from {args.source} to {args.target}.')
+
+
+if __name__ == '__main__':
+    main()
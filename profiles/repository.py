@@ -1,8 +1,16 @@
 import os.path
+import shutil
+import sqlite3
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
 import json
 
+from logger import logger
+from metrics import timed
+from utils import atomic_write
+
 
 class StorageInterface(ABC):
     @abstractmethod
@@ -13,29 +21,286 @@ class StorageInterface(ABC):
     def load_data(self) -> Dict[str, dict]:
         pass
 
+    def update_data(self, changed: Dict[str, dict], removed: Iterable[str] = ()) -> None:
+        """Store only changed and removed users, storages which can't do partial updates rewrite all data."""
+        users = self.load_data()
+        users.update(changed)
+        for username in removed:
+            users.pop(username, None)
+        self.save_data(users)
+
+    def load_usernames(self) -> List[str]:
+        return list(self.load_data())
+
+    def load_user(self, username: str) -> Optional[dict]:
+        return self.load_data().get(username)
+
 
 class JSONStorage(StorageInterface):
-    def __init__(self, file_path: str) -> None:
+    """Users stored in JSON file, replaced atomically on save.
+
+    Previous versions of the file are kept as `<file>.bak.1` (newest) ... `<file>.bak.<backups>`,
+    if the file is missing or corrupted data is loaded from the newest readable backup.
+    Usernames are also written to a small `<file>.names` index, so listing them on startup doesn't
+    parse the whole file. The index is used only while it matches the data file's size and mtime.
+    """
+
+    def __init__(self, file_path: str, indent: Optional[int] = 4, backups: int = 3) -> None:
         self.file_path = file_path
+        self.indent = indent
+        self.backups = backups
+        self._lock = threading.Lock()
+        # Data as last loaded or saved, so single users can be read without parsing the file again.
+        self._data: Optional[Dict[str, dict]] = None
 
+    @timed('users_save', backend='json')
     def save_data(self, users: Dict[str, dict]) -> None:
-        dir_path = os.path.dirname(self.file_path)
-        self.create_directory_if_not_exists(dir_path)
-        with open(self.file_path, 'w') as file:
-            json.dump(users, file, indent=4)
+        if self.indent is None:
+            data = json.dumps(users, separators=(',', ':'))
+        else:
+            data = json.dumps(users, indent=self.indent)
+        with self._lock:
+            self._rotate_backups()
+            atomic_write(self.file_path, data)
+            self._data = dict(users)
+            self._write_names(list(users))
+
+    def update_data(self, changed: Dict[str, dict], removed: Iterable[str] = ()) -> None:
+        users = dict(self._cached())
+        users.update(changed)
+        for username in removed:
+            users.pop(username, None)
+        self.save_data(users)
+
+    def load_usernames(self) -> List[str]:
+        if self._data is None:
+            usernames = self._read_names()
+            if usernames is not None:
+                return usernames
+            # Missing or outdated index (e.g. data file written by older version), rebuilt for next startup.
+            with self._lock:
+                self._write_names(list(self._cached()))
+        return list(self._cached())
+
+    def load_user(self, username: str) -> Optional[dict]:
+        return self._cached().get(username)
+
+    @property
+    def names_path(self) -> str:
+        return f'{self.file_path}.names'
+
+    def _data_stamp(self) -> Optional[List[int]]:
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _read_names(self) -> Optional[List[str]]:
+        stamp = self._data_stamp()
+        if stamp is None:
+            return None
+        try:
+            with open(self.names_path, 'r') as file:
+                index = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if not isinstance(index, dict) or index.get('data') != stamp:
+            return None
+        return index.get('usernames')
+
+    def _write_names(self, usernames: List[str]) -> None:
+        stamp = self._data_stamp()
+        if stamp is None:
+            return
+        try:
+            atomic_write(self.names_path, json.dumps({'data': stamp, 'usernames': usernames}))
+        except OSError as e:
+            logger.warning(f'Usernames index {self.names_path} not written: {e}')
 
     def load_data(self) -> Dict[str, dict]:
+        self._data = self._load()
+        return dict(self._data)
+
+    def _cached(self) -> Dict[str, dict]:
+        if self._data is None:
+            self._data = self._load()
+        return self._data
+
+    def _load(self) -> Dict[str, dict]:
         try:
-            with open(self.file_path, 'r') as file:
-                users_dict = json.load(file)
-                return users_dict
+            return self._read(self.file_path)
         except FileNotFoundError:
-            return {}
+            if not self._existing_backups():
+                return {}
+            logger.warning(f'Data file {self.file_path} not found.')
         except json.JSONDecodeError:
             print(f'Load users data error. Data file {self.file_path} is corrupted.')
-            return {}
+            logger.error(f'Data file {self.file_path} is corrupted.')
+        for backup_path in self._existing_backups():
+            try:
+                users = self._read(backup_path)
+            except (OSError, json.JSONDecodeError):
+                logger.error(f'Backup file {backup_path} is corrupted.')
+                continue
+            print(f'Users data restored from backup {backup_path}.')
+            logger.warning(f'Users data restored from backup {backup_path}.')
+            return users
+        return {}
+
+    def backup_path(self, number: int) -> str:
+        return f'{self.file_path}.bak.{number}'
+
+    def _existing_backups(self) -> List[str]:
+        return [path for path in map(self.backup_path, range(1, self.backups + 1)) if os.path.exists(path)]
+
+    def _rotate_backups(self) -> None:
+        if not self.backups or not os.path.exists(self.file_path):
+            return
+        for number in range(self.backups - 1, 0, -1):
+            if os.path.exists(self.backup_path(number)):
+                os.replace(self.backup_path(number), self.backup_path(number + 1))
+        # Hard link keeps the current file content as a backup without copying it,
+        # the main file is then replaced with a new inode.
+        newest_backup = self.backup_path(1)
+        if os.path.exists(newest_backup):
+            os.remove(newest_backup)
+        try:
+            os.link(self.file_path, newest_backup)
+        except OSError:
+            shutil.copy2(self.file_path, newest_backup)
+
+    @staticmethod
+    def _read(file_path: str) -> Dict[str, dict]:
+        with open(file_path, 'r') as file:
+            return json.load(file)
 
     @staticmethod
     def create_directory_if_not_exists(dir_path: str) -> None:
         if not os.path.exists(dir_path):
             os.makedirs(dir_path, exist_ok=True)
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS users (
+    user_name TEXT PRIMARY KEY,
+    encrypted_password TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS profiles (
+    user_name TEXT NOT NULL REFERENCES users(user_name) ON DELETE CASCADE,
+    profile_name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    default_ai TEXT,
+    credentials TEXT NOT NULL,
+    PRIMARY KEY (user_name, profile_name)
+);
+'''
+
+
+class SQLiteStorage(StorageInterface):
+    """Users and their profiles stored as rows of SQLite database, updated per user in transactions."""
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        dir_path = os.path.dirname(db_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        self._lock = threading.RLock()
+        self.connection = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA foreign_keys=ON')
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self.connection.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.connection
+            except BaseException:
+                self.connection.execute('ROLLBACK')
+                raise
+            self.connection.execute('COMMIT')
+
+    @timed('users_save', backend='sqlite')
+    def save_data(self, users: Dict[str, dict]) -> None:
+        with self.transaction() as connection:
+            stored = [row[0] for row in connection.execute('SELECT user_name FROM users')]
+            self._update(connection, users, [username for username in stored if username not in users])
+
+    @timed('users_save', backend='sqlite')
+    def update_data(self, changed: Dict[str, dict], removed: Iterable[str] = ()) -> None:
+        with self.transaction() as connection:
+            self._update(connection, changed, removed)
+
+    def load_usernames(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self.connection.execute('SELECT user_name FROM users ORDER BY rowid')]
+
+    def load_user(self, username: str) -> Optional[dict]:
+        with self._lock:
+            row = self.connection.execute('SELECT encrypted_password FROM users WHERE user_name = ?',
+                                          (username,)).fetchone()
+            if row is None:
+                return None
+            rows = self.connection.execute(
+                'SELECT profile_name, default_ai, credentials FROM profiles WHERE user_name = ? ORDER BY position',
+                (username,)).fetchall()
+        return {
+            'user_name': username,
+            'encrypted_password': row[0],
+            'profiles': [{'profile_name': profile_name, 'credentials': json.loads(credentials), 'default_ai': default_ai}
+                         for profile_name, default_ai, credentials in rows]
+        }
+
+    def load_data(self) -> Dict[str, dict]:
+        with self._lock:
+            users = {user_name: {'user_name': user_name, 'encrypted_password': password, 'profiles': []}
+                     for user_name, password in self.connection.execute(
+                         'SELECT user_name, encrypted_password FROM users ORDER BY rowid')}
+            rows = self.connection.execute(
+                'SELECT user_name, profile_name, default_ai, credentials FROM profiles ORDER BY user_name, position')
+            for user_name, profile_name, default_ai, credentials in rows:
+                users[user_name]['profiles'].append({
+                    'profile_name': profile_name,
+                    'credentials': json.loads(credentials),
+                    'default_ai': default_ai
+                })
+        return users
+
+    @staticmethod
+    def _update(connection: sqlite3.Connection, changed: Dict[str, dict], removed: Iterable[str]) -> None:
+        connection.executemany('DELETE FROM users WHERE user_name = ?', ((username,) for username in removed))
+        for user_name, user_data in changed.items():
+            connection.execute(
+                'INSERT INTO users (user_name, encrypted_password) VALUES (?, ?) '
+                'ON CONFLICT (user_name) DO UPDATE SET encrypted_password = excluded.encrypted_password '
+                'WHERE encrypted_password != excluded.encrypted_password',
+                (user_name, user_data['encrypted_password'])
+            )
+            profiles = user_data.get('profiles', [])
+            names = [profile['profile_name'] for profile in profiles]
+            connection.execute(
+                f'DELETE FROM profiles WHERE user_name = ? AND profile_name NOT IN ({", ".join("?" * len(names))})',
+                (user_name, *names)
+            )
+            # Unchanged profile rows are left untouched.
+            connection.executemany(
+                'INSERT INTO profiles (user_name, profile_name, position, default_ai, credentials) '
+                'VALUES (?, ?, ?, ?, ?) ON CONFLICT (user_name, profile_name) DO UPDATE SET '
+                'position = excluded.position, default_ai = excluded.default_ai, credentials = excluded.credentials '
+                'WHERE position IS NOT excluded.position OR default_ai IS NOT excluded.default_ai '
+                'OR credentials IS NOT excluded.credentials',
+                ((user_name, profile['profile_name'], position, profile.get('default_ai'),
+                  json.dumps(profile.get('credentials', [])))
+                 for position, profile in enumerate(profiles))
+            )
+
+
+def open_storage(path: str) -> StorageInterface:
+    """Storage for given file, JSON for `.json` files, SQLite otherwise."""
+    return JSONStorage(path) if path.endswith('.json') else SQLiteStorage(path)
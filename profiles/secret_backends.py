@@ -0,0 +1,137 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional
+
+from custom_exceptions import VaultError
+from settings import SECRETS_BACKEND, STORAGE_DIR, VAULT_FILE
+from utils import atomic_write
+
+VAULT_VERSION = 1
+
+
+class SecretsBackend(ABC):
+    @abstractmethod
+    def get(self, service_name: str, data_name: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def set(self, service_name: str, data_name: str, value: str) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, service_name: str, data_name: str) -> None:
+        pass
+
+    def get_many(self, service_name: str, data_names: Iterable[str]) -> Dict[str, Optional[str]]:
+        return {data_name: self.get(service_name, data_name) for data_name in data_names}
+
+
+class KeyringBackend(SecretsBackend):
+    """System keyring, imported on first use as loading its backends is slow."""
+
+    @staticmethod
+    def _keyring():
+        import keyring
+        return keyring
+
+    def get(self, service_name: str, data_name: str) -> Optional[str]:
+        return self._keyring().get_password(service_name, data_name)
+
+    def set(self, service_name: str, data_name: str, value: str) -> None:
+        self._keyring().set_password(service_name, data_name, value)
+
+    def delete(self, service_name: str, data_name: str) -> None:
+        self._keyring().delete_password(service_name, data_name)
+
+
+class EncryptedFileVault(SecretsBackend):
+    """Secrets kept in a local file encrypted with a key derived from passphrase (scrypt + Fernet).
+
+    The vault is decrypted once when opened, reads are served from memory and every change
+    re-encrypts the whole file, which is replaced atomically.
+    """
+    SCRYPT_N = 2 ** 15
+    SCRYPT_R = 8
+    SCRYPT_P = 1
+
+    def __init__(self, file_path: str, passphrase: str) -> None:
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._secrets: Dict[str, Dict[str, str]] = {}
+        if os.path.exists(file_path):
+            with open(file_path, 'r') as file:
+                try:
+                    vault = json.load(file)
+                    self._salt = base64.b64decode(vault['salt'])
+                    self._params = (vault['n'], vault['r'], vault['p'])
+                    token = vault['data'].encode('ascii')
+                except (ValueError, KeyError, TypeError) as e:
+                    raise VaultError(f'Vault file {file_path} is corrupted.') from e
+            self._fernet = self._derive(passphrase)
+            self._secrets = self._decrypt(token)
+        else:
+            self._salt = os.urandom(16)
+            self._params = (self.SCRYPT_N, self.SCRYPT_R, self.SCRYPT_P)
+            self._fernet = self._derive(passphrase)
+
+    def get(self, service_name: str, data_name: str) -> Optional[str]:
+        return self._secrets.get(service_name, {}).get(data_name)
+
+    def get_many(self, service_name: str, data_names: Iterable[str]) -> Dict[str, Optional[str]]:
+        service_secrets = self._secrets.get(service_name, {})
+        return {data_name: service_secrets.get(data_name) for data_name in data_names}
+
+    def set(self, service_name: str, data_name: str, value: str) -> None:
+        with self._lock:
+            self._secrets.setdefault(service_name, {})[data_name] = value
+            self._save()
+
+    def delete(self, service_name: str, data_name: str) -> None:
+        with self._lock:
+            if self._secrets.get(service_name, {}).pop(data_name, None) is not None:
+                self._save()
+
+    def _derive(self, passphrase: str):
+        from cryptography.fernet import Fernet
+
+        n, r, p = self._params
+        key = hashlib.scrypt(passphrase.encode('utf-8'), salt=self._salt, n=n, r=r, p=p,
+                             maxmem=256 * n * r + 1024 ** 2, dklen=32)
+        return Fernet(base64.urlsafe_b64encode(key))
+
+    def _decrypt(self, token: bytes) -> Dict[str, Dict[str, str]]:
+        from cryptography.fernet import InvalidToken
+
+        try:
+            return json.loads(self._fernet.decrypt(token))
+        except InvalidToken:
+            raise VaultError('Invalid vault passphrase.') from None
+
+    def _save(self) -> None:
+        n, r, p = self._params
+        token = self._fernet.encrypt(json.dumps(self._secrets).encode('utf-8'))
+        atomic_write(self.file_path, json.dumps({
+            'version': VAULT_VERSION,
+            'salt': base64.b64encode(self._salt).decode('ascii'),
+            'n': n, 'r': r, 'p': p,
+            'data': token.decode('ascii'),
+        }))
+
+
+def create_secrets_backend() -> SecretsBackend:
+    """Backend selected in settings or with FLASHCARDS_SECRETS_BACKEND, vault passphrase is read from
+    FLASHCARDS_VAULT_PASSPHRASE or asked for."""
+    backend = os.getenv('FLASHCARDS_SECRETS_BACKEND', SECRETS_BACKEND)
+    if backend == 'keyring':
+        return KeyringBackend()
+    if backend == 'vault':
+        passphrase = os.getenv('FLASHCARDS_VAULT_PASSPHRASE')
+        if passphrase is None:
+            import stdiomask  # type: ignore
+            passphrase = stdiomask.getpass(prompt='Enter secrets vault passphrase: ')
+        return EncryptedFileVault(f'{STORAGE_DIR}/{VAULT_FILE}', passphrase)
+    raise ValueError(f'Unknown secrets backend "{backend}".')
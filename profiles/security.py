@@ -1,31 +1,123 @@
 import os
 import re
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import bcrypt
-import keyring
-from dotenv import load_dotenv
 
 from custom_exceptions import ValidationError
-
-load_dotenv()
+from metrics import span
+from profiles.secret_backends import SecretsBackend, create_secrets_backend
+from settings import BCRYPT_ROUNDS, BCRYPT_WORKERS, SECRETS_CACHE_TTL
+
+
+class SecretCache:
+    """Secrets kept in memory for `ttl` seconds (`ttl` <= 0 disables caching).
+
+    Values are held in bytearrays which are overwritten with zeros when dropped. Strings returned
+    by `get` are copies which can't be wiped, so clearing is best-effort only.
+    """
+
+    def __init__(self, ttl: float = SECRETS_CACHE_TTL) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Tuple[bytearray, float]] = {}
+
+    def get(self, service_name: str, data_name: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get((service_name, data_name))
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                self._drop((service_name, data_name))
+                return None
+            return value.decode('utf-8')
+
+    def set(self, service_name: str, data_name: str, value: str) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._drop((service_name, data_name))
+            self._entries[(service_name, data_name)] = (bytearray(value.encode('utf-8')), time.monotonic() + self.ttl)
+
+    def invalidate(self, service_name: str, data_name: str) -> None:
+        with self._lock:
+            self._drop((service_name, data_name))
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            value = entry[0]
+            value[:] = bytes(len(value))
 
 
 class SensitiveDataManager:
+    # Shared by all credentials, so the backend is queried once per secret within `SECRETS_CACHE_TTL`.
+    cache = SecretCache()
+    # Created (and vault unlocked) on first use, once per session.
+    _backend: Optional[SecretsBackend] = None
+
     def load_sensitive_data_to_env(self, service_name: str, data_name: str, env_variable_name: str) -> None:
         data_value = self.get_sensitive_data(service_name, data_name)
         if not data_value:
-            raise ValueError(f'Data "{data_name}" not found for service "{service_name}" in keyring')
+            raise ValueError(f'Data "{data_name}" not found for service "{service_name}" in secrets storage')
         os.environ[env_variable_name] = data_value
 
-    @staticmethod
-    def set_sensitive_data(service_name: str, data_name: str, sensitive_data: str) -> None:
-        keyring.set_password(service_name, data_name, sensitive_data)
-
-    @staticmethod
-    def get_sensitive_data(service_name: str, data_name: str) -> Optional[str]:
-        return keyring.get_password(service_name, data_name)
+    @classmethod
+    def backend(cls) -> SecretsBackend:
+        if cls._backend is None:
+            cls._backend = create_secrets_backend()
+        return cls._backend
+
+    @classmethod
+    def use_backend(cls, backend: SecretsBackend) -> None:
+        cls._backend = backend
+        cls.cache.clear()
+
+    @classmethod
+    def set_sensitive_data(cls, service_name: str, data_name: str, sensitive_data: str) -> None:
+        cls.backend().set(service_name, data_name, sensitive_data)
+        cls.cache.invalidate(service_name, data_name)
+
+    @classmethod
+    def get_sensitive_data(cls, service_name: str, data_name: str) -> Optional[str]:
+        data_value = cls.cache.get(service_name, data_name)
+        if data_value is None:
+            with span('secrets_read'):
+                data_value = cls.backend().get(service_name, data_name)
+            if data_value is not None:
+                cls.cache.set(service_name, data_name, data_value)
+        return data_value
+
+    @classmethod
+    def get_many_sensitive_data(cls, service_name: str, data_names: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Read several secrets of a service, only those not cached are read from backend, in one call."""
+        values = {data_name: cls.cache.get(service_name, data_name) for data_name in data_names}
+        missing = [data_name for data_name, value in values.items() if value is None]
+        if missing:
+            with span('secrets_read'):
+                read = cls.backend().get_many(service_name, missing)
+            for data_name, value in read.items():
+                values[data_name] = value
+                if value is not None:
+                    cls.cache.set(service_name, data_name, value)
+        return values
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        cls.cache.clear()
 
     @staticmethod
     def get_env_variable(env_variable_name: str) -> str:
@@ -36,6 +128,10 @@ class SensitiveDataManager:
 
 
 class EncryptionStrategy(ABC):
+    # Shared worker pool for hashing off the calling thread, created on first use.
+    _executor: Optional[ThreadPoolExecutor] = None
+    _executor_lock = threading.Lock()
+
     @abstractmethod
     def encrypt(self, plain_text: str):
         pass
@@ -44,16 +140,60 @@ class EncryptionStrategy(ABC):
     def check_encrypted(self, plain_text: str, encrypted_text: str):
         pass
 
+    def needs_rehash(self, encrypted_text: str) -> bool:
+        """Whether the stored hash was made with outdated parameters and should be replaced."""
+        return False
+
+    def encrypt_many(self, plain_texts: Iterable[str]) -> List[str]:
+        return list(self.executor().map(self.encrypt, plain_texts))
+
+    def check_encrypted_async(self, plain_text: str, encrypted_text: str) -> 'Future[bool]':
+        return self.executor().submit(self.check_encrypted, plain_text, encrypted_text)
+
+    @classmethod
+    def executor(cls) -> ThreadPoolExecutor:
+        with cls._executor_lock:
+            if EncryptionStrategy._executor is None:
+                EncryptionStrategy._executor = ThreadPoolExecutor(BCRYPT_WORKERS, thread_name_prefix='hashing')
+            return EncryptionStrategy._executor
+
 
 class Bcrypt(EncryptionStrategy):
+    """bcrypt hashing with `rounds` cost factor, bcrypt releases the GIL so hashes are computed in parallel."""
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS) -> None:
+        self.rounds = rounds
+
     def encrypt(self, plain_text: str) -> str:
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=self.rounds)
         hashed = bcrypt.hashpw(plain_text.encode('utf-8'), salt)
         return hashed.decode('utf-8')
 
     def check_encrypted(self, plain_text: str, encrypted_text: str) -> bool:
         return bcrypt.checkpw(plain_text.encode('utf-8'), encrypted_text.encode('utf-8'))
 
+    def needs_rehash(self, encrypted_text: str) -> bool:
+        try:
+            return int(encrypted_text.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+
+def calibrate_bcrypt_rounds(target_seconds: float, min_rounds: int = 10, max_rounds: int = 16) -> int:
+    """Highest bcrypt cost factor which hashes within `target_seconds` on this host.
+
+    Each cost step doubles hashing time, so only the minimal cost is measured and higher ones are extrapolated.
+    """
+    salt = bcrypt.gensalt(rounds=min_rounds)
+    start = time.perf_counter()
+    bcrypt.hashpw(b'calibration password', salt)
+    elapsed = time.perf_counter() - start
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed * 2 <= target_seconds:
+        rounds += 1
+        elapsed *= 2
+    return rounds
+
 
 class PasswordValidator:
     def __init__(self, min_length: int = 6, max_length: Optional[int] = None, numbers: bool = True,
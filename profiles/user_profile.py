@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from custom_exceptions import DuplicateProfileError, DuplicateServiceError, NoCredentialsError, NoProfileError
 from profiles.credentials import Credentials, CredentialsFactory
@@ -10,6 +10,13 @@ class Profile:
     profile_name: str
     credentials: List[Credentials] = field(default_factory=list)
     default_ai: Optional[str] = None
+    # Indexes over `credentials`, kept in sync by add/remove methods.
+    _by_service: Dict[str, Credentials] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _ai_credentials: Dict[str, Credentials] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        for credentials in self.credentials:
+            self._index(credentials)
 
     def as_dict(self) -> dict:
         return {
@@ -33,28 +40,35 @@ class Profile:
         return profile
 
     def add_credentials(self, credentials: Credentials) -> None:
-        if any(c.service_name == credentials.service_name for c in self.credentials):
+        if credentials.service_name in self._by_service:
             raise DuplicateServiceError(f'Credentials for service {credentials.service_name} already exist in profile'
                                         f' {self.profile_name}.')
-        if credentials.credentials_type == 'AI' and not any(c.credentials_type == 'AI' for c in self.credentials):
+        if credentials.credentials_type == 'AI' and not self._ai_credentials:
             self.set_as_default_ai(credentials)
         self.credentials.append(credentials)
+        self._index(credentials)
 
     def remove_credentials(self, credentials: Credentials) -> None:
-        try:
-            self.credentials.remove(credentials)
-            if credentials.service_name == self.default_ai:
-                self.default_ai = next((c.service_name for c in self.credentials if c.credentials_type == 'AI'), None)
-                print(f'Default AI for this profile updated to {self.default_ai}')
-        except ValueError:
+        if self._by_service.get(credentials.service_name) != credentials:
             raise NoCredentialsError(f'Credentials not found in profile {self.profile_name}.')
+        self.credentials.remove(credentials)
+        del self._by_service[credentials.service_name]
+        self._ai_credentials.pop(credentials.service_name, None)
+        if credentials.service_name == self.default_ai:
+            self.default_ai = next(iter(self._ai_credentials), None)
+            print(f'Default AI for this profile updated to {self.default_ai}')
 
     def get_credentials(self, service_name):
         try:
-            return next(c for c in self.credentials if c.service_name == service_name)
-        except StopIteration:
+            return self._by_service[service_name]
+        except KeyError:
             raise NoCredentialsError(f'Credentials "{service_name}" does not exists for profile {self.profile_name}.')
 
+    def _index(self, credentials: Credentials) -> None:
+        self._by_service[credentials.service_name] = credentials
+        if credentials.credentials_type == 'AI':
+            self._ai_credentials[credentials.service_name] = credentials
+
     def set_as_default_ai(self, credentials: Credentials) -> None:
         if credentials.credentials_type != 'AI':
             raise ValueError(f'Service {credentials.service_name} is not a valid AI credential.')
@@ -66,6 +80,7 @@ class User:
         self.user_name = user_name
         self.encrypted_password = encrypted_password
         self.profiles: List[Profile] = []
+        self._profiles_by_name: Dict[str, Profile] = {}
         self.is_logged_in = False
 
     def as_dict(self) -> dict:
@@ -89,16 +104,18 @@ class User:
         if self.profile_exists(profile.profile_name):
             raise DuplicateProfileError(f'Profile {profile.profile_name} already exists for User {self.user_name}')
         self.profiles.append(profile)
+        self._profiles_by_name[profile.profile_name] = profile
 
     def remove_profile(self, profile_name: str) -> None:
         profile = self.get_profile(profile_name)
         self.profiles.remove(profile)
+        del self._profiles_by_name[profile_name]
 
     def get_profile(self, profile_name: str) -> Profile:
         try:
-            return next(p for p in self.profiles if p.profile_name == profile_name)
-        except StopIteration:
+            return self._profiles_by_name[profile_name]
+        except KeyError:
             raise NoProfileError(f'Profile "{profile_name}" does not exists for user {self.user_name}.')
 
     def profile_exists(self, profile_name: str) -> bool:
-        return any(p.profile_name == profile_name for p in self.profiles)
+        return profile_name in self._profiles_by_name
@@ -0,0 +1,244 @@
+"""Opt-in profiling of actions with cProfile (cpu) and tracemalloc (memory), and a viewer of the reports.
+
+Profiling is enabled by FLASHCARDS_PROFILE environment variable (`cpu`, `memory` or `cpu,memory`), or by
+--profile option of app.py and cli.py. Each profiled action writes `NNN-<action>.json` report (and `.prof`
+cProfile stats, readable by pstats or snakeviz) to a new run directory in PROFILE_DIR.
+
+Usage:
+    python profiling.py show RUN_DIR [--top N]
+    python profiling.py diff RUN_DIR_A RUN_DIR_B [--top N]
+"""
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import ContextManager, Dict, FrozenSet, Iterable, Iterator, List, Optional
+
+from logger import logger
+from settings import PROFILE_DIR, PROFILE_TOP, STORAGE_DIR
+from utils import atomic_write
+
+MODES = frozenset({'cpu', 'memory'})
+
+
+def parse_modes(value: Optional[str]) -> FrozenSet[str]:
+    """Parse comma separated profiling modes, `1`/`all` enable all of them, empty value none."""
+    if not value or value == '0':
+        return frozenset()
+    if value in ('1', 'all'):
+        return MODES
+    modes = frozenset(mode.strip() for mode in value.split(',') if mode.strip())
+    if modes - MODES:
+        raise ValueError(f'Unknown profiling modes: {", ".join(sorted(modes - MODES))}.')
+    return modes
+
+
+class Profiler:
+    """Profiles blocks of code (actions), writing a report for each of them.
+
+    Nested blocks are not profiled separately, they are part of the report of the outermost one.
+    cProfile sees only the thread which runs the block, tracemalloc sees allocations of all threads.
+    """
+
+    def __init__(self, modes: Iterable[str] = (), output_dir: str = f'{STORAGE_DIR}/{PROFILE_DIR}',
+                 top: int = PROFILE_TOP) -> None:
+        self.modes = frozenset(modes)
+        self.output_dir = output_dir
+        self.top = top
+        self._lock = threading.Lock()
+        self._active = False
+        self._count = 0
+        self._run_dir: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.modes)
+
+    @property
+    def run_dir(self) -> str:
+        """Directory with reports of this process, created with the first report."""
+        if self._run_dir is None:
+            self._run_dir = os.path.join(self.output_dir, f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}')
+            os.makedirs(self._run_dir, exist_ok=True)
+        return self._run_dir
+
+    def profile(self, name: str) -> ContextManager[None]:
+        if not self.modes:
+            return nullcontext()
+        with self._lock:
+            if self._active:
+                return nullcontext()
+            self._active = True
+        return self._profile(name)
+
+    @contextmanager
+    def _profile(self, name: str) -> Iterator[None]:
+        cpu_profile = cProfile.Profile() if 'cpu' in self.modes else None
+        memory = 'memory' in self.modes
+        started_tracing = memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        before = None
+        if memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+        start = time.perf_counter()
+        if cpu_profile is not None:
+            cpu_profile.enable()
+        try:
+            yield
+        finally:
+            if cpu_profile is not None:
+                cpu_profile.disable()
+            duration = time.perf_counter() - start
+            report = {'action': name, 'duration': duration}
+            after = None
+            if memory:
+                report['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+                after = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            try:
+                self._write_report(name, report, cpu_profile, before, after)
+            finally:
+                self._active = False
+
+    def _write_report(self, name: str, report: dict, cpu_profile: Optional[cProfile.Profile],
+                      before: Optional[tracemalloc.Snapshot], after: Optional[tracemalloc.Snapshot]) -> None:
+        self._count += 1
+        base_path = os.path.join(self.run_dir, f'{self._count:03d}-{re.sub(r"[^\w.-]", "_", name)}')
+        if cpu_profile is not None:
+            cpu_profile.dump_stats(f'{base_path}.prof')
+            report['functions'] = top_functions(pstats.Stats(cpu_profile), self.top)
+        if before is not None and after is not None:
+            report['allocations'] = top_allocations(before, after, self.top)
+        atomic_write(f'{base_path}.json', json.dumps(report, indent=2))
+
+
+def top_functions(stats: pstats.Stats, top: int) -> List[dict]:
+    """Functions with the highest cumulative time."""
+    functions = []
+    for (file_name, line, function), (_, calls, total_time, cumulative_time, _) in stats.stats.items():  # type: ignore
+        functions.append({
+            'function': f'{file_name}:{line}({function})',
+            'calls': calls,
+            'total_time': total_time,
+            'cumulative_time': cumulative_time,
+        })
+    functions.sort(key=lambda item: item['cumulative_time'], reverse=True)
+    return functions[:top]
+
+
+def top_allocations(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, top: int) -> List[dict]:
+    """Source lines which allocated the most memory (still held at the end) between the snapshots."""
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    differences = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+    return [{
+        'site': str(difference.traceback[0]),
+        'size': difference.size_diff,
+        'count': difference.count_diff,
+    } for difference in differences[:top] if difference.size_diff > 0]
+
+
+@dataclass
+class ActionSummary:
+    calls: int = 0
+    duration: float = 0.0
+    peak_bytes: int = 0
+    functions: Dict[str, float] = field(default_factory=lambda: defaultdict(float))
+    allocations: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+
+def load_run(run_dir: str) -> Dict[str, ActionSummary]:
+    """Summaries of all reports of a run, by action."""
+    summaries: Dict[str, ActionSummary] = defaultdict(ActionSummary)
+    for file_name in sorted(os.listdir(run_dir)):
+        if not file_name.endswith('.json'):
+            continue
+        with open(os.path.join(run_dir, file_name), 'r') as file:
+            report = json.load(file)
+        summary = summaries[report['action']]
+        summary.calls += 1
+        summary.duration += report['duration']
+        summary.peak_bytes = max(summary.peak_bytes, report.get('peak_bytes', 0))
+        for function in report.get('functions', []):
+            summary.functions[function['function']] += function['cumulative_time']
+        for allocation in report.get('allocations', []):
+            summary.allocations[allocation['site']] += allocation['size']
+    return dict(summaries)
+
+
+def format_run(run: Dict[str, ActionSummary], top: int) -> str:
+    lines = [f'{"action":<24}{"calls":>7}{"time [s]":>12}{"peak [KiB]":>12}']
+    for name, summary in sorted(run.items(), key=lambda item: item[1].duration, reverse=True):
+        lines.append(f'{name:<24}{summary.calls:>7}{summary.duration:>12.3f}{summary.peak_bytes / 1024:>12.1f}')
+        for function, cumulative_time in _top(summary.functions, top):
+            lines.append(f'    {cumulative_time:>10.3f} s  {function}')
+        for site, size in _top(summary.allocations, top):
+            lines.append(f'    {size / 1024:>10.1f} KiB  {site}')
+    return '\n'.join(lines)
+
+
+def format_diff(run_a: Dict[str, ActionSummary], run_b: Dict[str, ActionSummary], top: int) -> str:
+    """Per action changes of time and peak memory, and functions whose cumulative time changed the most."""
+    lines = [f'{"action":<24}{"time A [s]":>12}{"time B [s]":>12}{"change":>9}{"peak A [KiB]":>14}{"peak B [KiB]":>14}']
+    empty = ActionSummary()
+    for name in sorted(set(run_a) | set(run_b)):
+        a, b = run_a.get(name, empty), run_b.get(name, empty)
+        change = f'{(b.duration - a.duration) / a.duration:+.0%}' if a.duration else 'new'
+        if not b.calls:
+            change = 'gone'
+        lines.append(f'{name:<24}{a.duration:>12.3f}{b.duration:>12.3f}{change:>9}'
+                     f'{a.peak_bytes / 1024:>14.1f}{b.peak_bytes / 1024:>14.1f}')
+        deltas = {function: b.functions.get(function, 0.0) - a.functions.get(function, 0.0)
+                  for function in set(a.functions) | set(b.functions)}
+        for function, delta in sorted(deltas.items(), key=lambda item: abs(item[1]), reverse=True)[:top]:
+            if delta:
+                lines.append(f'    {delta:>+10.3f} s  {function}')
+    return '\n'.join(lines)
+
+
+def _top(values: Dict[str, float], top: int) -> List[tuple]:
+    return sorted(values.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def modes_from_env() -> FrozenSet[str]:
+    """Profiling modes from FLASHCARDS_PROFILE, an invalid value disables profiling instead of failing startup."""
+    try:
+        return parse_modes(os.getenv('FLASHCARDS_PROFILE'))
+    except ValueError as e:
+        logger.warning(f'Profiling disabled, invalid FLASHCARDS_PROFILE: {e}')
+        return frozenset()
+
+
+profiler = Profiler(modes_from_env())
+profile = profiler.profile
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    show_parser = subparsers.add_parser('show', help='summary of a run')
+    show_parser.add_argument('run_dir')
+    diff_parser = subparsers.add_parser('diff', help='compare two runs')
+    diff_parser.add_argument('run_dir_a')
+    diff_parser.add_argument('run_dir_b')
+    for subparser in (show_parser, diff_parser):
+        subparser.add_argument('--top', type=int, default=5, help='number of functions and allocation sites listed')
+    args = parser.parse_args(argv)
+    if args.command == 'show':
+        print(format_run(load_run(args.run_dir), args.top))
+    else:
+        print(format_diff(load_run(args.run_dir_a), load_run(args.run_dir_b), args.top))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,52 @@
+import os
+
 STORAGE_DIR = 'storage'
 PROFILES_DIR = 'profiles'
 USERS_FILE = 'users.json'
+USERS_FILE_BACKUPS = 3
+# Indentation of users file, None writes compact JSON which is faster for large files
+USERS_FILE_INDENT = 4
+USERS_DB = 'users.sqlite3'
+# Users storage: 'json' (USERS_FILE) or 'sqlite' (USERS_DB), see profiles/migrate.py to move existing users
+STORAGE_BACKEND = 'json'
+# Seconds to wait for further changes before users are stored, None stores every change immediately
+USERS_SAVE_DELAY = None
+# Seconds secrets read from keyring are kept in memory, 0 disables caching
+SECRETS_CACHE_TTL = 15 * 60
+# bcrypt cost factor of new password hashes (older hashes are replaced on login), see profiles/calibrate.py
+BCRYPT_ROUNDS = 12
+BCRYPT_WORKERS = os.cpu_count() or 1
+# Secrets backend: 'keyring' (system keyring) or 'vault' (VAULT_FILE encrypted with a passphrase),
+# overridden with FLASHCARDS_SECRETS_BACKEND environment variable
+SECRETS_BACKEND = 'keyring'
+VAULT_FILE = 'vault.json'
+DECKS_DB = 'decks.sqlite3'
+QUERY_HISTORY_DB = 'queries.sqlite3'
+# Days AI requests metrics are kept, their (compressed) responses are dropped sooner
+QUERY_HISTORY_RETENTION_DAYS = 180
+QUERY_HISTORY_RESPONSES_DAYS = 30
+# Minimum days between retention runs on startup, as they may compact (VACUUM) the whole database
+QUERY_HISTORY_RETENTION_INTERVAL_DAYS = 1
+LOG_DIR = '.'
+# Log files are rotated when they reach LOG_MAX_BYTES, or at LOG_ROTATE_WHEN (e.g. 'midnight') if set
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_ROTATE_WHEN = None
+LOG_BACKUPS = 5
+# Write logs as JSON lines instead of plain text
+LOG_JSON = False
+# Record timings of actions and key operations (also enabled by FLASHCARDS_METRICS=1), dumped to METRICS_FILE
+# on exit, in Prometheus text format or as JSON summary if the file name ends with .json
+METRICS_ENABLED = False
+METRICS_FILE = 'metrics.prom'
+# Reports of profiled actions (FLASHCARDS_PROFILE=cpu,memory) are written to PROFILE_DIR, with PROFILE_TOP entries
+PROFILE_DIR = 'profiling'
+PROFILE_TOP = 25
+FINGERPRINTS_DIR = 'fingerprints'
 
 
 FILE_TYPES = [
     ('Text files', '.txt'),
+    ('Markdown files', '.md'),
     ('PDF files', '.pdf'),
     ('All files', '.*')
 ]
@@ -16,3 +58,20 @@ PROMPT = (
                 f'Please format the flashcards as a simple JSON array with keys: "front", "back", '
                 f'without Markdown or code block formatting.'
             )
+
+# Derive card IDs from card content and source note instead of random IDs
+CONTENT_CARD_IDS = False
+# Drop generated cards already approved in profile's decks (otherwise they are only reported)
+SKIP_KNOWN_CARDS = True
+# Due cards loaded from the deck at once during a review session
+REVIEW_PAGE_SIZE = 50
+
+NOTES_CACHE_DIR = 'notes_cache'
+# Markdown notes are sent to the AI section by section, sections longer than this are split
+NOTE_CHUNK_MAX_CHARS = 6000
+# Notes processed concurrently by cli.py
+CLI_WORKERS = 4
+API_MAX_WORKERS = 8
+
+NOTION_API_URL = 'https://api.notion.com/v1'
+NOTION_API_VERSION = '2022-06-28'
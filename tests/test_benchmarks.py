@@ -0,0 +1,55 @@
+from benchmarks.data import make_cards, make_note, make_response, make_users
+from benchmarks.suite import Case, build_cases, compare, format_results, main, run, time_case
+from flashcards.deck import parse_cards
+from profiles.user_profile import User
+
+
+def test_generators_are_deterministic():
+    assert make_cards(10) == make_cards(10)
+    assert len({card.front for card in make_cards(1000)}) == 1000
+    assert make_note(4) == make_note(4)
+    assert 4 * 1024 <= len(make_note(4)) < 6 * 1024
+
+
+def test_generated_data_is_valid_for_application():
+    assert [card.front for card in parse_cards(make_response(5))] == [card.front for card in make_cards(5)]
+    users = make_users(3, profiles=2)
+    user = User.from_dict(users['user2'])
+    assert len(user.profiles) == 2
+    assert user.as_dict() == users['user2']
+
+
+def test_time_case_runs_setup_and_teardown_every_repeat():
+    calls = []
+    case = Case('case', lambda state: calls.append(('run', state)), lambda: len(calls),
+                lambda state: calls.append(('teardown', state)))
+    assert len(time_case(case, 2)) == 2
+    assert calls == [('run', 0), ('teardown', 0), ('run', 2), ('teardown', 2)]
+    assert time_case(Case('measured', lambda _: None, measure=lambda: 1.5), 3) == [1.5, 1.5, 1.5]
+
+
+def test_all_cases_run(tmp_path):
+    cases = build_cases([100], 10, 1, 10, str(tmp_path), startup=False)
+    results = run(cases, 1)
+    assert set(results) == {case.name for case in cases}
+    assert 'deck.remove_card[100]' in results
+    assert all(result['min'] >= 0 for result in results.values())
+
+
+def test_compare_with_baseline():
+    baseline = {'a': {'min': 1.0, 'median': 1.0}, 'b': {'min': 1.0, 'median': 1.0}}
+    results = {'a': {'min': 1.1, 'median': 1.2}, 'b': {'min': 1.3, 'median': 1.3}, 'c': {'min': 1.0, 'median': 1.0}}
+    assert compare(results, baseline, 0.2) == ['b']
+    report = format_results(results, baseline, ['b']).splitlines()
+    assert report[2].endswith('+30%  REGRESSION')
+    assert report[3].endswith('new')
+
+
+def test_main_saves_and_checks_baseline(tmp_path, capsys):
+    baseline = str(tmp_path / 'baseline.json')
+    arguments = ['--cards', '100', '--users', '10', '--note-kb', '1', '--response-cards', '10', '--repeats', '1',
+                 '--filter', 'parse', '--no-startup']
+    assert main(arguments + ['--save', baseline]) == 0
+    assert main(arguments + ['--baseline', baseline, '--threshold', '1000']) == 0
+    assert main(arguments + ['--baseline', baseline, '--threshold', '-1']) == 1
+    assert 'REGRESSION' in capsys.readouterr().out
@@ -0,0 +1,92 @@
+import pytest
+
+from custom_exceptions import InvalidDeckFile
+from flashcards.binary_deck import HEADER, OFFSET, BinaryDeckReader, BinaryDeckWriter, write_deck
+from flashcards.deck import Card
+
+
+@pytest.fixture
+def cards():
+    return [Card(front=f'Front {i} ✓', back=f'Back {i} – żółć') for i in range(100)]
+
+
+def test_write_and_read_deck(tmp_path, cards):
+    file_path = str(tmp_path / 'deck.fcdk')
+    write_deck(file_path, cards)
+    with BinaryDeckReader(file_path) as reader:
+        assert len(reader) == 100
+        assert list(reader) == cards
+
+
+def test_random_access(tmp_path, cards):
+    file_path = str(tmp_path / 'deck.fcdk')
+    write_deck(file_path, cards)
+    with BinaryDeckReader(file_path) as reader:
+        assert reader[42] == cards[42]
+        assert reader[-1] == cards[-1]
+        assert reader[10:13] == cards[10:13]
+        with pytest.raises(IndexError):
+            reader[100]
+
+
+def test_load_deck(tmp_path, cards):
+    file_path = str(tmp_path / 'deck.fcdk')
+    write_deck(file_path, cards)
+    with BinaryDeckReader(file_path) as reader:
+        assert reader.load_deck(limit=5).cards == cards[:5]
+
+
+def test_empty_deck(tmp_path):
+    file_path = str(tmp_path / 'deck.fcdk')
+    write_deck(file_path, [])
+    with BinaryDeckReader(file_path) as reader:
+        assert len(reader) == 0
+        assert list(reader) == []
+
+
+def test_failed_write_leaves_no_file(tmp_path, cards):
+    file_path = tmp_path / 'deck.fcdk'
+    with pytest.raises(RuntimeError):
+        with BinaryDeckWriter(str(file_path)) as writer:
+            writer.write(cards[0])
+            raise RuntimeError()
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize('content', [b'', b'not a deck file at all, just some text'])
+def test_invalid_file(tmp_path, content):
+    file_path = tmp_path / 'deck.fcdk'
+    file_path.write_bytes(content)
+    with pytest.raises(InvalidDeckFile):
+        BinaryDeckReader(str(file_path))
+
+
+def test_truncated_file(tmp_path, cards):
+    file_path = tmp_path / 'deck.fcdk'
+    write_deck(str(file_path), cards)
+    data = file_path.read_bytes()
+    file_path.write_bytes(data[:len(data) // 2])
+    with pytest.raises(InvalidDeckFile):
+        BinaryDeckReader(str(file_path))
+
+
+def test_corrupted_record_offset(tmp_path, cards):
+    file_path = tmp_path / 'deck.fcdk'
+    write_deck(str(file_path), cards)
+    data = bytearray(file_path.read_bytes())
+    table_offset = HEADER.unpack_from(data)[4]
+    OFFSET.pack_into(data, table_offset, len(data) * 2)
+    file_path.write_bytes(bytes(data))
+    with BinaryDeckReader(str(file_path)) as reader:
+        assert reader[1] == cards[1]
+        with pytest.raises(InvalidDeckFile):
+            reader[0]
+
+
+def test_concurrent_writers_do_not_share_temporary_file(tmp_path, cards):
+    file_path = str(tmp_path / 'deck.fcdk')
+    with BinaryDeckWriter(file_path) as first, BinaryDeckWriter(file_path) as second:
+        first.write_many(cards[:10])
+        second.write_many(cards[10:15])
+    with BinaryDeckReader(file_path) as reader:
+        assert list(reader) == cards[:10]
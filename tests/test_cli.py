@@ -0,0 +1,154 @@
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from cli import export_names, main
+from flashcards.binary_deck import BinaryDeckReader
+from flashcards.deck import Card
+from flashcards.fingerprints import FingerprintIndex
+from flashcards.store import CardStatus, DeckStore
+from settings import DECKS_DB, FINGERPRINTS_DIR
+
+RESPONSES = {
+    'Python': '[{"front": "What is Python?", "back": "A language."}, {"front": "What is pip?", "back": "A tool."}]',
+    'Rust': '[{"front": "What is Rust?", "back": "A language."}, {"front": "What is Cargo?", "back": "A tool."}]',
+}
+
+
+@pytest.fixture
+def notes(tmp_path):
+    paths = []
+    for name, text in (('python.txt', 'Python notes'), ('rust.md', '# Rust\n\nRust notes')):
+        path = tmp_path / name
+        path.write_text(text)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def mock_openai(monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-test')
+    def create(messages, **kwargs):
+        response = MagicMock()
+        response.choices[0].message.content = RESPONSES['Rust' if 'Rust' in messages[-1]['content'] else 'Python']
+        response.usage = None
+        return response
+
+    with patch('flashcards.generator.OpenAI') as mock_openai:
+        mock_openai.return_value.chat.completions.create.side_effect = create
+        yield mock_openai.return_value
+
+
+def _args(tmp_path, *args):
+    return [*args, '--storage-dir', str(tmp_path / 'storage'), '--deck', 'batch', '--workers', '2']
+
+
+def test_generate_and_export(tmp_path, notes, mock_openai, capsys):
+    assert main(_args(tmp_path, 'generate', *notes, '--output-dir', str(tmp_path / 'out'))) == 0
+    assert mock_openai.chat.completions.create.call_count == 2
+    assert 'What is Rust?' in (tmp_path / 'out' / 'rust.txt').read_text()
+
+    assert main(_args(tmp_path, 'ingest', *notes)) == 0
+    assert '2 cards generated' in capsys.readouterr().out
+
+    assert main(_args(tmp_path, 'generate', *notes)) == 0
+    assert mock_openai.chat.completions.create.call_count == 2
+
+    output = str(tmp_path / 'batch.fcdk')
+    assert main(_args(tmp_path, 'export', output, '--format', 'fcdk', '--status', 'new')) == 0
+    with BinaryDeckReader(output) as reader:
+        assert len(reader) == 4
+
+
+def test_generate_reports_failures(tmp_path, notes, mock_openai, capsys):
+    response = MagicMock()
+    response.choices[0].message.content = 'not a list'
+    response.usage = None
+    mock_openai.chat.completions.create.side_effect = None
+    mock_openai.chat.completions.create.return_value = response
+    assert main(_args(tmp_path, 'generate', notes[0])) == 1
+    assert 'Invalid AI response' in capsys.readouterr().err
+
+
+def test_generate_requires_api_key(tmp_path, notes, monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    assert main(_args(tmp_path, 'generate', *notes)) == 2
+
+
+def test_export_txt_replaces_existing_file(tmp_path, notes, mock_openai):
+    assert main(_args(tmp_path, 'generate', notes[0])) == 0
+    output = tmp_path / 'batch.txt'
+    output.write_text('stale content\n')
+    assert main(_args(tmp_path, 'export', str(output), '--format', 'txt')) == 0
+    assert main(_args(tmp_path, 'export', str(output), '--format', 'txt')) == 0
+    text = output.read_text()
+    assert 'stale content' not in text
+    assert text.count('What is Python?') == 1
+
+
+def test_workers_must_be_positive(tmp_path, notes):
+    with pytest.raises(SystemExit):
+        main([*_args(tmp_path, 'ingest', *notes)[:-1], '0'])
+
+
+def test_only_approved_cards_are_known(tmp_path, notes, mock_openai, capsys):
+    assert main(_args(tmp_path, 'generate', notes[0])) == 0
+    assert main(_args(tmp_path, 'generate', notes[0], '--force')) == 0
+    assert '2 cards generated, 0 already known' in capsys.readouterr().out
+
+    index = FingerprintIndex(str(tmp_path / 'storage' / FINGERPRINTS_DIR / 'batch'))
+    index.add([Card(front='What is Python?', back='A language.')])
+    assert main(_args(tmp_path, 'generate', notes[0], '--force')) == 0
+    assert '1 cards generated, 1 already known' in capsys.readouterr().out
+
+
+def test_generate_per_markdown_section(tmp_path, mock_openai, capsys):
+    note = tmp_path / 'languages.md'
+    note.write_text('# Python\n\nPython notes\n\n# Rust\n\nRust notes')
+    assert main(_args(tmp_path, 'generate', str(note))) == 0
+    assert mock_openai.chat.completions.create.call_count == 2
+    assert '4 cards generated' in capsys.readouterr().out
+
+    note.write_text('# Python\n\nPython notes\n\n# Rust\n\nRust notes, edited')
+    assert main(_args(tmp_path, 'ingest', str(note))) == 0
+    assert '1 of 2 sections new' in capsys.readouterr().out
+    assert main(_args(tmp_path, 'generate', str(note))) == 0
+    assert mock_openai.chat.completions.create.call_count == 3
+
+
+def test_export_names_keep_relative_paths(tmp_path):
+    assert export_names([str(tmp_path / 'a' / 'notes.md'), str(tmp_path / 'b' / 'notes.md')]) == {
+        str(tmp_path / 'a' / 'notes.md'): os.path.join('a', 'notes'),
+        str(tmp_path / 'b' / 'notes.md'): os.path.join('b', 'notes'),
+    }
+    with pytest.raises(ValueError):
+        export_names([str(tmp_path / 'notes.md'), str(tmp_path / 'notes.txt')])
+
+
+def test_generate_rejects_colliding_exports(tmp_path, mock_openai, capsys):
+    paths = [tmp_path / 'notes.md', tmp_path / 'notes.txt']
+    for path in paths:
+        path.write_text('Python notes')
+    args = _args(tmp_path, 'generate', *map(str, paths), '--output-dir', str(tmp_path / 'out'))
+    assert main(args) == 2
+    assert 'same file' in capsys.readouterr().err
+    assert mock_openai.chat.completions.create.call_count == 0
+
+
+def test_import_binary_deck(tmp_path, notes, mock_openai, capsys):
+    assert main(_args(tmp_path, 'generate', *notes)) == 0
+    output = str(tmp_path / 'batch.fcdk')
+    assert main(_args(tmp_path, 'export', output, '--format', 'fcdk')) == 0
+    args = ['import', output, '--storage-dir', str(tmp_path / 'storage'), '--deck', 'imported']
+    assert main(args) == 0
+    assert '4 cards imported' in capsys.readouterr().out
+    with DeckStore(str(tmp_path / 'storage' / DECKS_DB)) as deck_store:
+        assert deck_store.count('imported', CardStatus.NEW) == 4
+
+
+def test_import_rejects_truncated_deck(tmp_path, capsys):
+    output = tmp_path / 'broken.fcdk'
+    output.write_bytes(b'FCDK')
+    assert main(_args(tmp_path, 'import', str(output))) == 2
+    assert 'broken.fcdk' in capsys.readouterr().err
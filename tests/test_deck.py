@@ -3,7 +3,7 @@ from unittest.mock import patch
 import pytest
 
 from custom_exceptions import NoCardError
-from flashcards.deck import Card, Deck
+from flashcards.deck import Card, Deck, content_key
 
 VALID_CARD_DATA = {
     'front': 'What is Python?',
@@ -65,3 +65,126 @@ def test_remove_card_not_found(mock_logger):
     with pytest.raises(NoCardError):
         deck.remove_card(card)
     mock_logger.error.assert_called_with(f'Failed to remove card from deck, card (id: {card.card_id}) not found.')
+
+
+def test_deck_get_and_contains():
+    deck = Deck()
+    deck.load_cards(CARDS)
+    assert deck.get(CARDS[1].card_id) is CARDS[1]
+    assert deck.get('missing') is None
+    assert deck.contains(CARDS[0].card_id)
+    assert not deck.contains('missing')
+    assert CARDS[0] in deck
+
+
+def test_deck_keeps_insertion_order():
+    cards = [Card(front=f'Front {i}', back=f'Back {i}') for i in range(5)]
+    deck = Deck()
+    deck.load_cards(cards)
+    deck.remove_card(cards[2])
+    assert list(deck) == [cards[0], cards[1], cards[3], cards[4]]
+    assert len(deck) == 4
+
+
+@patch('flashcards.deck.logger')
+def test_remove_card_with_same_id_but_different_content(mock_logger):
+    deck = Deck()
+    deck.load_cards(CARDS)
+    changed = Card(front='Other', back='Other')
+    changed.card_id = CARDS[0].card_id
+    with pytest.raises(NoCardError):
+        deck.remove_card(changed)
+    assert len(deck) == 2
+
+
+@patch('flashcards.deck.logger')
+def test_remove_by_id(mock_logger):
+    deck = Deck()
+    deck.load_cards(CARDS)
+    assert deck.remove_by_id(CARDS[0].card_id) is CARDS[0]
+    assert deck.cards == [CARDS[1]]
+    with pytest.raises(NoCardError):
+        deck.remove_by_id(CARDS[0].card_id)
+
+
+@patch('flashcards.deck.logger')
+def test_remove_cards_bulk(mock_logger):
+    cards = [Card(front=f'Front {i}', back=f'Back {i}') for i in range(4)]
+    deck = Deck()
+    deck.load_cards(cards)
+    removed = deck.remove_cards([cards[0].card_id, 'missing', cards[3].card_id])
+    assert removed == [cards[0], cards[3]]
+    assert deck.cards == [cards[1], cards[2]]
+    mock_logger.info.assert_called_with('2 cards removed from deck.')
+
+
+def test_card_has_no_instance_dict():
+    card = Card(**VALID_CARD_DATA)
+    assert not hasattr(card, '__dict__')
+
+
+def test_card_random_ids_are_unique():
+    assert Card(**VALID_CARD_DATA).card_id != Card(**VALID_CARD_DATA).card_id
+
+
+def test_card_content_id_is_deterministic():
+    first = Card.from_dict(VALID_CARD_DATA, source='note.md')
+    second = Card.from_dict(VALID_CARD_DATA, source='note.md')
+    other_source = Card.from_dict(VALID_CARD_DATA, source='other.md')
+    assert first.card_id == second.card_id
+    assert first.card_id != other_source.card_id
+
+
+def test_card_restore_keeps_id():
+    card = Card.restore('abc', 'Front', 'Back')
+    assert card.card_id == 'abc'
+    assert card == Card.restore('abc', 'Front', 'Back')
+
+
+def _deck(cards):
+    deck = Deck()
+    deck.load_cards(cards)
+    return deck
+
+
+def test_merge_keeps_order_and_first_card():
+    cards = [Card(front=f'Front {i}', back=f'Back {i}') for i in range(3)]
+    merged = _deck(cards[:2]).merge([cards[2], cards[0]])
+    assert merged.cards == cards
+    regenerated = Card(front='front 1', back='Other back')
+    assert _deck(cards[:2]).merge([regenerated], key=content_key).cards == cards[:2]
+
+
+def test_intersect_and_subtract():
+    cards = [Card(front=f'Front {i}', back=f'Back {i}') for i in range(4)]
+    deck = _deck(cards)
+    rejected = [cards[3], cards[1]]
+    assert deck.intersect(rejected).cards == [cards[1], cards[3]]
+    assert deck.subtract(rejected).cards == [cards[0], cards[2]]
+    assert deck.subtract([Card(front='FRONT 0!', back='x')], key=content_key).cards == cards[1:]
+
+
+def test_diff_by_content():
+    old = [Card(front='What is Python?', back='A language.'),
+           Card(front='What is Rust?', back='A language.'),
+           Card(front='What is Go?', back='A language.')]
+    new = [Card(front='what is python', back='A language.'),
+           Card(front='What is Go?', back='A language by Google.'),
+           Card(front='What is Java?', back='A language.')]
+    diff = _deck(old).diff(new, key=content_key)
+    assert diff.added == [new[2]]
+    assert diff.removed == [old[1]]
+    assert diff.changed == [(old[0], new[0]), (old[2], new[1])]
+    assert diff.unchanged == []
+    assert str(diff) == '1 added, 1 removed, 2 changed, 0 unchanged.'
+
+
+def test_diff_by_id():
+    cards = [Card(front=f'Front {i}', back=f'Back {i}') for i in range(2)]
+    deck = _deck(cards)
+    assert not deck.diff(cards)
+    assert deck.diff(cards).unchanged == cards
+    edited = Card.restore(cards[0].card_id, 'Front 0', 'New back')
+    diff = deck.diff([edited, cards[1]])
+    assert diff.changed == [(cards[0], edited)]
+    assert str(diff) == '0 added, 0 removed, 1 changed, 1 unchanged.'
@@ -0,0 +1,69 @@
+from flashcards.deck import Card
+from flashcards.fingerprints import BloomFilter, FingerprintIndex, fingerprint
+
+
+def test_fingerprint_ignores_case_punctuation_and_spacing():
+    assert fingerprint('What is  Python?') == fingerprint('what is python')
+    assert fingerprint('What is Python?') != fingerprint('What is Rust?')
+
+
+def test_bloom_filter_contains_added_values():
+    bloom = BloomFilter(100)
+    values = [fingerprint(str(i)) for i in range(100)]
+    for value in values:
+        bloom.add(value)
+    assert all(value in bloom for value in values)
+    restored = BloomFilter.from_bytes(bloom.to_bytes())
+    assert all(value in restored for value in values)
+
+
+def test_split_known_cards(tmp_path):
+    index = FingerprintIndex(str(tmp_path / 'user' / 'profile'))
+    assert index.add([Card(front='What is Python?', back='A language.')]) == 1
+    cards = [
+        Card(front='what is python', back='Programming language.'),
+        Card(front='What is Rust?', back='A language.'),
+        Card(front='What is rust', back='Duplicate within batch.'),
+    ]
+    new, known = index.split_known(cards)
+    assert new == [cards[1]]
+    assert known == [cards[0], cards[2]]
+    assert index.classify(cards) == ([cards[1]], [cards[0]], [cards[2]])
+
+
+def test_index_persists_between_instances(tmp_path):
+    base_path = str(tmp_path / 'profile')
+    cards = [Card(front=f'Question {i}', back='Answer') for i in range(50)]
+    assert FingerprintIndex(base_path).add(cards + cards[:10]) == 50
+    index = FingerprintIndex(base_path)
+    assert len(index) == 50
+    assert index.contains('question 7')
+    assert not index.contains('Question 50')
+    assert index.add(cards) == 0
+
+
+def test_index_grows_beyond_bloom_capacity(tmp_path, monkeypatch):
+    monkeypatch.setattr(FingerprintIndex, 'MIN_CAPACITY', 16)
+    index = FingerprintIndex(str(tmp_path / 'profile'))
+    index.add([Card(front=f'Question {i}', back='Answer') for i in range(100)])
+    reopened = FingerprintIndex(str(tmp_path / 'profile'))
+    assert reopened._bloom.capacity >= 100
+    assert all(reopened.contains(f'Question {i}') for i in range(100))
+
+
+def test_rebuild_replaces_content(tmp_path):
+    index = FingerprintIndex(str(tmp_path / 'profile'))
+    index.add([Card(front='Old question', back='Answer')])
+    index.rebuild([Card(front='New question', back='Answer')])
+    assert len(index) == 1
+    assert not FingerprintIndex(str(tmp_path / 'profile')).contains('Old question')
+    assert FingerprintIndex(str(tmp_path / 'profile')).contains('New question')
+
+
+def test_deck_index_is_shared(tmp_path, monkeypatch):
+    monkeypatch.setattr('flashcards.fingerprints.STORAGE_DIR', str(tmp_path))
+    monkeypatch.setattr(FingerprintIndex, '_instances', {})
+    index = FingerprintIndex.for_deck('user/main')
+    index.add([Card(front='What is Python?', back='A language.')])
+    assert FingerprintIndex.for_deck('user/main') is index
+    assert FingerprintIndex.for_deck('user/other') is not index
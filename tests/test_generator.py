@@ -46,7 +46,7 @@ def test_generate_completion_success(openai_client, mock_openai_client):
     ]
     response = openai_client.generate_completion('test_model', messages)
 
-    assert response == 'Test content'
+    assert response.content == 'Test content'
     mock_openai_client.chat.completions.create.assert_called_once_with(
         model='test_model',
         messages=messages,
@@ -0,0 +1,104 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from flashcards.generator import AIClient, CardsGenerator, Completion
+from flashcards.history import SECONDS_PER_DAY, QueryHistory, QueryOutcome
+
+USAGE = {'prompt_tokens': 100, 'completion_tokens': 50, 'total_tokens': 150}
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = QueryHistory(str(tmp_path / 'queries.sqlite3'), retention_days=30, responses_days=7)
+    yield history
+    history.close()
+
+
+def test_record_and_read_response(history):
+    query_id = history.record('gpt-4', 'prompt', 'content', '[{"front": "Q", "back": "A"}]', 1.5,
+                              QueryOutcome.OK, USAGE)
+    assert history.get_response(query_id) == '[{"front": "Q", "back": "A"}]'
+    assert history.slowest()[0].total_tokens == 150
+
+
+def test_slowest_and_stats_by_model(history):
+    history.record('gpt-4', 'p', 'c', 'r', 3.0, QueryOutcome.OK, USAGE)
+    history.record('gpt-4', 'p', 'c', None, 1.0, QueryOutcome.API_ERROR, error='timeout')
+    query_id = history.record('gpt-3.5-turbo', 'p', 'c', 'r', 0.5, QueryOutcome.OK, USAGE)
+    history.set_outcome(query_id, QueryOutcome.PARSE_ERROR, 'invalid syntax')
+    history.record('gpt-3.5-turbo', 'p', 'c', 'r', 0.7, QueryOutcome.OK)
+    assert [query.latency for query in history.slowest(2)] == [3.0, 1.0]
+    stats = {entry.model: entry for entry in history.stats_by_model()}
+    assert stats['gpt-4'].failure_rate == 0.5
+    assert stats['gpt-4'].avg_latency == 2.0
+    assert stats['gpt-3.5-turbo'].failures == 1
+    assert stats['gpt-3.5-turbo'].total_tokens == 150
+
+
+def test_retention(history):
+    now = 100 * SECONDS_PER_DAY
+    old = history.record('gpt-4', 'p', 'c', 'old', 1.0, QueryOutcome.OK, created_at=now - 40 * SECONDS_PER_DAY)
+    trimmed = history.record('gpt-4', 'p', 'c', 'trimmed', 1.0, QueryOutcome.OK,
+                             created_at=now - 10 * SECONDS_PER_DAY)
+    recent = history.record('gpt-4', 'p', 'c', 'recent', 1.0, QueryOutcome.OK, created_at=now)
+    assert history.apply_retention(now) == 1
+    assert len(history) == 2
+    assert history.get_response(old) is None
+    assert history.get_response(trimmed) is None
+    assert history.get_response(recent) == 'recent'
+
+
+def test_generator_records_queries(history):
+    client = MagicMock()
+    client.generate_completion.return_value = Completion('cards', USAGE)
+    generator = CardsGenerator(client, history)
+    generator.generate_flashcards('gpt-4', 'prompt', 'content')
+    assert history.get_response(generator.last_query_id) == 'cards'
+    client.generate_completion.side_effect = Exception('API call failed')
+    with pytest.raises(Exception):
+        generator.generate_flashcards('gpt-4', 'prompt', 'content')
+    assert history.stats_by_model()[0].failures == 1
+
+
+def test_retention_if_due_runs_once_per_interval(history):
+    now = 100 * SECONDS_PER_DAY
+    history.record('gpt-4', 'p', 'c', 'old', 1.0, QueryOutcome.OK, created_at=now - 40 * SECONDS_PER_DAY)
+    assert history.apply_retention_if_due(now) == 1
+    history.record('gpt-4', 'p', 'c', 'old', 1.0, QueryOutcome.OK, created_at=now - 40 * SECONDS_PER_DAY)
+    assert history.apply_retention_if_due(now + SECONDS_PER_DAY / 2) is None
+    assert len(history) == 1
+    assert history.apply_retention_if_due(now + SECONDS_PER_DAY) == 1
+
+
+def test_history_failure_is_not_recorded_as_api_error():
+    client = MagicMock()
+    client.generate_completion.return_value = Completion('cards')
+    history = MagicMock()
+    history.record.side_effect = OSError('disk full')
+    with pytest.raises(OSError):
+        CardsGenerator(client, history).generate_flashcards('gpt-4', 'prompt', 'content')
+    history.record.assert_called_once()
+    assert history.record.call_args.args[5] == QueryOutcome.OK
+
+
+def test_concurrent_requests_record_their_own_usage(history):
+    class FakeClient(AIClient):
+        def generate_completion(self, model, messages):
+            tokens = len(messages[-1]['content'])
+            time.sleep(0.001)
+            return Completion('cards', {'prompt_tokens': tokens, 'completion_tokens': 0, 'total_tokens': tokens})
+
+    client = FakeClient()
+
+    def generate(size):
+        generator = CardsGenerator(client, history)
+        generator.generate_flashcards('gpt-4', 'p', 'x' * size)
+        return generator.last_query_id
+
+    with ThreadPoolExecutor(4) as executor:
+        query_ids = dict(zip(executor.map(generate, range(1, 41)), range(1, 41)))
+    rows = history.connection.execute('SELECT query_id, total_tokens FROM queries').fetchall()
+    assert all(total_tokens == len('p\n\n') + query_ids[query_id] for query_id, total_tokens in rows)
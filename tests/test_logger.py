@@ -0,0 +1,57 @@
+import json
+import logging
+import logging.handlers
+
+import pytest
+
+from logger import logger, queries_logger, setup_logging, shutdown_logging
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    yield tmp_path
+    shutdown_logging()
+
+
+def _read(path):
+    with open(path, encoding='utf-8') as file:
+        return file.read()
+
+
+def test_import_does_not_attach_handlers():
+    assert not any(isinstance(handler, logging.handlers.QueueHandler) for handler in logger.handlers)
+
+
+def test_records_are_routed_to_files(log_dir):
+    setup_logging(str(log_dir))
+    logger.info('3 valid cards loaded into deck.')
+    logger.error('Generating failed.')
+    queries_logger.debug('AI model: gpt-4')
+    logger.debug('Not logged anywhere.')
+    shutdown_logging()
+    monitoring = _read(log_dir / 'app_monitoring.log')
+    assert '3 valid cards loaded into deck.' in monitoring and 'Generating failed.' in monitoring
+    assert 'Generating failed.' in _read(log_dir / 'error_details.log')
+    assert '3 valid cards' not in _read(log_dir / 'error_details.log')
+    queries = _read(log_dir / 'queries_history.log')
+    assert 'AI model: gpt-4' in queries and 'Not logged' not in queries
+    assert not logger.handlers
+
+
+def test_json_lines_output(log_dir):
+    setup_logging(str(log_dir), json_lines=True)
+    logger.warning('Data file not found.')
+    shutdown_logging()
+    entry = json.loads(_read(log_dir / 'app_monitoring.log').splitlines()[0])
+    assert entry['level'] == 'WARNING'
+    assert entry['logger'] == 'flashcards_generator'
+    assert entry['message'] == 'Data file not found.'
+
+
+def test_size_based_rotation(log_dir):
+    setup_logging(str(log_dir), max_bytes=200, backup_count=2)
+    for number in range(20):
+        logger.info(f'Message number {number}')
+    shutdown_logging()
+    assert (log_dir / 'app_monitoring.log.1').exists()
+    assert not (log_dir / 'app_monitoring.log.3').exists()
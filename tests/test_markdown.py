@@ -0,0 +1,96 @@
+from notes.markdown import NoteChunk, chunk_sections, parse_markdown
+from notes.reader import MarkdownReader, TxtReader
+
+NOTE = '''Intro paragraph.
+
+# Python
+Python is a language.
+
+- dynamic typing
+- garbage collected
+  with reference counting
+
+## Code
+```python
+# not a heading
+print('hi')
+```
+
+# Rust
+Rust is a language.
+'''
+
+
+def test_parse_markdown_builds_section_tree():
+    root = parse_markdown(NOTE)
+    assert [b.text for b in root.blocks] == ['Intro paragraph.']
+    assert [s.title for s in root.children] == ['Python', 'Rust']
+    python = root.children[0]
+    assert [s.title for s in python.children] == ['Code']
+    assert python.children[0].level == 2
+
+
+def test_parse_markdown_blocks():
+    python = parse_markdown(NOTE).children[0]
+    assert [b.kind for b in python.blocks] == ['paragraph', 'list']
+    assert python.blocks[1].text == '- dynamic typing\n- garbage collected\n  with reference counting'
+
+
+def test_parse_markdown_keeps_code_fences_verbatim():
+    code = parse_markdown(NOTE).children[0].children[0]
+    assert len(code.blocks) == 1
+    assert code.blocks[0].kind == 'code'
+    assert '# not a heading' in code.blocks[0].text
+    assert code.children == []
+
+
+def test_section_digest_changes_only_for_edited_section():
+    before = {s.title: s.digest for s in parse_markdown(NOTE).walk()}
+    after = {s.title: s.digest for s in parse_markdown(NOTE.replace('Rust is', 'Rust was')).walk()}
+    changed = [title for title in before if before[title] != after[title]]
+    assert changed == ['Rust']
+
+
+def test_markdown_reader_read_sections(tmp_path):
+    note = tmp_path / 'note.md'
+    note.write_text(NOTE)
+    reader = MarkdownReader()
+    assert reader.read_source(str(note)) == NOTE
+    assert [s.title for s in reader.read_sections(str(note)).walk()] == ['', 'Python', 'Code', 'Rust']
+
+
+def test_parse_markdown_setext_headings():
+    root = parse_markdown('Intro.\n\nPython\n======\nA language.\n\nTyping\nrules\n------\nDynamic.\n\n---\n')
+    python = root.children[0]
+    assert (python.title, python.level) == ('Python', 1)
+    assert [b.text for b in python.blocks] == ['A language.']
+    assert [(s.title, s.level) for s in python.children] == [('Typing rules', 2)]
+    assert [b.text for b in python.children[0].blocks] == ['Dynamic.', '---']
+
+
+def test_chunk_sections_keeps_headings_path():
+    chunks = chunk_sections(parse_markdown(NOTE))
+    assert [chunk.title for chunk in chunks] == ['', 'Python', 'Python > Code', 'Rust']
+    assert chunks[2].text.startswith('# Python\n\n## Code\n\n```python')
+    assert 'Python is a language.' not in chunks[2].text
+
+
+def test_chunk_sections_splits_long_sections_between_blocks():
+    note = '# Long\n\n' + '\n\n'.join(f'Paragraph {i} ' + 'x' * 40 for i in range(10))
+    chunks = chunk_sections(parse_markdown(note), max_chars=120)
+    assert len(chunks) == 5
+    assert all(chunk.text.startswith('# Long\n\n') for chunk in chunks)
+    assert sum(chunk.text.count('Paragraph') for chunk in chunks) == 10
+
+
+def test_only_edited_section_chunk_changes():
+    before = [chunk.digest for chunk in chunk_sections(parse_markdown(NOTE))]
+    after = [chunk.digest for chunk in chunk_sections(parse_markdown(NOTE.replace('Rust is', 'Rust was')))]
+    assert before[:3] == after[:3]
+    assert before[3] != after[3]
+
+
+def test_reader_chunks():
+    assert TxtReader().chunks('Plain text.') == [NoteChunk('', 'Plain text.')]
+    assert len(MarkdownReader().chunks(NOTE)) == 4
+    assert MarkdownReader().chunks('') == [NoteChunk('', '')]
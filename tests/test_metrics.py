@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from metrics import MetricsRegistry
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry(enabled=True)
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry()
+    registry.inc('calls')
+    with registry.span('action', action='login'):
+        pass
+    assert registry.timed('action')(lambda value: value * 2)(21) == 42
+    assert registry.to_dict() == {'counters': [], 'histograms': []}
+
+
+def test_span_records_duration_and_errors(registry):
+    with registry.span('action', action='login'):
+        pass
+    with pytest.raises(ValueError):
+        with registry.span('action', action='login'):
+            raise ValueError
+    summary = registry.to_dict()
+    assert summary['counters'] == [{'name': 'action_errors', 'labels': {'action': 'login'}, 'value': 1}]
+    histogram, = summary['histograms']
+    assert histogram['name'] == 'action_seconds'
+    assert histogram['count'] == 2
+    assert histogram['buckets']['+Inf'] == 2
+
+
+def test_timed_decorator(registry):
+    @registry.timed('export', format='txt')
+    def export(value):
+        return value
+
+    assert export(1) == 1
+    assert export(2) == 2
+    assert registry.to_dict()['histograms'][0]['count'] == 2
+
+
+def test_prometheus_format(registry):
+    registry.inc('note_read_characters', 120, reader='txt')
+    registry.observe('ai_request_seconds', 0.3, model='gpt-4')
+    registry.observe('ai_request_seconds', 4.0, model='gpt-4')
+    lines = registry.to_prometheus().splitlines()
+    assert '# TYPE flashcards_note_read_characters_total counter' in lines
+    assert 'flashcards_note_read_characters_total{reader="txt"} 120' in lines
+    assert '# TYPE flashcards_ai_request_seconds histogram' in lines
+    assert 'flashcards_ai_request_seconds_bucket{model="gpt-4",le="0.25"} 0' in lines
+    assert 'flashcards_ai_request_seconds_bucket{model="gpt-4",le="0.5"} 1' in lines
+    assert 'flashcards_ai_request_seconds_bucket{model="gpt-4",le="+Inf"} 2' in lines
+    assert 'flashcards_ai_request_seconds_sum{model="gpt-4"} 4.3' in lines
+    assert 'flashcards_ai_request_seconds_count{model="gpt-4"} 2' in lines
+
+
+def test_label_values_are_escaped(registry):
+    registry.inc('calls', path='C:\\notes\\"a"')
+    assert 'flashcards_calls_total{path="C:\\\\notes\\\\\\"a\\""} 1' in registry.to_prometheus()
+
+
+def test_dump_by_file_extension(registry, tmp_path):
+    registry.inc('calls')
+    registry.dump(str(tmp_path / 'metrics.json'))
+    registry.dump(str(tmp_path / 'metrics.prom'))
+    assert json.loads((tmp_path / 'metrics.json').read_text())['counters'][0]['value'] == 1
+    assert 'flashcards_calls_total 1' in (tmp_path / 'metrics.prom').read_text()
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+from profiling import MODES, Profiler, format_diff, format_run, load_run, modes_from_env, parse_modes
+
+
+def busy(n):
+    return sum(i * i for i in range(n))
+
+
+def test_parse_modes():
+    assert parse_modes(None) == frozenset()
+    assert parse_modes('0') == frozenset()
+    assert parse_modes('1') == MODES
+    assert parse_modes('cpu, memory') == MODES
+    assert parse_modes('memory') == {'memory'}
+    with pytest.raises(ValueError):
+        parse_modes('gpu')
+
+
+def test_disabled_profiler_writes_nothing(tmp_path):
+    profiler = Profiler(output_dir=str(tmp_path))
+    with profiler.profile('login'):
+        busy(100)
+    assert os.listdir(tmp_path) == []
+
+
+def test_profile_writes_report(tmp_path):
+    profiler = Profiler(MODES, str(tmp_path), top=10)
+    with profiler.profile('generate/cards'):
+        data = [bytes(1000) for _ in range(100)]
+        busy(10_000)
+    assert data
+    assert sorted(os.listdir(profiler.run_dir)) == ['001-generate_cards.json', '001-generate_cards.prof']
+    with open(os.path.join(profiler.run_dir, '001-generate_cards.json')) as file:
+        report = json.load(file)
+    assert report['action'] == 'generate/cards'
+    assert report['peak_bytes'] >= 100_000
+    assert any('busy' in function['function'] for function in report['functions'])
+    assert any('test_profiling.py' in allocation['site'] for allocation in report['allocations'])
+
+
+def test_nested_blocks_are_part_of_outer_report(tmp_path):
+    profiler = Profiler({'cpu'}, str(tmp_path))
+    with profiler.profile('menu'):
+        with profiler.profile('login'):
+            busy(100)
+    with profiler.profile('login'):
+        busy(100)
+    assert sorted(os.listdir(profiler.run_dir)) == ['001-menu.json', '001-menu.prof', '002-login.json', '002-login.prof']
+
+
+def test_show_and_diff_runs(tmp_path):
+    runs = []
+    for name, n in (('a', 1000), ('b', 100_000)):
+        profiler = Profiler({'cpu'}, str(tmp_path / name))
+        for _ in range(2):
+            with profiler.profile('generate'):
+                busy(n)
+        runs.append(load_run(profiler.run_dir))
+    assert runs[0]['generate'].calls == 2
+    assert 'generate' in format_run(runs[0], 3)
+    diff = format_diff(runs[0], runs[1], 3).splitlines()
+    assert diff[1].startswith('generate')
+    assert any('busy' in line and '+' in line for line in diff[2:])
+
+
+def test_invalid_env_modes_disable_profiling(monkeypatch):
+    monkeypatch.setenv('FLASHCARDS_PROFILE', 'cpu,mem')
+    assert modes_from_env() == frozenset()
+    monkeypatch.setenv('FLASHCARDS_PROFILE', 'cpu')
+    assert modes_from_env() == {'cpu'}
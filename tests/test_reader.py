@@ -0,0 +1,115 @@
+import json
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from notes.api import ResponseCache
+from notes.notion import NotionService, extract_page_id
+from notes.reader import ViaAPIReader
+
+PAGE_ID = '0123456789abcdef0123456789abcdef'
+
+
+def _block(block_id, text, has_children=False):
+    return {
+        'id': block_id,
+        'type': 'paragraph',
+        'has_children': has_children,
+        'last_edited_time': '2024-01-01T00:00:00.000Z',
+        'paragraph': {'rich_text': [{'plain_text': text}]},
+    }
+
+
+PAGE = {
+    'id': PAGE_ID,
+    'last_edited_time': '2024-01-01T00:00:00.000Z',
+    'properties': {'Name': {'type': 'title', 'title': [{'plain_text': 'Lecture 1'}]}},
+}
+
+CHILDREN = {
+    PAGE_ID: [[_block('b1', 'First'), _block('b2', 'Second', has_children=True)], [_block('b3', 'Third')]],
+    'b2': [[_block('b2-1', 'Nested')]],
+}
+
+
+class FakeNotionHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        self.requests.append(self.path)
+        parts = url.path.strip('/').split('/')
+        if parts[:2] == ['v1', 'pages']:
+            self._send(PAGE)
+        elif parts[:2] == ['v1', 'blocks'] and parts[3] == 'children':
+            pages = CHILDREN[parts[2]]
+            index = int(query.get('start_cursor', ['0'])[0])
+            has_more = index + 1 < len(pages)
+            self._send({'results': pages[index], 'has_more': has_more,
+                        'next_cursor': str(index + 1) if has_more else None})
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def _send(self, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def notion_server():
+    FakeNotionHandler.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeNotionHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/v1'
+    server.shutdown()
+    server.server_close()
+
+
+def test_extract_page_id_from_url():
+    url = 'https://www.notion.so/workspace/Lecture-1-0123456789abcdef0123456789abcdef?pvs=4'
+    assert extract_page_id(url) == PAGE_ID
+
+
+def test_extract_page_id_invalid():
+    with pytest.raises(ValueError):
+        extract_page_id('not-a-page')
+
+
+def test_read_source_follows_pagination_and_nesting(notion_server):
+    reader = ViaAPIReader(NotionService('token', base_url=notion_server), max_workers=2)
+    content = reader.read_source(PAGE_ID)
+    assert content == 'Lecture 1\nFirst\nSecond\n  Nested\nThird'
+
+
+def test_read_source_uses_cache_for_unchanged_pages(notion_server, tmp_path):
+    service = NotionService('token', cache=ResponseCache(str(tmp_path)), base_url=notion_server)
+    first = ViaAPIReader(service).read_source(PAGE_ID)
+    requests_after_first_read = len(FakeNotionHandler.requests)
+
+    second = ViaAPIReader(service).read_source(PAGE_ID)
+
+    assert first == second
+    assert requests_after_first_read == 4
+    assert FakeNotionHandler.requests[requests_after_first_read:] == [f'/v1/pages/{PAGE_ID}']
+
+
+def test_read_source_refetches_page_after_nested_edit(notion_server, tmp_path, monkeypatch):
+    service = NotionService('token', cache=ResponseCache(str(tmp_path)), base_url=notion_server)
+    ViaAPIReader(service).read_source(PAGE_ID)
+    # Notion updates only the edited block and the page, not the edited block's parent.
+    edited = {**_block('b2-1', 'Edited'), 'last_edited_time': '2024-02-01T00:00:00.000Z'}
+    monkeypatch.setitem(CHILDREN, 'b2', [[edited]])
+    monkeypatch.setitem(PAGE, 'last_edited_time', '2024-02-01T00:00:00.000Z')
+
+    assert ViaAPIReader(service).read_source(PAGE_ID) == 'Lecture 1\nFirst\nSecond\n  Edited\nThird'
@@ -0,0 +1,268 @@
+import json
+import os
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from custom_exceptions import InvalidPassword, UserAlreadyExists
+from profiles.manager import AuthenticationManager, UserManager
+from profiles.migrate import main
+from profiles.repository import JSONStorage, SQLiteStorage, StorageInterface, open_storage
+from profiles.security import Bcrypt
+from profiles.user_profile import Profile
+
+USERS = {'john': {'user_name': 'john', 'profiles': []}}
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return JSONStorage(str(tmp_path / 'storage' / 'users.json'))
+
+
+def test_save_and_load(storage):
+    storage.save_data(USERS)
+    assert storage.load_data() == USERS
+    assert [name for name in os.listdir(os.path.dirname(storage.file_path)) if name.endswith('.tmp')] == []
+
+
+def test_load_missing_file_returns_empty_dict(storage):
+    assert storage.load_data() == {}
+
+
+def test_compact_json(tmp_path):
+    storage = JSONStorage(str(tmp_path / 'users.json'), indent=None)
+    storage.save_data(USERS)
+    with open(storage.file_path) as file:
+        assert file.read() == json.dumps(USERS, separators=(',', ':'))
+
+
+def test_usernames_are_listed_from_index(storage, monkeypatch):
+    storage.save_data({**USERS, 'jane': {'user_name': 'jane', 'profiles': []}})
+    reopened = JSONStorage(storage.file_path)
+    monkeypatch.setattr(JSONStorage, '_read', staticmethod(MagicMock(side_effect=AssertionError('file parsed'))))
+    assert reopened.load_usernames() == ['john', 'jane']
+
+
+def test_outdated_usernames_index_is_rebuilt(storage):
+    storage.save_data(USERS)
+    with open(storage.file_path, 'w') as file:
+        json.dump({'jane': {'user_name': 'jane', 'profiles': []}, 'mark': {'user_name': 'mark', 'profiles': []}}, file)
+    assert JSONStorage(storage.file_path).load_usernames() == ['jane', 'mark']
+    os.remove(storage.file_path + '.names')
+    assert JSONStorage(storage.file_path).load_usernames() == ['jane', 'mark']
+    with open(storage.file_path + '.names') as file:
+        assert json.load(file)['usernames'] == ['jane', 'mark']
+
+
+def test_saves_keep_rolling_backups(storage):
+    for number in range(5):
+        storage.save_data({'version': number})
+    assert storage.load_data() == {'version': 4}
+    for backup in range(1, 4):
+        with open(storage.backup_path(backup)) as file:
+            assert json.load(file) == {'version': 4 - backup}
+    assert not os.path.exists(storage.backup_path(4))
+
+
+def test_corrupted_file_is_recovered_from_backup(storage, capsys):
+    storage.save_data({'version': 1})
+    storage.save_data({'version': 2})
+    with open(storage.file_path, 'w') as file:
+        file.write('{"version": ')
+    assert storage.load_data() == {'version': 1}
+    assert 'corrupted' in capsys.readouterr().out
+
+
+def test_missing_file_is_recovered_from_backup(storage):
+    storage.save_data({'version': 1})
+    storage.save_data({'version': 2})
+    os.remove(storage.file_path)
+    assert storage.load_data() == {'version': 1}
+
+
+def test_corrupted_backups_are_skipped(storage):
+    for number in range(3):
+        storage.save_data({'version': number})
+    for path in (storage.file_path, storage.backup_path(1)):
+        with open(path, 'w') as file:
+            file.write('not json')
+    assert storage.load_data() == {'version': 0}
+
+
+USER_WITH_PROFILES = {
+    'user_name': 'jane',
+    'encrypted_password': 'hash',
+    'profiles': [
+        {'profile_name': 'main', 'default_ai': 'OpenAI',
+         'credentials': [{'credentials_type': 'AI', 'service_name': 'OpenAI', 'gpt_model': 'gpt-4'}]},
+        {'profile_name': 'work', 'default_ai': None, 'credentials': []},
+    ]
+}
+
+
+@pytest.fixture
+def sqlite_storage(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / 'users.sqlite3'))
+    yield storage
+    storage.close()
+
+
+def test_sqlite_save_and_load(sqlite_storage):
+    users = {'jane': USER_WITH_PROFILES, 'john': {'user_name': 'john', 'encrypted_password': 'x', 'profiles': []}}
+    sqlite_storage.save_data(users)
+    assert sqlite_storage.load_data() == users
+    sqlite_storage.save_data({'john': users['john']})
+    assert sqlite_storage.load_data() == {'john': users['john']}
+    assert sqlite_storage.connection.execute('SELECT COUNT(*) FROM profiles').fetchone()[0] == 0
+
+
+def test_sqlite_update_data_touches_only_changed_users(sqlite_storage):
+    sqlite_storage.save_data({'jane': USER_WITH_PROFILES, 'john': USERS['john'] | {'encrypted_password': 'x'}})
+    changed = {**USER_WITH_PROFILES, 'profiles': list(reversed(USER_WITH_PROFILES['profiles']))[:1]}
+    sqlite_storage.update_data({'jane': changed}, removed=['john'])
+    assert sqlite_storage.load_data() == {'jane': changed}
+
+
+def test_migrate_json_to_sqlite(tmp_path):
+    source = JSONStorage(str(tmp_path / 'users.json'))
+    source.save_data({'jane': USER_WITH_PROFILES})
+    target_path = str(tmp_path / 'users.sqlite3')
+    main(['--source', source.file_path, '--target', target_path])
+    target = open_storage(target_path)
+    assert isinstance(target, SQLiteStorage)
+    assert target.load_data() == {'jane': USER_WITH_PROFILES}
+    target.close()
+
+
+def test_user_manager_stores_only_changed_users():
+    storage = MagicMock(spec=StorageInterface)
+    storage.load_usernames.return_value = ['jane']
+    storage.load_user.return_value = USER_WITH_PROFILES
+    user_manager = UserManager(MagicMock(), storage)
+    user_manager.save_users()
+    storage.update_data.assert_not_called()
+    user_manager.get_user('jane').remove_profile('work')
+    user_manager.save_users()
+    storage.update_data.assert_called_once_with({'jane': user_manager.get_user('jane').as_dict()}, [])
+    user_manager.remove_user('jane')
+    storage.update_data.assert_called_with({}, ['jane'])
+
+
+def test_users_are_loaded_lazily(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / 'users.sqlite3'))
+    storage.save_data({'jane': USER_WITH_PROFILES, 'john': {'user_name': 'john', 'encrypted_password': 'x'}})
+    user_manager = UserManager(MagicMock(), storage)
+    assert list(user_manager.users) == ['jane', 'john']
+    assert user_manager.user_exists('john')
+    assert list(user_manager.users.loaded()) == []
+    assert user_manager.get_user('jane').get_profile('main').default_ai == 'OpenAI'
+    assert [user.user_name for user in user_manager.users.loaded()] == ['jane']
+    with pytest.raises(KeyError):
+        user_manager.users['missing']
+    storage.close()
+
+
+def test_removed_and_added_again_user_is_stored(tmp_path):
+    storage = JSONStorage(str(tmp_path / 'users.json'))
+    storage.save_data({'jane': USER_WITH_PROFILES})
+    user_manager = UserManager(MagicMock(encrypt=MagicMock(return_value='new hash')), storage)
+    user_manager.remove_user('jane')
+    user_manager.add_user('jane', 'password')
+    assert JSONStorage(storage.file_path).load_data()['jane']['encrypted_password'] == 'new hash'
+
+
+def _empty_storage():
+    storage = MagicMock(spec=StorageInterface)
+    storage.load_usernames.return_value = []
+    return storage
+
+
+def test_batch_coalesces_saves():
+    storage = _empty_storage()
+    user_manager = UserManager(MagicMock(encrypt=MagicMock(return_value='hash')), storage)
+    with user_manager.batch():
+        for number in range(500):
+            user_manager.add_user(f'user{number}', 'password')
+        with user_manager.batch():
+            user_manager.remove_user('user0')
+        storage.update_data.assert_not_called()
+    storage.update_data.assert_called_once()
+    changed, removed = storage.update_data.call_args.args
+    assert len(changed) == 499 and removed == ['user0']
+
+
+def test_delayed_saves_are_flushed_once():
+    storage = _empty_storage()
+    user_manager = UserManager(MagicMock(encrypt=MagicMock(return_value='hash')), storage, save_delay=60)
+    user_manager.add_user('jane', 'password')
+    user_manager.add_user('john', 'password')
+    storage.update_data.assert_not_called()
+    user_manager.flush()
+    storage.update_data.assert_called_once()
+    assert set(storage.update_data.call_args.args[0]) == {'jane', 'john'}
+    user_manager.flush()
+    storage.update_data.assert_called_once()
+
+
+def test_delayed_save_runs_in_background():
+    storage = _empty_storage()
+    saved = threading.Event()
+    storage.update_data.side_effect = lambda *args: saved.set()
+    user_manager = UserManager(MagicMock(encrypt=MagicMock(return_value='hash')), storage, save_delay=0.01)
+    user_manager.add_user('jane', 'password')
+    assert saved.wait(5)
+
+
+def test_delayed_save_writes_changes_collected_on_save():
+    storage = _empty_storage()
+    written = []
+    saved = threading.Event()
+    storage.update_data.side_effect = lambda changed, removed: (written.append(changed), saved.set())
+    user_manager = UserManager(MagicMock(encrypt=MagicMock(return_value='hash')), storage, save_delay=0.05)
+    user_manager.add_user('jane', 'password')
+    # Changed after the save request, without requesting another save.
+    user_manager.get_user('jane').add_profile(Profile('other'))
+    assert saved.wait(5)
+    assert [profile['profile_name'] for profile in written[0]['jane']['profiles']] == ['main']
+    user_manager.flush()
+    assert [profile['profile_name'] for profile in written[1]['jane']['profiles']] == ['main', 'other']
+
+
+def test_failed_write_keeps_changes():
+    storage = _empty_storage()
+    storage.update_data.side_effect = [OSError('disk full'), None]
+    user_manager = UserManager(MagicMock(encrypt=MagicMock(return_value='hash')), storage)
+    with pytest.raises(OSError):
+        user_manager.add_user('jane', 'password')
+    user_manager.flush()
+    assert storage.update_data.call_count == 2
+    assert set(storage.update_data.call_args.args[0]) == {'jane'}
+    user_manager.flush()
+    assert storage.update_data.call_count == 2
+
+
+def test_add_users_hashes_in_parallel_and_saves_once():
+    storage = _empty_storage()
+    user_manager = UserManager(Bcrypt(rounds=4), storage)
+    user_manager.add_users([(f'user{number}', f'password{number}') for number in range(20)])
+    storage.update_data.assert_called_once()
+    assert user_manager.encryption_strategy.check_encrypted('password7', user_manager.get_user('user7').encrypted_password)
+    with pytest.raises(UserAlreadyExists):
+        user_manager.add_users([('new', 'password'), ('user1', 'password')])
+    assert not user_manager.user_exists('new')
+
+
+def test_login_rehashes_outdated_password():
+    storage = _empty_storage()
+    user_manager = UserManager(Bcrypt(rounds=4), storage)
+    user_manager.add_user('jane', 'password')
+    user_manager.encryption_strategy = Bcrypt(rounds=5)
+    auth_manager = AuthenticationManager(user_manager)
+    auth_manager.login_user('jane', 'password')
+    user = user_manager.get_user('jane')
+    assert user.is_logged_in
+    assert user.encrypted_password.startswith('$2b$05$')
+    assert storage.update_data.call_count == 2
+    with pytest.raises(InvalidPassword):
+        auth_manager.login_user('jane', 'wrong')
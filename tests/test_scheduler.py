@@ -0,0 +1,73 @@
+import pytest
+
+from flashcards.deck import Card
+from flashcards.scheduler import SECONDS_PER_DAY, ReviewState, sm2
+from flashcards.store import CardStatus, DeckStore
+
+NOW = 1_700_000_000.0
+
+
+def test_sm2_intervals_grow_on_good_recall():
+    state = ReviewState(card_id='a', due=NOW)
+    state = sm2(state, 5, NOW)
+    assert state.interval == 1
+    state = sm2(state, 5, NOW)
+    assert state.interval == 6
+    state = sm2(state, 4, NOW)
+    assert state.interval == round(6 * 2.7)
+    assert state.due == NOW + state.interval * SECONDS_PER_DAY
+
+
+def test_sm2_lapse_resets_repetitions_and_keeps_ease():
+    state = ReviewState(card_id='a', due=NOW, interval=15, ease=2.2, repetitions=3)
+    state = sm2(state, 1, NOW)
+    assert state.repetitions == 0
+    assert state.interval == 1
+    assert state.lapses == 1
+    assert state.ease == 2.2
+    assert state.due == NOW + SECONDS_PER_DAY
+
+
+def test_sm2_invalid_grade():
+    with pytest.raises(ValueError):
+        sm2(ReviewState(card_id='a', due=NOW), 6, NOW)
+
+
+def test_review_states_persistence(tmp_path):
+    cards = [Card(front=f'Front {i}', back=f'Back {i}') for i in range(3)]
+    with DeckStore(str(tmp_path / 'decks.sqlite3')) as store:
+        store.add_cards('user/main', cards)
+        store.record_reviews('user/main', {cards[0].card_id: CardStatus.APPROVED,
+                                           cards[1].card_id: CardStatus.REJECTED}, now=NOW)
+        assert store.due_card_ids('user/main', NOW) == [cards[0].card_id]
+
+        [state] = store.load_review_states('user/main')
+        store.save_review_states('user/main', [sm2(state, 5, NOW)])
+        assert store.due_card_ids('user/main', NOW) == []
+        assert store.due_card_ids('user/main', NOW + SECONDS_PER_DAY) == [cards[0].card_id]
+
+
+def test_due_review_states_are_paged(tmp_path):
+    cards = [Card(front=f'Front {i}', back=f'Back {i}') for i in range(5)]
+    with DeckStore(str(tmp_path / 'decks.sqlite3')) as store:
+        store.add_cards('user/main', cards)
+        store.record_reviews('user/main', {card.card_id: CardStatus.APPROVED for card in cards}, now=NOW)
+        page = store.due_review_states('user/main', NOW, limit=2)
+        assert len(page) == 2
+        store.save_review_states('user/main', [sm2(state, 4, NOW) for state in page])
+        rest = store.due_review_states('user/main', NOW, limit=10)
+        assert len(rest) == 3
+        assert not {state.card_id for state in page} & {state.card_id for state in rest}
+
+
+def test_bulk_reschedule(tmp_path):
+    cards = [Card(front=f'Front {i}', back=f'Back {i}') for i in range(10)]
+    with DeckStore(str(tmp_path / 'decks.sqlite3')) as store:
+        store.add_cards('user/main', cards)
+        store.record_reviews('user/main', {card.card_id: CardStatus.APPROVED for card in cards}, now=NOW)
+        ids = [cards[1].card_id, cards[2].card_id, 'missing']
+        assert store.reschedule('user/main', ids, delay=SECONDS_PER_DAY) == 2
+        assert len(store.due_card_ids('user/main', NOW, limit=100)) == 8
+        assert store.reschedule('user/main', due=NOW + 5) == 10
+        assert store.due_card_ids('user/main', NOW) == []
+        assert len(store.due_card_ids('user/main', NOW + 5, limit=100)) == 10
@@ -0,0 +1,6 @@
+from flashcards.search import build_match_query
+
+
+def test_build_match_query_quotes_words():
+    assert build_match_query('python "AND" OR*') == '"python" "AND" "OR"'
+    assert build_match_query('?!') == ''
@@ -0,0 +1,128 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from custom_exceptions import VaultError
+from profiles.secret_backends import EncryptedFileVault, SecretsBackend
+from profiles.security import Bcrypt, SecretCache, SensitiveDataManager, calibrate_bcrypt_rounds
+
+
+@pytest.fixture(autouse=True)
+def mock_backend():
+    backend = MagicMock(spec=SecretsBackend)
+    with patch.object(SensitiveDataManager, '_backend', backend):
+        SensitiveDataManager.clear_cache()
+        yield backend
+    SensitiveDataManager.clear_cache()
+
+
+@pytest.fixture(autouse=True)
+def fast_scrypt(monkeypatch):
+    monkeypatch.setattr(EncryptedFileVault, 'SCRYPT_N', 2 ** 4)
+
+
+def test_secret_cache_expires():
+    cache = SecretCache(ttl=10)
+    with patch('profiles.security.time.monotonic', return_value=100):
+        cache.set('OpenAI', 'api_key', 'secret')
+        assert cache.get('OpenAI', 'api_key') == 'secret'
+    with patch('profiles.security.time.monotonic', return_value=110):
+        assert cache.get('OpenAI', 'api_key') is None
+    assert len(cache) == 0
+
+
+def test_secret_cache_wipes_dropped_values():
+    cache = SecretCache(ttl=10)
+    cache.set('OpenAI', 'api_key', 'secret')
+    value = cache._entries[('OpenAI', 'api_key')][0]
+    cache.clear()
+    assert value == bytearray(6)
+
+
+def test_disabled_secret_cache():
+    cache = SecretCache(ttl=0)
+    cache.set('OpenAI', 'api_key', 'secret')
+    assert cache.get('OpenAI', 'api_key') is None
+
+
+def test_backend_is_queried_once(mock_backend):
+    mock_backend.get.return_value = 'secret'
+    manager = SensitiveDataManager()
+    assert manager.get_sensitive_data('OpenAI', 'api_key') == 'secret'
+    assert SensitiveDataManager().get_sensitive_data('OpenAI', 'api_key') == 'secret'
+    mock_backend.get.assert_called_once_with('OpenAI', 'api_key')
+
+
+def test_set_and_clear_invalidate_cache(mock_backend):
+    mock_backend.get.return_value = 'old'
+    manager = SensitiveDataManager()
+    manager.get_sensitive_data('OpenAI', 'api_key')
+    manager.set_sensitive_data('OpenAI', 'api_key', 'new')
+    mock_backend.set.assert_called_once_with('OpenAI', 'api_key', 'new')
+    mock_backend.get.return_value = 'new'
+    assert manager.get_sensitive_data('OpenAI', 'api_key') == 'new'
+    SensitiveDataManager.clear_cache()
+    manager.get_sensitive_data('OpenAI', 'api_key')
+    assert mock_backend.get.call_count == 3
+
+
+def test_missing_secret_is_not_cached(mock_backend):
+    mock_backend.get.return_value = None
+    assert SensitiveDataManager.get_sensitive_data('OpenAI', 'api_key') is None
+    assert SensitiveDataManager.get_sensitive_data('OpenAI', 'api_key') is None
+    assert mock_backend.get.call_count == 2
+
+
+def test_get_many_reads_only_missing_secrets(mock_backend):
+    mock_backend.get.return_value = 'key'
+    SensitiveDataManager.get_sensitive_data('Notion', 'api_key')
+    mock_backend.get_many.return_value = {'secret': 'value', 'missing': None}
+    values = SensitiveDataManager.get_many_sensitive_data('Notion', ['api_key', 'secret', 'missing'])
+    assert values == {'api_key': 'key', 'secret': 'value', 'missing': None}
+    mock_backend.get_many.assert_called_once_with('Notion', ['secret', 'missing'])
+
+
+def test_vault_round_trip(tmp_path):
+    vault_path = str(tmp_path / 'vault.json')
+    vault = EncryptedFileVault(vault_path, 'passphrase')
+    vault.set('OpenAI', 'api_key', 'sk-secret')
+    vault.set('Notion', 'api_key', 'notion-secret')
+    with open(vault_path) as file:
+        assert 'sk-secret' not in file.read()
+    reopened = EncryptedFileVault(vault_path, 'passphrase')
+    assert reopened.get('OpenAI', 'api_key') == 'sk-secret'
+    assert reopened.get_many('Notion', ['api_key', 'other']) == {'api_key': 'notion-secret', 'other': None}
+    reopened.delete('OpenAI', 'api_key')
+    assert EncryptedFileVault(vault_path, 'passphrase').get('OpenAI', 'api_key') is None
+
+
+def test_vault_rejects_wrong_passphrase(tmp_path):
+    vault_path = str(tmp_path / 'vault.json')
+    EncryptedFileVault(vault_path, 'passphrase').set('OpenAI', 'api_key', 'sk-secret')
+    with pytest.raises(VaultError, match='passphrase'):
+        EncryptedFileVault(vault_path, 'wrong')
+    with open(vault_path, 'w') as file:
+        file.write('{}')
+    with pytest.raises(VaultError, match='corrupted'):
+        EncryptedFileVault(vault_path, 'passphrase')
+
+
+def test_bcrypt_needs_rehash_for_other_cost():
+    old_hash = Bcrypt(rounds=4).encrypt('password')
+    assert not Bcrypt(rounds=4).needs_rehash(old_hash)
+    assert Bcrypt(rounds=5).needs_rehash(old_hash)
+    assert Bcrypt(rounds=5).needs_rehash('not a bcrypt hash')
+
+
+def test_bcrypt_parallel_and_async():
+    strategy = Bcrypt(rounds=4)
+    hashes = strategy.encrypt_many(['first', 'second'])
+    assert strategy.check_encrypted_async('second', hashes[1]).result()
+    assert not strategy.check_encrypted_async('first', hashes[1]).result()
+
+
+def test_calibration_extrapolates_cost():
+    with patch('profiles.security.time.perf_counter', side_effect=[0.0, 0.05]):
+        assert calibrate_bcrypt_rounds(0.25, min_rounds=10) == 12
+    with patch('profiles.security.time.perf_counter', side_effect=[0.0, 1.0]):
+        assert calibrate_bcrypt_rounds(0.25, min_rounds=10) == 10
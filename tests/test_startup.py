@@ -0,0 +1,30 @@
+from unittest.mock import MagicMock
+
+from benchmarks.bench_startup import measure
+from controller.actions.menu_actions import MainMenu
+from controller.actions_dispatcher import ACTIONS, ActionsDispatcher
+
+
+def test_heavy_modules_are_not_imported_at_startup():
+    _, times, heavy = measure('controller.application')
+    assert heavy == []
+    assert 'controller.actions.cards_actions' not in times
+
+
+def _dispatcher():
+    return ActionsDispatcher(*(MagicMock() for _ in range(6)))
+
+
+def test_actions_are_created_on_first_use():
+    dispatcher = _dispatcher()
+    assert dispatcher.actions == {}
+    action = dispatcher.get_action('main_menu')
+    assert isinstance(action, MainMenu)
+    assert dispatcher.get_action('main_menu') is action
+    assert dispatcher.get_action('unknown') is None
+
+
+def test_all_registered_actions_can_be_created():
+    dispatcher = _dispatcher()
+    for action_key in ACTIONS:
+        assert dispatcher.get_action(action_key) is not None
@@ -0,0 +1,134 @@
+import pytest
+
+from flashcards.deck import Card
+from flashcards.store import CardStatus, DeckStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    with DeckStore(str(tmp_path / 'decks.sqlite3')) as deck_store:
+        yield deck_store
+
+
+@pytest.fixture
+def cards():
+    return [Card(front=f'Front {i}', back=f'Back {i}') for i in range(5)]
+
+
+def test_store_uses_wal_mode(store):
+    assert store.connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_add_cards_and_load_deck(store, cards):
+    assert store.add_cards('user/main', cards, source='note') == 5
+    deck = store.load_deck('user/main')
+    assert deck.cards == cards
+    assert store.deck_names() == ['user/main']
+
+
+def test_add_cards_updates_existing(store, cards):
+    store.add_cards('user/main', cards)
+    changed = Card.restore(cards[0].card_id, 'New front', 'New back')
+    store.add_cards('user/main', [changed])
+    assert store.count('user/main') == 5
+    assert store.get_card('user/main', cards[0].card_id) == changed
+
+
+def test_adding_reviewed_card_again_keeps_its_status(store, cards):
+    store.add_cards('user/main', cards, source='note-1')
+    store.record_reviews('user/main', {cards[0].card_id: CardStatus.APPROVED, cards[1].card_id: CardStatus.REJECTED})
+    store.add_cards('user/main', cards[:2], source='note-2')
+    assert list(store.iter_cards('user/main', status=CardStatus.APPROVED)) == [cards[0]]
+    assert list(store.iter_cards('user/main', status=CardStatus.REJECTED)) == [cards[1]]
+    assert list(store.iter_cards('user/main', source='note-2')) == cards[:2]
+    store.add_cards('user/main', cards[:1])
+    assert list(store.iter_cards('user/main', source='note-2')) == cards[:2]
+
+
+def test_decks_are_separated(store, cards):
+    store.add_cards('user/main', cards[:2])
+    store.add_cards('user/other', cards[2:])
+    assert store.count('user/main') == 2
+    assert store.count('user/other') == 3
+    assert store.get_card('user/main', cards[3].card_id) is None
+
+
+def test_filter_by_source_and_status(store, cards):
+    store.add_cards('user/main', cards[:3], source='note-1')
+    store.add_cards('user/main', cards[3:], source='note-2', status=CardStatus.APPROVED)
+    assert list(store.iter_cards('user/main', source='note-1')) == cards[:3]
+    assert list(store.iter_cards('user/main', status=CardStatus.APPROVED)) == cards[3:]
+    assert store.count('user/main', status=CardStatus.NEW, source='note-2') == 0
+
+
+def test_fetch_page(store, cards):
+    store.add_cards('user/main', cards)
+    first_page, cursor = store.fetch_page('user/main', limit=2)
+    second_page, cursor = store.fetch_page('user/main', after=cursor, limit=2)
+    assert first_page == cards[:2]
+    assert second_page == cards[2:4]
+    assert list(store.iter_cards('user/main', page_size=2)) == cards
+
+
+def test_record_reviews(store, cards):
+    store.add_cards('user/main', cards)
+    edited = Card(front='Edited', back='Edited back')
+    store.record_reviews(
+        'user/main',
+        {cards[0].card_id: CardStatus.APPROVED, cards[1].card_id: CardStatus.REJECTED},
+        {cards[2].card_id: edited}
+    )
+    assert list(store.iter_cards('user/main', status=CardStatus.APPROVED)) == [cards[0], edited]
+    assert list(store.iter_cards('user/main', status=CardStatus.REJECTED)) == [cards[1]]
+    assert store.get_card('user/main', cards[2].card_id) is None
+
+
+def test_record_reviews_is_transactional(store, cards):
+    store.add_cards('user/main', cards)
+    with pytest.raises(AttributeError):
+        store.record_reviews('user/main', {cards[0].card_id: CardStatus.APPROVED}, {cards[1].card_id: None})
+    assert store.count('user/main', status=CardStatus.APPROVED) == 0
+
+
+def test_remove_cards_and_delete_deck(store, cards):
+    store.add_cards('user/main', cards)
+    store.remove_cards('user/main', [cards[0].card_id, cards[1].card_id])
+    assert store.count('user/main') == 3
+    store.delete_deck('user/main')
+    assert store.deck_names() == []
+    assert store.count('user/main') == 0
+
+
+def test_search_whole_deck(store):
+    store.add_cards('user/main', [Card(front='What is Python?', back='A programming language.'),
+                                  Card(front='What is Rust?', back='A systems programming language.')])
+    store.add_cards('user/other', [Card(front='Python in other deck', back='Not found.')])
+    store.add_cards('user/main', [Card(front='Who created Python?', back='Guido.')], status=CardStatus.APPROVED)
+    results = store.search('user/main', 'python')
+    assert {card.front for card, _ in results} == {'What is Python?', 'Who created Python?'}
+    assert [status for card, status in results if card.front.startswith('Who')] == [CardStatus.APPROVED]
+    assert store.search('user/main', 'rust systems')[0][0].front == 'What is Rust?'
+    assert store.search('user/main', '?!') == []
+
+
+def test_search_index_follows_changes(store, cards):
+    store.add_cards('user/main', cards)
+    store.add_cards('user/main', [Card.restore(cards[0].card_id, 'Changed front', 'Back 0')])
+    store.record_reviews('user/main', {}, {cards[1].card_id: Card(front='Edited card', back='Edited back')})
+    store.remove_cards('user/main', [cards[2].card_id])
+    assert [card.front for card, _ in store.search('user/main', 'changed')] == ['Changed front']
+    assert [card.front for card, _ in store.search('user/main', 'edited')] == ['Edited card']
+    assert store.search('user/main', 'front 1') == []
+    assert store.search('user/main', 'front 2') == []
+    store.delete_deck('user/main')
+    assert store.connection.execute("SELECT COUNT(*) FROM cards_fts WHERE cards_fts MATCH 'front'").fetchone()[0] == 0
+
+
+def test_existing_cards_are_indexed_on_upgrade(tmp_path, cards):
+    db_path = str(tmp_path / 'decks.sqlite3')
+    with DeckStore(db_path) as store:
+        store.add_cards('user/main', cards)
+        store.connection.executescript('DROP TABLE cards_fts; DROP TRIGGER cards_fts_insert; '
+                                       'DROP TRIGGER cards_fts_delete; DROP TRIGGER cards_fts_update;')
+    with DeckStore(db_path) as store:
+        assert len(store.search('user/main', 'front')) == 5
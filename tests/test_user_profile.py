@@ -98,3 +98,34 @@ def test_remove_profile_success(user, profile):
 def test_remove_nonexistent_profile_raises_error(user, profile):
     with pytest.raises(NoProfileError, match="Profile main does not exist for user test_user"):
         user.remove_profile(profile)
+
+
+PROFILE_DATA = {
+    'profile_name': 'main',
+    'credentials': [{'credentials_type': 'AI', 'service_name': 'OpenAI', 'gpt_model': 'gpt-4'}],
+    'default_ai': 'OpenAI'
+}
+
+
+def test_profile_indexes_follow_credentials_changes():
+    profile = Profile.from_dict(PROFILE_DATA)
+    credentials = profile.get_credentials('OpenAI')
+    assert profile.as_dict() == PROFILE_DATA
+    profile.remove_credentials(credentials)
+    assert profile.default_ai is None
+    with pytest.raises(NoCredentialsError):
+        profile.get_credentials('OpenAI')
+    profile.add_credentials(credentials)
+    assert profile.default_ai == 'OpenAI'
+    assert profile.as_dict() == PROFILE_DATA
+
+
+def test_user_profiles_index():
+    user = User.from_dict({'user_name': 'jane', 'encrypted_password': 'hash',
+                           'profiles': [PROFILE_DATA, {**PROFILE_DATA, 'profile_name': 'work'}]})
+    assert user.get_profile('work') is user.profiles[1]
+    user.remove_profile('main')
+    assert not user.profile_exists('main')
+    with pytest.raises(NoProfileError):
+        user.get_profile('main')
+    assert [profile['profile_name'] for profile in user.as_dict()['profiles']] == ['work']
@@ -32,6 +32,8 @@ main_menu = {
     'generate_cards': '4. Generate flashcards',
     'work_with_cards': '5. Work with flashcards',
     'export_cards': '6. Export cards',
+    'search_cards': '7. Search cards',
+    'review_cards': '8. Review due cards',
     'logout': '9. Logout',
     'exit': '0. Quit program'
 }
@@ -53,8 +55,8 @@ ai_menu = {
 }
 
 source_menu = {
-    'source_file': '1. Select the note from file (.txt)',
-    'source_notion': '2. Select Notion note (coming soon)',
+    'source_file': '1. Select the note from file (.txt, .md)',
+    'source_notion': '2. Select Notion note',
     'main_menu': '8. Back to main menu',
     'logout': '9. Logout',
     'exit': '0. Quit program'
@@ -62,6 +64,7 @@ source_menu = {
 
 export_menu = {
     'export_to_txt': '1. Export cards to .txt file',
+    'export_to_binary': '2. Export cards to binary deck (.fcdk) file',
     'main_menu': '8. Back to main menu',
     'logout': '9. Logout',
     'exit': '0. Quit program'
@@ -78,9 +81,10 @@ menus = {
 
 stages = {
     'no_profile_selected': ['profile_menu', 'logout', 'exit'],
-    'no_ai': ['profile_menu', 'ai_menu', 'logout', 'exit'],
-    'no_note_selected': ['profile_menu', 'ai_menu', 'source_menu', 'logout', 'exit'],
-    'no_cards_generated': ['profile_menu', 'ai_menu', 'source_menu', 'generate_cards', 'logout', 'exit'],
+    'no_ai': ['profile_menu', 'ai_menu', 'search_cards', 'review_cards', 'logout', 'exit'],
+    'no_note_selected': ['profile_menu', 'ai_menu', 'source_menu', 'search_cards', 'review_cards', 'logout', 'exit'],
+    'no_cards_generated': ['profile_menu', 'ai_menu', 'source_menu', 'generate_cards', 'search_cards',
+                           'review_cards', 'logout', 'exit'],
     'cards_generated': ['profile_menu', 'ai_menu', 'source_menu', 'generate_cards', 'work_with_cards',
-                        'export_cards' 'logout', 'exit']
+                        'export_cards', 'search_cards', 'review_cards', 'logout', 'exit']
 }
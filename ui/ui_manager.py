@@ -1,7 +1,8 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional
 
 from flashcards.deck import Deck
+from notes.markdown import NoteChunk
 from profiles.credentials import Credentials
 from profiles.user_profile import Profile, User
 from ui.menu_items import MenuState, StageState
@@ -15,9 +16,17 @@ class ContextManager:
     current_profile: Optional[Profile] = None
     current_ai: Optional[Credentials] = None
     current_note: Optional[str] = None
+    # Parts of the note cards are generated from, the whole note if not set
+    current_note_chunks: Optional[List[NoteChunk]] = None
     temp_deck: Optional[Deck] = None
     final_deck: Optional[Deck] = None
 
+    @property
+    def deck_name(self) -> Optional[str]:
+        if not self.current_user or not self.current_profile:
+            return None
+        return f'{self.current_user.user_name}/{self.current_profile.profile_name}'
+
 
 class MenuManager:
     def __init__(self, menus: dict, stages: dict, context_manager: ContextManager) -> None:
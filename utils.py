@@ -1,8 +1,10 @@
 import json
 import os
 import platform
-import bcrypt
-from typing import Any, Callable, Dict
+import re
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Any, Callable, Dict, Iterator, Union
 
 clear_command = 'cls' if os.name == 'nt' else 'clear'
 
@@ -22,3 +24,43 @@ def get_default_text_editor() -> str:
     else:
         raise RuntimeError('Unsupported operating system.')
 
+
+def normalize_text(text: str) -> str:
+    """Casefold text and drop punctuation and repeated whitespaces, so trivially different texts compare equal."""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', text.casefold()).split())
+
+
+def atomic_write(file_path: str, data: Union[str, bytes]) -> None:
+    """Write file so it contains either previous or the new data, even after a crash mid-write."""
+    with atomic_open(file_path, 'wb') as file:
+        file.write(data.encode('utf-8') if isinstance(data, str) else data)
+
+
+@contextmanager
+def atomic_open(file_path: str, mode: str = 'w') -> Iterator[IO]:
+    """Open a temporary file for writing which replaces `file_path` when the block ends without an error."""
+    dir_path = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(dir_path, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix=f'.{os.path.basename(file_path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    fsync_directory(dir_path)
+
+
+def fsync_directory(dir_path: str) -> None:
+    """Persist directory entries (renames), not supported on Windows."""
+    if os.name == 'nt':
+        return
+    fd = os.open(dir_path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)